@@ -2,11 +2,14 @@
 """
 Rabbit MQ Client
 ================
-Modified: 2021-10
+Modified: 2026-10
 """
 
 from pika import BlockingConnection, ConnectionParameters, PlainCredentials
+import json
 import logging
+from threading import Lock
+from typing import Any
 
 from monitor.logs.formatter import pformat
 from monitor.amqp.conf import AMQPConf
@@ -30,6 +33,8 @@ class AMQPClient:
             )
         )
         self.channel = connection.channel()
+        # blocking channels are not thread safe
+        self._lock = Lock()
         # self.channel.queue_declare(queue='telemetry')
         self.channel.basic_consume(
             queue=AMQPConf.Routes.TELEMETRY,
@@ -42,3 +47,17 @@ class AMQPClient:
         self._logger.info("ch: %s:%s | method: %s:%s | properties: %s:%s | body: %s:%s",
                           ch, type(ch), method, type(method), properties, type(properties), body, type(body))
         self._logger.info("Message payload: %s", pformat(body))
+
+    def publish(self, payload: Any, route: str = AMQPConf.Routes.TELEMETRY) -> None:
+        """
+        Publish a json payload to the device exchange
+
+        :param payload: json serializable payload
+        :type payload: Any
+        :param route: routing key, defaults to the telemetry route
+        :type route: str, optional
+        """
+        body = json.dumps(payload, separators=(',', ':'))
+        with self._lock:
+            self.channel.basic_publish(exchange=AMQPConf.EXCHANGE, routing_key=route, body=body)
+        self._logger.debug("Published %s bytes to route: %s", len(body), route)
@@ -3,33 +3,81 @@
 """
 ApiHandler
 ==========
-Modified: 2021-05
+Modified: 2026-10
 
 This module is responsible for sending our various request types to our API and raising appropriate
 exceptions that result from these requests. All outgoing raises are base exceptions of type:
 ConnectionError, TimeoutError, and KeyError. Exceptions raised within this module are from the
 requests.exceptions library.
 
+Requests share one keep-alive connection pool sized by MONITOR_API_CONNECTIONS. Concurrency is limited
+per request type (api GET, api POST and presigned image GET) instead of serializing every request so
+the images of a capture set can be uploaded in parallel. Parallel requests rejecting the same jwt
+share a single jwt request.
+
 Dependencies:
 -------------
 ```
+import os
 import json
+import time
 import logging
 import requests
+import functools
 from retry import retry
+from typing import Callable, Optional
+from threading import BoundedSemaphore, Lock
+from requests.adapters import HTTPAdapter
+from monitor.api.multipart import MultipartStream
+from monitor.environment.thread_manager import ThreadManager as tm
+from monitor.metrics.registry import Histogram, MetricsRegistry as metrics
 ```
 Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
 
+import os
 import json
+import time
 import logging
 import requests
+import functools
 
 from retry import retry
+from typing import Callable, Optional
+from threading import BoundedSemaphore, Lock
+from requests.adapters import HTTPAdapter
+from monitor.api.multipart import MultipartStream
 from monitor.environment.state_manager import StateManager
 from monitor.environment.thread_manager import ThreadManager as tm
+from monitor.metrics.registry import Histogram, MetricsRegistry as metrics
+
+_API_ERRORS = metrics.counter('api.errors')
+
+
+def _instrumented(histogram: Histogram) -> Callable:
+    """
+    Record the request time of an api request method and count failed requests
+
+    :param histogram: request time histogram
+    :type histogram: Histogram
+    :return: decorator
+    :rtype: Callable
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except requests.exceptions.RequestException:
+                _API_ERRORS.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
 
 
 class ApiHandler:
@@ -37,6 +85,17 @@ class ApiHandler:
     GET_TIMEOUT = 15
     POST_TIMEOUT = 15
     PUT_TIMEOUT = 15
+    # keep-alive connections held by the session
+    MAX_CONNECTIONS = int(os.environ.get('MONITOR_API_CONNECTIONS', default=4))
+    # concurrent requests per request type
+    GET_CONCURRENCY = int(os.environ.get('MONITOR_API_GET_CONCURRENCY', default=2))
+    POST_CONCURRENCY = int(os.environ.get('MONITOR_API_POST_CONCURRENCY', default=4))
+    IMAGE_CONCURRENCY = int(os.environ.get('MONITOR_API_IMAGE_CONCURRENCY', default=2))
+    _get_limit = BoundedSemaphore(GET_CONCURRENCY)
+    _post_limit = BoundedSemaphore(POST_CONCURRENCY)
+    _image_limit = BoundedSemaphore(IMAGE_CONCURRENCY)
+    # concurrent 401s of the same jwt within this many seconds share one jwt request
+    JWT_COALESCE = float(os.environ.get('MONITOR_API_JWT_COALESCE', default=10.0))
 
     """
     Class that processes the service requests related to obtaining our device information
@@ -45,13 +104,21 @@ class ApiHandler:
     def __init__(self, base_url: str, base_path: str):
         # bind logging to config file
         self._logger = logging.getLogger(__name__)
-        # add a session object interfacing requests (enables context management)
+        # the session is kept open for the lifetime of the handler so its connections are reused
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.MAX_CONNECTIONS, pool_maxsize=self.MAX_CONNECTIONS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.url = base_url + base_path
+        # the rejected jwt the last jwt request was made for and when it was dispatched
+        self._jwt_lock = Lock()
+        self._refreshed_jwt: Optional[str] = None
+        self._refreshed_at = float('-inf')
         self._logger.info("Set api url to %s", self.url)
         self._logger.info("Instantiation successful.")
 
-    @tm.lock(tm.api_lock)
+    @tm.lock(_get_limit)
+    @_instrumented(metrics.histogram('api.get'))
     def _get_request(self, path: str, jwt: str = None) -> requests.Response:
         """
         Performs a GET request to API and fetches response from requests.Session.
@@ -72,25 +139,25 @@ class ApiHandler:
         self._logger.info("Starting API GET request to: %s", str(self.url) + path)
         if jwt is None:
             self._logger.info("Unauthenticated API call initiated without jwt.")
-            with self.session as session:
-                response = session.get(str(self.url) + path, timeout=self.GET_TIMEOUT)
+            response = self.session.get(str(self.url) + path, timeout=self.GET_TIMEOUT)
         else:
             self._logger.info("Authenticated API GET request initiated with jwt: %s", jwt)
             headers = {'Authorization': jwt}
-            with self.session as session:
-                response = session.get(str(self.url) + path,
-                                       timeout=self.GET_TIMEOUT, headers=headers)
+            response = self.session.get(str(self.url) + path,
+                                        timeout=self.GET_TIMEOUT, headers=headers)
         # raise HTTPError corresponding to the status code error
         self._logger.info("Request Reponse Reason: %s", response.reason)
         # raise HTTPError corresponding to the status code error
         response.raise_for_status()
         return response
 
-    @tm.lock(tm.api_lock)
+    @tm.lock(_post_limit)
+    @_instrumented(metrics.histogram('api.post'))
     def _post_request(self, path: str, jwt: str, payload: dict, file_payload: bytes = None,
                       csrf: str = None) -> requests.Response:
         """
-        Performs a POST request to the Incuvers API.
+        Performs a POST request to the Incuvers API. A file payload is streamed from the buffer it
+        was encoded into as a multipart form body alongside the json encoded payload.
 
         :param path: url path associated with the request endpoint
         :param payload: POST payload of type python dict
@@ -103,7 +170,7 @@ class ApiHandler:
         :raises requests.exceptions.ConnectionError: if the response fetch failed due to a network error
         :raises requests.exceptions.HTTPError: if the response fetch has a status code that is not 200
 
-        :return:
+        :return: the response object
         """
         # get device jwt from state
         self._logger.info("Starting API POST request to: %s\nJWT: %s\nPayload: %s",
@@ -112,30 +179,32 @@ class ApiHandler:
             "Authorization": jwt,
             "x-csrf-token": csrf
         }
-        with self.session as session:
-            if file_payload is None:
-                response = session.post(
-                    str(self.url) + path,
-                    json=payload,
-                    timeout=self.POST_TIMEOUT,
-                    headers=headers
-                )
-            else:  # Need to restructure the request a bit it a file is present
-                # jsonify python dict object
-                response = session.post(
-                    str(self.url) + path,
-                    data={"data": json.dumps(payload)},
-                    files={'media': file_payload},
-                    timeout=self.POST_TIMEOUT,
-                    headers=headers
-                )
+        if file_payload is None:
+            response = self.session.post(
+                str(self.url) + path,
+                json=payload,
+                timeout=self.POST_TIMEOUT,
+                headers=headers
+            )
+        else:  # Need to restructure the request a bit it a file is present
+            # jsonify python dict object. The body is read out of the file payload in chunks rather
+            # than assembled in memory by requests
+            body = MultipartStream({"data": json.dumps(payload)}, {"media": file_payload})
+            headers["Content-Type"] = body.content_type
+            response = self.session.post(
+                str(self.url) + path,
+                data=body,
+                timeout=self.POST_TIMEOUT,
+                headers=headers
+            )
         # raise HTTPError corresponding to the status code error
         self._logger.info("Request Reponse Reason: %s", response.reason)
         # raise HTTPError corresponding to the status code error
         response.raise_for_status()
         return response
 
-    @tm.lock(tm.api_lock)
+    @tm.lock(_image_limit)
+    @_instrumented(metrics.histogram('api.image'))
     def _get_image(self, pre_signed_url: str) -> bytes:
         """
         Makes a response call to the presigned url for a saved image.
@@ -150,10 +219,9 @@ class ApiHandler:
 
         :return bytes: Image contents from passed url
         """
-        with self.session as session:
-            # custom presigned response endpoint for fetching the image
-            response = session.get(pre_signed_url, timeout=self.GET_TIMEOUT, stream=True)
-            response.raise_for_status()
+        # custom presigned response endpoint for fetching the image
+        response = self.session.get(pre_signed_url, timeout=self.GET_TIMEOUT, stream=True)
+        response.raise_for_status()
         return response.content
 
     @retry(ReferenceError, tries=3, delay=2)
@@ -173,7 +241,7 @@ class ApiHandler:
         csrf = device.jwt_payload.get('csrf') if device.jwt_payload is not None else None
         # if jwt doesnt exist request a new jwt and retry with backoff for update
         if jwt is None:
-            result = self.refresh_jwt()
+            result = self.refresh_jwt(jwt)
             if result: raise ReferenceError
             else: raise ConnectionError
         try:
@@ -217,16 +285,31 @@ class ApiHandler:
         else:
             self._logger.warning('ID is not valid, no jwt was generated')
 
-    def refresh_jwt(self) -> bool:
-        """ Refresh JWT for rerequest """
-        try:
-            # if request session token raises connection error it is caught by the caller
-            # of this method call. For a timeout we have to catch and typecast to ConnectionError
-            self.request_session_token()
-        except (TimeoutError, KeyError):
-            self._logger.exception(
-                "While attempting to rerequest the session token the server timed out.")
-            return False
+    def refresh_jwt(self, jwt: Optional[str] = None) -> bool:
+        """
+        Refresh JWT for rerequest. Requests rejecting the same jwt share one jwt request: a refresh
+        for a jwt which was already refreshed within JWT_COALESCE seconds waits for that refresh
+        and reuses it instead of requesting another jwt.
+
+        :param jwt: the jwt which was rejected (or None if the device has no jwt)
+        :type jwt: Optional[str], optional
+        :return: True if a new jwt was requested
+        :rtype: bool
+        """
+        with self._jwt_lock:
+            if jwt == self._refreshed_jwt and time.monotonic() - self._refreshed_at < self.JWT_COALESCE:
+                self._logger.info("Jwt refresh already requested for rerequest")
+                return True
+            try:
+                # if request session token raises connection error it is caught by the caller
+                # of this method call. For a timeout we have to catch and typecast to ConnectionError
+                self.request_session_token()
+            except (TimeoutError, KeyError):
+                self._logger.exception(
+                    "While attempting to rerequest the session token the server timed out.")
+                return False
+            self._refreshed_jwt = jwt
+            self._refreshed_at = time.monotonic()
         self._logger.info("Refreshed jwt for rerequest")
         return True
 
@@ -247,7 +330,7 @@ class ApiHandler:
         path = f'/devices/{device.id}/key'
         # if jwt doesnt exist request a new jwt and retry with backoff for update
         if jwt is None:
-            result = self.refresh_jwt()
+            result = self.refresh_jwt(jwt)
             if result: raise ReferenceError
             else: raise ConnectionError
         try:
@@ -258,7 +341,7 @@ class ApiHandler:
                                    exc.response.status_code
                                    )
             if exc.response.status_code == 401:
-                result = self.refresh_jwt()
+                result = self.refresh_jwt(jwt)
                 if result: raise ReferenceError
                 else: raise ConnectionError
             elif exc.response.status_code == 404:
@@ -373,7 +456,7 @@ class ApiHandler:
         csrf = device.jwt_payload.get('csrf') if device.jwt_payload is not None else None
         # if jwt doesnt exist request a new jwt and retry with backoff for update
         if jwt is None:
-            result = self.refresh_jwt()
+            result = self.refresh_jwt(jwt)
             if result: raise ReferenceError
             else: raise ConnectionError
         try:
@@ -386,7 +469,7 @@ class ApiHandler:
                                    )
             # reattempt if the server gives a bad 400 response which does not involve a bad url
             if exc.response.status_code == 401:
-                result = self.refresh_jwt()
+                result = self.refresh_jwt(jwt)
                 if result: raise ReferenceError
             raise ConnectionError from exc
         except requests.exceptions.Timeout as exc:
@@ -425,7 +508,7 @@ class ApiHandler:
         csrf = device.jwt_payload.get('csrf') if device.jwt_payload is not None else None
         # validate jwt before request
         if jwt is None:
-            result = self.refresh_jwt()
+            result = self.refresh_jwt(jwt)
             if result: raise ReferenceError
             else: raise ConnectionError
         try:
@@ -437,7 +520,7 @@ class ApiHandler:
                                    )
             # reattempt if the server gives a bad 400 response which does not involve a bad url
             if exc.response.status_code == 401:
-                result = self.refresh_jwt()
+                result = self.refresh_jwt(jwt)
                 if result: raise ReferenceError
             raise ConnectionError from exc
         except requests.exceptions.Timeout as exc:
@@ -469,7 +552,7 @@ class ApiHandler:
                                    exc.response.status_code
                                    )
             if exc.response.status_code == 401:
-                result = self.refresh_jwt()
+                result = self.refresh_jwt(jwt)
                 if result: raise ReferenceError
             raise ConnectionError from exc
         except requests.exceptions.RequestException as exc:
@@ -505,7 +588,7 @@ class ApiHandler:
                                    exc.response.status_code
                                    )
             if exc.response.status_code == 401:
-                result = self.refresh_jwt()
+                result = self.refresh_jwt(jwt)
                 if result: raise ReferenceError
                 else: raise ConnectionError
             raise ConnectionError from exc
@@ -542,7 +625,7 @@ class ApiHandler:
                                    exc.response.status_code
                                    )
             if exc.response.status_code == 401:
-                result = self.refresh_jwt()
+                result = self.refresh_jwt(jwt)
                 if result: raise ReferenceError
                 else: raise ConnectionError
             raise ConnectionError from exc
@@ -580,7 +663,7 @@ class ApiHandler:
                                    exc.response.status_code
                                    )
             if exc.response.status_code == 401:
-                result = self.refresh_jwt()
+                result = self.refresh_jwt(jwt)
                 if result: raise ReferenceError
                 else: raise ConnectionError
             raise ConnectionError from exc
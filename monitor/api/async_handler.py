@@ -0,0 +1,786 @@
+# -*- coding: utf-8 -*-
+"""
+Async ApiHandler
+================
+Modified: 2026-10
+
+asyncio variant of the ApiHandler. The request methods have the same names, arguments, outgoing
+exceptions (ConnectionError, TimeoutError, KeyError and ReferenceError) and jwt refresh semantics as
+the blocking handler but are coroutines, so any number of outstanding requests (thumbnails, previews,
+image uploads and jwt refreshes) share one event loop instead of holding an OS thread each. Retries
+back off exponentially on the event loop instead of sleeping a thread.
+
+Requests are made by a minimal HTTP/1.1 client on asyncio streams (no async http client is a
+dependency of the monitor). It only implements what the api and the presigned image urls use:
+length-delimited or chunked responses over http or https. Concurrent requests are bounded to
+MAX_CONNECTIONS and at most IDLE_CONNECTIONS connections are kept alive per host.
+
+The device is read from the StateManager on the event loop. This is a lock-free read of the
+committed device snapshot so it never blocks the loop.
+
+Dependencies:
+-------------
+```
+import os
+import ssl
+import json
+import socket
+import time
+import asyncio
+import logging
+import functools
+from urllib.parse import urlsplit
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
+from monitor.models.device import Device
+from monitor.api.multipart import MultipartStream, Part
+from monitor.environment.state_manager import StateManager
+from monitor.exceptions.api import HTTPStatusError, RequestError, RequestTimeout
+from monitor.metrics.registry import Histogram, MetricsRegistry as metrics
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import os
+import ssl
+import json
+import socket
+import time
+import asyncio
+import logging
+import functools
+from urllib.parse import urlsplit
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
+from monitor.models.device import Device
+from monitor.api.multipart import MultipartStream, Part
+from monitor.environment.state_manager import StateManager
+from monitor.exceptions.api import HTTPStatusError, RequestError, RequestTimeout
+from monitor.metrics.registry import Histogram, MetricsRegistry as metrics
+
+_logger = logging.getLogger(__name__)
+_API_ERRORS = metrics.counter('api.errors')
+
+
+def _retry(exceptions: Union[Type[Exception], Tuple[Type[Exception], ...]], tries: int, delay: float,
+           backoff: float = 2) -> Callable:
+    """
+    Retry a coroutine with exponential backoff
+
+    :param exceptions: exceptions which trigger a retry
+    :type exceptions: Union[Type[Exception], Tuple[Type[Exception], ...]]
+    :param tries: maximum number of attempts
+    :type tries: int
+    :param delay: seconds before the first retry
+    :type delay: float
+    :param backoff: delay multiplier between retries, defaults to 2
+    :type backoff: float, optional
+    :return: decorator
+    :rtype: Callable
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            wait = delay
+            for _ in range(tries - 1):
+                try:
+                    return await func(*args, **kwargs)
+                except exceptions as exc:
+                    _logger.warning("%s raised %s, retrying in %s s", func.__name__, type(exc).__name__, wait)
+                    await asyncio.sleep(wait)
+                    wait *= backoff
+            return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _instrumented(histogram: Histogram) -> Callable:
+    """
+    Record the request time of an api request coroutine and count failed requests
+
+    :param histogram: request time histogram
+    :type histogram: Histogram
+    :return: decorator
+    :rtype: Callable
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except RequestError:
+                _API_ERRORS.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class _Response:
+
+    __slots__ = ('status', 'reason', 'headers', 'content')
+
+    def __init__(self, status: int, reason: str, headers: Dict[str, str], content: bytes) -> None:
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+
+    def json(self) -> Any:
+        """
+        :raises ValueError: if the content is not valid json
+        """
+        return json.loads(self.content)
+
+
+_Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class _ConnectionPool:
+
+    def __init__(self, size: int, idle: int) -> None:
+        """
+        :param size: maximum number of concurrent requests
+        :type size: int
+        :param idle: maximum number of kept alive connections per host
+        :type idle: int
+        """
+        self.size = size
+        self.idle = idle
+        # connections opened over the lifetime of the pool
+        self.opened = 0
+        self._idle: Dict[Tuple[str, str, int], List[_Connection]] = {}
+        self._limit: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ssl: Optional[ssl.SSLContext] = None
+
+    async def request(self, method: str, url: str, headers: Dict[str, Optional[str]], body: Sequence[Part] = (),
+                      timeout: Optional[float] = None) -> _Response:
+        """
+        Perform a request. The body chunks are written to the connection as they are (no copy).
+
+        :raises RequestTimeout: if the response is not received within the timeout
+        :raises RequestError: if the url is invalid or the connection failed
+        :return: response
+        :rtype: _Response
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise RequestError("Invalid url {}".format(url))
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        target = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+        head = [
+            '{} {} HTTP/1.1'.format(method, target),
+            'Host: {}'.format(parts.netloc),
+            'Content-Length: {}'.format(sum(len(chunk) for chunk in body)),
+            'Connection: keep-alive'
+        ]
+        # unset headers are dropped like requests does
+        head.extend('{}: {}'.format(name, value) for name, value in headers.items() if value is not None)
+        request = ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1')
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # connections and the semaphore are bound to the loop they were created on
+            self._discard()
+            self._loop = loop
+            self._limit = asyncio.Semaphore(self.size)
+        async with self._limit:
+            try:
+                return await asyncio.wait_for(self._exchange(method, key, request, body), timeout)
+            except asyncio.TimeoutError as exc:
+                raise RequestTimeout("{} {} timed out".format(method, url)) from exc
+            except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+                raise RequestError("{} {} failed: {}".format(method, url, exc)) from exc
+
+    async def close(self) -> None:
+        """
+        Close the idle connections
+        """
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle = {}
+
+    def _discard(self) -> None:
+        """
+        Close the idle connections of the loop the pool was last used on. They are closed on that
+        loop if it is still open. A closed loop can no longer close its transports so their sockets
+        are shut down instead and released with the transport.
+        """
+        for connections in self._idle.values():
+            for _, writer in connections:
+                if self._loop is not None and not self._loop.is_closed():
+                    self._loop.call_soon_threadsafe(writer.close)
+                    continue
+                sock = writer.get_extra_info('socket')
+                try:
+                    if sock is not None: sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self._idle = {}
+
+    async def _exchange(self, method: str, key: Tuple[str, str, int], request: bytes,
+                        body: Sequence[Part]) -> _Response:
+        idle = self._idle.setdefault(key, [])
+        while True:
+            reused = bool(idle)
+            reader, writer = idle.pop() if reused else await self._connect(key)
+            sent = False
+            try:
+                writer.write(request)
+                for chunk in body:
+                    writer.write(chunk)
+                await writer.drain()
+                sent = True
+                response, keep_alive = await self._read(reader)
+            except (OSError, asyncio.IncompleteReadError):
+                writer.close()
+                # the server may close an idle keep-alive connection at any time. A request which was
+                # fully written may have been processed so only a GET is resent on a new connection.
+                if reused and (not sent or method == 'GET'): continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive and len(idle) < self.idle: idle.append((reader, writer))
+            else: writer.close()
+            return response
+
+    async def _connect(self, key: Tuple[str, str, int]) -> _Connection:
+        scheme, host, port = key
+        if scheme == 'https' and self._ssl is None:
+            self._ssl = ssl.create_default_context()
+        self.opened += 1
+        return await asyncio.open_connection(host, port, ssl=self._ssl if scheme == 'https' else None)
+
+    @staticmethod
+    async def _read(reader: asyncio.StreamReader) -> Tuple[_Response, bool]:
+        """
+        Read a response
+
+        :raises asyncio.IncompleteReadError: if the connection closed before the response was read
+        :raises ValueError: if the response is malformed
+        :return: response and whether the connection can be reused
+        :rtype: Tuple[_Response, bool]
+        """
+        line = await reader.readline()
+        if not line: raise asyncio.IncompleteReadError(line, None)
+        version, status, reason = (line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n'): break
+            if not line: raise asyncio.IncompleteReadError(line, None)
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        code = int(status)
+        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0: break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            # skip trailers
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''): pass
+            content = b''.join(chunks)
+        elif 'content-length' in headers:
+            content = await reader.readexactly(int(headers['content-length']))
+        elif code in (204, 304):
+            content = b''
+        else:
+            raise ValueError("Response without a content length")
+        return _Response(code, reason, headers, content), keep_alive
+
+
+class AsyncApiHandler:
+
+    GET_TIMEOUT = 15
+    POST_TIMEOUT = 15
+    PUT_TIMEOUT = 15
+    # concurrent requests sharing the open connections
+    MAX_CONNECTIONS = int(os.environ.get('MONITOR_API_CONNECTIONS', default=4))
+    # connections kept alive per host
+    IDLE_CONNECTIONS = int(os.environ.get('MONITOR_API_IDLE_CONNECTIONS', default=MAX_CONNECTIONS))
+    # concurrent 401s of the same jwt within this many seconds share one jwt request
+    JWT_COALESCE = float(os.environ.get('MONITOR_API_JWT_COALESCE', default=10.0))
+
+    def __init__(self, base_url: str, base_path: str):
+        self._logger = logging.getLogger(__name__)
+        self._pool = _ConnectionPool(self.MAX_CONNECTIONS, self.IDLE_CONNECTIONS)
+        self.url = base_url + base_path
+        # the rejected jwt the last jwt request was made for and when it was dispatched
+        self._jwt_lock: Optional[asyncio.Lock] = None
+        self._jwt_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._refreshed_jwt: Optional[str] = None
+        self._refreshed_at = float('-inf')
+        self._logger.info("Set api url to %s", self.url)
+        self._logger.info("Instantiation successful.")
+
+    async def close(self) -> None:
+        """
+        Close the kept alive connections
+        """
+        await self._pool.close()
+
+    @staticmethod
+    def _device() -> Device:
+        """
+        Get the committed device snapshot without blocking the event loop
+
+        :return: device runtime model snapshot
+        :rtype: Device
+        """
+        with StateManager() as state:
+            return state.device
+
+    @staticmethod
+    def _raise_for_status(response: _Response) -> None:
+        """
+        :raises HTTPStatusError: if the response has an error status code
+        """
+        if response.status >= 400:
+            raise HTTPStatusError(response.status, "{} {}".format(response.status, response.reason))
+
+    @_instrumented(metrics.histogram('api.get'))
+    async def _get_request(self, path: str, jwt: str = None) -> _Response:
+        """
+        Performs a GET request to API
+
+        :param path: url path associated with the request endpoint
+
+        :raises RequestError: if there was an ambiguous exception that occurred while handling the request
+        :raises RequestTimeout: if the response fetch timed out
+        :raises HTTPStatusError: if the response fetch has an error status code
+
+        :return: the response object which holds the payload from the api call
+        """
+        self._logger.info("Starting API GET request to: %s", str(self.url) + path)
+        if jwt is None:
+            self._logger.info("Unauthenticated API call initiated without jwt.")
+            headers = {}
+        else:
+            self._logger.info("Authenticated API GET request initiated with jwt: %s", jwt)
+            headers = {'Authorization': jwt}
+        response = await self._pool.request('GET', str(self.url) + path, headers, timeout=self.GET_TIMEOUT)
+        self._logger.info("Request Reponse Reason: %s", response.reason)
+        self._raise_for_status(response)
+        return response
+
+    @_instrumented(metrics.histogram('api.post'))
+    async def _post_request(self, path: str, jwt: str, payload: dict, file_payload: bytes = None,
+                            csrf: str = None) -> _Response:
+        """
+        Performs a POST request to the Incuvers API. A file payload is sent as multipart form data
+        alongside the json encoded payload.
+
+        :param path: url path associated with the request endpoint
+        :param payload: POST payload of type python dict
+
+        :raises RequestError: if there was an ambiguous exception that occurred while handling the request
+        :raises RequestTimeout: if the response fetch timed out
+        :raises HTTPStatusError: if the response fetch has an error status code
+
+        :return: the response object
+        """
+        self._logger.info("Starting API POST request to: %s\nJWT: %s\nPayload: %s",
+                          str(self.url) + path, jwt, payload)
+        headers = {
+            "Authorization": jwt,
+            "x-csrf-token": csrf
+        }
+        if file_payload is None:
+            headers['Content-Type'] = 'application/json'
+            body: List[Part] = [json.dumps(payload).encode()]
+        else:
+            # the file payload is written between the form parts without being copied
+            multipart = MultipartStream({"data": json.dumps(payload)}, {"media": file_payload})
+            headers['Content-Type'] = multipart.content_type
+            body = multipart.parts
+        response = await self._pool.request('POST', str(self.url) + path, headers, body, timeout=self.POST_TIMEOUT)
+        self._logger.info("Request Reponse Reason: %s", response.reason)
+        self._raise_for_status(response)
+        return response
+
+    @_instrumented(metrics.histogram('api.image'))
+    async def _get_image(self, pre_signed_url: str) -> bytes:
+        """
+        Makes a response call to the presigned url for a saved image.
+
+        :raises RequestError: if there was an ambiguous exception that occurred while handling the request
+        :raises RequestTimeout: if the response fetch timed out
+        :raises HTTPStatusError: if the response fetch has an error status code
+
+        :return bytes: Image contents from passed url
+        """
+        response = await self._pool.request('GET', pre_signed_url, {}, timeout=self.GET_TIMEOUT)
+        self._raise_for_status(response)
+        return response.content
+
+    @_retry(ReferenceError, tries=3, delay=2)
+    async def post_calibration_time(self, payload: dict) -> None:
+        """
+        Updates backend with last co2 calibration time
+
+        :raises ConnectionError: if response status code indicates failure
+        """
+        device = self._device()
+        jwt = device.jwt
+        path = f'/devices/{device.id}/calibration_time'
+        csrf = device.jwt_payload.get('csrf') if device.jwt_payload is not None else None
+        # if jwt doesnt exist request a new jwt and retry with backoff for update
+        if jwt is None:
+            result = await self.refresh_jwt(jwt)
+            if result: raise ReferenceError
+            else: raise ConnectionError
+        try:
+            response = await self._post_request(path, jwt, payload, csrf=csrf)
+        except RequestError as exc:
+            self._logger.exception("Failed performing the post request to update the last calibration time")
+            raise ConnectionError from exc
+        else:
+            self._logger.info("Response Reason: %s", response.reason)
+
+    @_retry(TimeoutError, tries=3, delay=1)
+    async def request_session_token(self):
+        """
+        This method executes the api call to request a new JWT
+
+        :raises TimeoutError: if jwt request timed out. Here we want to wait with a backoff and retry
+        :raises ConnectionError: if api call failed to return response or returned with bad status code
+        :raises KeyError: if the JSON decode fails
+        """
+        device = self._device()
+        path = f'/devices/{device.id}/get_device_jwt'
+        try:
+            response = await self._get_request(path)
+        except RequestTimeout as exc:
+            self._logger.exception("Exception: %s during fetch", type(exc).__name__)
+            raise TimeoutError from exc
+        except RequestError as exc:
+            self._logger.exception("Exception: %s during fetch", type(exc).__name__)
+            raise ConnectionError from exc
+        try:
+            response = response.json()
+        except ValueError as exc:
+            self._logger.exception("Exception: %s during payload parse", type(exc).__name__)
+            raise KeyError from exc
+        if response['message']:
+            self._logger.info("Request for new JWT successfully dispatched")
+        else:
+            self._logger.warning('ID is not valid, no jwt was generated')
+
+    async def refresh_jwt(self, jwt: Optional[str] = None) -> bool:
+        """
+        Refresh JWT for rerequest. Requests rejecting the same jwt share one jwt request: a refresh
+        for a jwt which was already refreshed within JWT_COALESCE seconds waits for that refresh
+        and reuses it instead of requesting another jwt.
+
+        :param jwt: the jwt which was rejected (or None if the device has no jwt)
+        :type jwt: Optional[str], optional
+        :return: True if a new jwt was requested
+        :rtype: bool
+        """
+        loop = asyncio.get_running_loop()
+        if self._jwt_loop is not loop:
+            # the lock is bound to the loop it is used on
+            self._jwt_loop = loop
+            self._jwt_lock = asyncio.Lock()
+        async with self._jwt_lock:
+            if jwt == self._refreshed_jwt and time.monotonic() - self._refreshed_at < self.JWT_COALESCE:
+                self._logger.info("Jwt refresh already requested for rerequest")
+                return True
+            try:
+                # if request session token raises connection error it is caught by the caller
+                # of this method call. For a timeout we have to catch and typecast to ConnectionError
+                await self.request_session_token()
+            except (TimeoutError, KeyError):
+                self._logger.exception("While attempting to rerequest the session token the server timed out.")
+                return False
+            self._refreshed_jwt = jwt
+            self._refreshed_at = time.monotonic()
+        self._logger.info("Refreshed jwt for rerequest")
+        return True
+
+    @_retry(ReferenceError, tries=5, delay=10)
+    async def get_registration_key(self) -> str:
+        """
+        Fetch a registration key for device_id from AWS
+
+        :raises ConnectionError: if the response is not fetched due to a connection error or timeout
+        :raises ReferenceError: for updating jwt. caught by @_retry decorator
+        :raises KeyError: if the JSON decode fails
+
+        :return json: json from response object containing the registration key
+        """
+        device = self._device()
+        jwt = device.jwt
+        path = f'/devices/{device.id}/key'
+        # if jwt doesnt exist request a new jwt and retry with backoff for update
+        if jwt is None:
+            result = await self.refresh_jwt(jwt)
+            if result: raise ReferenceError
+            else: raise ConnectionError
+        try:
+            response = await self._post_request(path, jwt, payload={})
+        except HTTPStatusError as exc:
+            self._logger.exception("Exception: %s status_code: %s during fetch", type(exc).__name__, exc.status)
+            if exc.status == 401:
+                result = await self.refresh_jwt(jwt)
+                if result: raise ReferenceError
+                else: raise ConnectionError
+            elif exc.status == 404:
+                # FIXME:if the url doesnt exist it means the backend says we are registered and hasnt provided
+                # this url. However we will simply ignore this assumpion and assume this device is unregistered
+                self._logger.warning("Backend has not provided key url since it believes this device is registered.")
+                return str("ERROR")
+            raise ConnectionError from exc
+        except RequestError as exc:
+            self._logger.exception("Exception: %s during fetch", type(exc).__name__)
+            raise ConnectionError from exc
+        try:
+            response = response.json()
+        except ValueError as exc:
+            self._logger.exception("Problem detected in the returned payload value: %s", exc)
+            raise KeyError from exc
+        reg_key = response['registration_key']
+        self._logger.info("Retrieved registration key: %s", reg_key)
+        return reg_key
+
+    async def get_device_avatar(self) -> bytes:
+        """
+        Fetches the device avatar from AWS. If the response yields an error we do not retry since we
+        have a backup device avatar for this purpose.
+
+        :raises KeyError: if the JSON decode fails
+        :raises ConnectionError: if response status code indicates failure
+
+        :return: device avatar
+        """
+        device = self._device()
+        jwt = device.jwt
+        path = f'/devices/{device.id}/avatar'
+        try:
+            response = await self._get_request(path, jwt)
+        except RequestError as exc:
+            self._logger.exception("Exception: %s during fetch", type(exc).__name__)
+            raise ConnectionError from exc
+        try:
+            payload: dict = response.json()
+        except ValueError as exc:
+            self._logger.exception("Problem detected in the returned payload value: %s", exc)
+            raise KeyError from exc
+        self._logger.info("Retrieved device avatar url: %s", payload.get('pre_signed_url'))
+        try:
+            img = await self._get_image(payload.get('pre_signed_url', ''))
+        except RequestError as exc:
+            self._logger.exception("Exception: %s during image fetch", type(exc).__name__)
+            raise ConnectionError from exc
+        return img
+
+    async def get_exp_thumbnail(self, exp_id: int) -> bytes:
+        """
+        Fetches the experiment thumbnail from AWS.
+
+        :param exp_id: active experiment id
+        :raises KeyError: if the JSON Decode fails
+        :raises ConnectionError: if response status code indicates failure
+
+        :return: experiment thumbnail
+        """
+        path = f'/experiments/{exp_id}/images/thumbnail'
+        device = self._device()
+        jwt = device.jwt
+        try:
+            response = await self._get_request(path, jwt)
+        except RequestError as exc:
+            self._logger.exception("Exception: %s during fetch", type(exc).__name__)
+            raise ConnectionError from exc
+        try:
+            response = response.json()
+        except ValueError as exc:
+            self._logger.exception("Problem detected in the returned payload value: %s", exc)
+            raise KeyError from exc
+        if 'composite_path' in response:
+            img_url = response['composite_path']
+            self._logger.info("Retrieved composite thumbnail: %s", img_url)
+        else:
+            img_url = response['phase_path']
+            self._logger.info("Retrieved dpc thumbnail: %s", img_url)
+        try:
+            img = await self._get_image(img_url)
+        except RequestError as exc:
+            self._logger.exception("Exception: %s during image fetch", type(exc).__name__)
+            raise ConnectionError from exc
+        return img
+
+    @_retry(ReferenceError, tries=2, delay=2)
+    @_retry(TimeoutError, tries=2, delay=2)
+    async def post_img(self, payload: dict, exp_id: int, file_payload: bytes) -> int:
+        """
+        Post a DPC or GFP capture to AWS lambda for post-processing. The first image post creates the
+        image pack and returns its image ID which subsequent posts specify.
+
+        :raises ConnectionError: if the response is not fetched due to a connection error
+        :raises TimeoutError: if the request timed out on every attempt
+        :raises ReferenceError: for updating jwt. caught by @_retry decorator
+        :raises KeyError: if the JSON decode fails
+
+        :return int: image id
+        """
+        path = f'/experiments/{exp_id}/images'
+        device = self._device()
+        jwt = device.jwt
+        csrf = device.jwt_payload.get('csrf') if device.jwt_payload is not None else None
+        # if jwt doesnt exist request a new jwt and retry with backoff for update
+        if jwt is None:
+            result = await self.refresh_jwt(jwt)
+            if result: raise ReferenceError
+            else: raise ConnectionError
+        try:
+            response = await self._post_request(path, jwt, payload, file_payload, csrf)
+        except HTTPStatusError as exc:
+            self._logger.exception("Exception: %s status_code: %s during fetch", type(exc).__name__, exc.status)
+            if exc.status == 401:
+                result = await self.refresh_jwt(jwt)
+                if result: raise ReferenceError
+            raise ConnectionError from exc
+        except RequestTimeout as exc:
+            self._logger.exception("Exception: %s during fetch", type(exc).__name__)
+            raise TimeoutError from exc
+        except RequestError as exc:
+            self._logger.exception("Exception: %s during fetch", type(exc).__name__)
+            raise ConnectionError from exc
+        try:
+            response_payload: dict = response.json()
+        except ValueError as exc:
+            self._logger.exception("Exception: %s during payload parse", type(exc).__name__)
+            raise KeyError from exc
+        image_id = response_payload['image_id']
+        self._logger.info("Retrieved image id: %s", image_id)
+        return image_id
+
+    @_retry(ReferenceError, tries=2, delay=2)
+    @_retry(TimeoutError, tries=2, delay=2)
+    async def post_preview(self, payload: dict, file_payload: bytes) -> None:
+        """
+        Post a preview capture to AWS S3
+
+        :raises ConnectionError: if the response is not fetched due to a connection error
+        :raises TimeoutError: if the request timed out on every attempt
+        :raises ReferenceError: for updating jwt. caught by @_retry decorator
+        """
+        device = self._device()
+        path = f'/preview/{device.id}'
+        jwt = device.jwt
+        csrf = device.jwt_payload.get('csrf') if device.jwt_payload is not None else None
+        # validate jwt before request
+        if jwt is None:
+            result = await self.refresh_jwt(jwt)
+            if result: raise ReferenceError
+            else: raise ConnectionError
+        try:
+            await self._post_request(path, jwt, payload, file_payload, csrf)
+        except HTTPStatusError as exc:
+            self._logger.exception("Exception: %s status_code: %s during fetch", type(exc).__name__, exc.status)
+            if exc.status == 401:
+                result = await self.refresh_jwt(jwt)
+                if result: raise ReferenceError
+            raise ConnectionError from exc
+        except RequestTimeout as exc:
+            self._logger.exception("Exception: %s during fetch", type(exc).__name__)
+            raise TimeoutError from exc
+        except RequestError as exc:
+            self._logger.exception("Exception: %s during fetch", type(exc).__name__)
+            raise ConnectionError from exc
+
+    async def _get_resource(self, path: str, name: str, refresh_failure: bool) -> dict:
+        """
+        Fetch a json resource with the jwt of the device
+
+        :param path: url path of the resource
+        :type path: str
+        :param name: resource name for logging
+        :type name: str
+        :param refresh_failure: raise a ConnectionError immediately when a 401 jwt refresh fails
+        :type refresh_failure: bool
+        :raises ConnectionError: if the response is not fetched due to a connection error or timeout
+        :raises ReferenceError: if the jwt was refreshed after a 401
+        :raises KeyError: if the JSON decode fails
+        :return: resource payload
+        :rtype: dict
+        """
+        device = self._device()
+        jwt = device.jwt
+        try:
+            response = await self._get_request(path.format(device=device), jwt)
+        except HTTPStatusError as exc:
+            self._logger.exception("Exception: %s status_code: %s during fetch", type(exc).__name__, exc.status)
+            if exc.status == 401:
+                result = await self.refresh_jwt(jwt)
+                if result: raise ReferenceError
+                elif refresh_failure: raise ConnectionError
+            raise ConnectionError from exc
+        except RequestError as exc:
+            self._logger.exception("Exception: %s during fetch", type(exc).__name__)
+            raise ConnectionError from exc
+        try:
+            payload = response.json()
+        except ValueError as exc:
+            self._logger.exception("Exception: %s during payload parse", type(exc).__name__)
+            raise KeyError from exc
+        self._logger.info("Retrieved %s: %s", name, payload)
+        return payload
+
+    @_retry(ReferenceError, tries=2, delay=2)
+    async def get_device_info(self) -> dict:
+        """
+        Fetch the device info from AWS
+
+        :raises ConnectionError: if the response is not fetched due to a connection error or timeout
+        :raises ReferenceError: for updating jwt. caught by @_retry decorator
+
+        :return dict: json from response object containing the device info
+        """
+        return await self._get_resource('/devices/{device.id}', 'device info', refresh_failure=False)
+
+    @_retry(ReferenceError, tries=2, delay=2)
+    async def get_experiment(self) -> dict:
+        """
+        Fetch the new experiment for this device
+
+        :raises ConnectionError: if the response is not fetched due to a connection error or timeout
+        :raises ReferenceError: for updating jwt. caught by @_retry decorator
+
+        :return json: json from response object containing the experiment
+        """
+        return await self._get_resource('/devices/{device.id}/pending_experiment', 'experiment', refresh_failure=True)
+
+    @_retry(ReferenceError, tries=2, delay=2)
+    async def get_imaging_profile(self, imaging_profile_id: int) -> dict:
+        """
+        Fetch the imaging profile for an experiment
+
+        :raises ConnectionError: if the response is not fetched due to a connection error or timeout
+        :raises ReferenceError: for updating jwt. caught by @_retry decorator
+
+        :return json: json from response object containing the imaging profile payload
+        """
+        return await self._get_resource(
+            f'/imaging_profiles/{imaging_profile_id}', 'imaging profile', refresh_failure=True
+        )
+
+    @_retry(ReferenceError, tries=2, delay=2)
+    async def get_protocol(self, protocol_id: int) -> dict:
+        """
+        Fetch the new protocol for this device
+
+        :raises KeyError: if the response payload failed to parse
+        :raises ConnectionError: if the response is not fetched due to a connection error or timeout
+        :raises ReferenceError: for updating jwt. caught by @_retry decorator
+
+        :return json: json from response object containing the protocol
+        """
+        return await self._get_resource(f'/protocols/{protocol_id}', 'protocol', refresh_failure=True)
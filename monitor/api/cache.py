@@ -2,62 +2,410 @@
 """
 Api Cache
 ============
-Updated: 2021-05
+Modified: 2026-10
 
+Retry cache for failed api requests. Failed requests are held in FIFO order with duplicate request
+types replaced by their most recent arguments and are replayed once the api connection is
+re-established. Requests made by a proxy method are also written to a durable outbox under
+MONITOR_CACHE so they survive a reboot: the request name and json arguments are kept in an atomically
+replaced manifest and capture image stacks are written to their own compressed files next to it. The
+outbox is bounded by entry count, payload size and age.
 
+Capture image stacks held by cached requests are kept in memory within a RAM budget. Past the budget
+the oldest persisted requests are spilled: their captures are replaced by references to the payload
+files and only loaded again while the request is replayed, so a long offline period does not grow
+the process RSS with every failed upload.
 
 Dependencies:
 -------------
 ```
 import os
-import logging.config
 import json
-from pathlib import Path
+import time
+import uuid
+import zipfile
+import logging
+import numpy as np
+from weakref import WeakKeyDictionary
+from threading import RLock
+from functools import partial
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from monitor.imaging.capture import Capture
+from monitor.metrics.registry import MetricsRegistry as metrics
 ```
 Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
-import copy
+import os
+import json
+import time
+import uuid
+import zipfile
 import logging
+import numpy as np
+from weakref import WeakKeyDictionary
+from threading import RLock
 from functools import partial
-from typing import Callable, Dict
 from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from monitor.imaging.capture import Capture
+from monitor.metrics.registry import MetricsRegistry as metrics
+
+_RESIDENT = metrics.gauge('api.cache_resident')
+
+
+class SpilledCapture:
+    """
+    Capture image stack held in an outbox payload file
+    """
+
+    __slots__ = ('path', 'dpc_exposure', 'gfp_capture')
+
+    def __init__(self, path: str, dpc_exposure: int, gfp_capture: bool) -> None:
+        self.path = path
+        self.dpc_exposure = dpc_exposure
+        self.gfp_capture = gfp_capture
+
+    def load(self) -> Capture:
+        """
+        Read the image stack back into memory
+
+        :raises OSError: if the payload file is missing or unreadable
+        :return: loaded capture
+        :rtype: Capture
+        """
+        try:
+            with np.load(self.path) as payload:
+                captures = [payload['arr_{}'.format(i)] for i in range(len(payload.files))]
+        except (ValueError, zipfile.BadZipFile) as exc:
+            raise OSError("Corrupt capture payload {}: {}".format(self.path, exc)) from exc
+        return Capture(captures, self.dpc_exposure, self.gfp_capture)
+
+    def __repr__(self) -> str:
+        return '<SpilledCapture {}>'.format(os.path.basename(self.path))
 
 
 class ProxyCache:
 
-    def __init__(self) -> None:
+    # outbox bounds
+    MAX_ENTRIES = int(os.environ.get('MONITOR_OUTBOX_ENTRIES', default=32))
+    MAX_BYTES = int(os.environ.get('MONITOR_OUTBOX_BYTES', default=512 * 1024 * 1024))
+    MAX_AGE = float(os.environ.get('MONITOR_OUTBOX_AGE', default=7 * 24 * 3600))
+    # bytes of capture frames kept in memory by cached requests
+    RAM_BUDGET = int(os.environ.get('MONITOR_OUTBOX_RAM', default=64 * 1024 * 1024))
+    MANIFEST = 'outbox.json'
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        :param path: outbox directory, defaults to MONITOR_CACHE/outbox
+        :type path: Optional[str], optional
+        """
         self._logger = logging.getLogger(__name__)
+        if path is None:
+            path = os.environ.get('MONITOR_CACHE', default='/etc/iris/cache') + '/outbox'
+        self.path = path
+        self._lock = RLock()
         self._proxy_buffer: Dict[int, partial] = OrderedDict()
+        # outbox records of the persisted requests keyed like the proxy buffer
+        self._records: Dict[int, Dict[str, Any]] = {}
+        # payload files of captures already written so a capture cached again is not rewritten
+        self._files: 'WeakKeyDictionary[Capture, str]' = WeakKeyDictionary()
         self._logger.info("%s instantiated", __name__)
 
     def cache(self, proxy_request: Callable[..., None], *args, **kwargs):
         """
         Saves failed api request as a FIFO queue. We want to save the order of the requests but want
         to replace args and kwargs of duplicate request types (api request functions) with the
-        recent changes.
+        recent changes. Requests made by a proxy method with serializable arguments are also written
+        to the outbox.
         """
-        # the request types are matched by the function names
-        self._proxy_buffer[proxy_request.__hash__()] = partial(proxy_request, *args, **kwargs)
+        key = proxy_request.__hash__()
+        try:
+            record = self._record(proxy_request, args, kwargs)
+        except (TypeError, ValueError, OSError) as exc:
+            self._logger.debug("Request %s is not persisted: %s", proxy_request, exc)
+            record = None
+        with self._lock:
+            # the request types are matched by the function names
+            self._proxy_buffer[key] = partial(proxy_request, *args, **kwargs)
+            previous = self._records.pop(key, None)
+            if record is not None:
+                self._records[key] = record
+            if previous is not None or record is not None:
+                self._bound(key)
+                self._save()
+            if previous is not None:
+                self._release(previous)
+            self._spill()
         self._logger.debug("Cached failed api request with args: %s kwargs: %s", args, kwargs)
 
+    def restore(self, owner: Any) -> int:
+        """
+        Load the outbox into the cache. Request names are resolved to the undecorated methods of the
+        owner; expired requests and requests which can no longer be resolved or whose payload files
+        are missing are discarded. Captures are restored spilled.
+
+        :param owner: proxy instance the outbox requests are bound to
+        :type owner: ApiProxy
+        :return: number of restored requests
+        :rtype: int
+        """
+        try:
+            with open(os.path.join(self.path, self.MANIFEST)) as fp:
+                records: List[Dict[str, Any]] = json.load(fp)
+        except FileNotFoundError:
+            records = []
+        except (OSError, ValueError) as exc:
+            self._logger.warning("Outbox manifest could not be read: %s", exc)
+            records = []
+        restored = 0
+        now = time.time()
+        with self._lock:
+            for record in records:
+                request = getattr(getattr(type(owner), record.get('request', ''), None), '__wrapped__', None)
+                if request is None or now - record.get('timestamp', 0) > self.MAX_AGE:
+                    self._logger.info("Discarding outbox request %s", record.get('request'))
+                    continue
+                try:
+                    args = [self._decode(value, owner) for value in record['args']]
+                    kwargs = {key: self._decode(value, owner) for key, value in record['kwargs'].items()}
+                except (KeyError, OSError) as exc:
+                    self._logger.warning("Discarding outbox request %s: %s", record.get('request'), exc)
+                    continue
+                key = request.__hash__()
+                self._proxy_buffer[key] = partial(request, *args, **kwargs)
+                self._records[key] = record
+                restored += 1
+            if records: self._save()
+        self._prune()
+        self._logger.info("Restored %s requests from the outbox", restored)
+        return restored
+
     def execute(self) -> None:
         """
         Executes all cached api requests in FIFO ordering.
         """
-        # the api_requests may change dynamically during the loop if a request fails
-        # so we create a deepcopy of the buffer data struct and iterate over that
+        # the api_requests may change dynamically during the loop if a request fails so we iterate
+        # over a snapshot of the buffer. The cached partials hold a reference to the proxy (and this
+        # cache) which cannot be deep copied.
         self._logger.debug("Starting cache execution.")
-        buf = copy.deepcopy(self._proxy_buffer)
-        for hash, request in buf.items():
+        with self._lock:
+            buf = list(self._proxy_buffer.items())
+        for hash, request in buf:
             # execute the request wrapper plus any subsequent function redirects
             try:
-                request()
+                # spilled captures are only held in memory while their request runs
+                loaded = self._load(request)
+            except OSError as exc:
+                self._logger.warning("Discarding cached request with a missing payload: %s", exc)
+                self._discard(hash, request)
+                continue
+            try:
+                loaded()
             except (ConnectionError, ReferenceError, TimeoutError, KeyError) as exc:
                 # log failure and keep the request in the cache for next retry
                 self._logger.info("Exception occured during cached request execution:\n%s", exc)
             else:
-                # remove successful requests from the master buffer
-                self._proxy_buffer.pop(hash)
+                # remove successful requests from the master buffer unless they were replaced
+                # by a newer failure of the same request type during execution
+                self._discard(hash, request)
         self._logger.debug("Completed cache execution")
+
+    def _discard(self, key: int, request: partial) -> None:
+        """
+        Remove a request from the cache and the outbox
+
+        :param key: request key
+        :type key: int
+        :param request: cached request, it is kept if it has since been replaced
+        :type request: partial
+        """
+        with self._lock:
+            if self._proxy_buffer.get(key) is not request: return
+            self._proxy_buffer.pop(key)
+            record = self._records.pop(key, None)
+            if record is not None:
+                self._save()
+                self._release(record)
+            self._spill()
+
+    def _bound(self, key: int) -> None:
+        """
+        Evict the oldest persisted requests (other than key) until the outbox is within its entry
+        count and payload size limits. Must be called while holding the lock.
+
+        :param key: request key which is never evicted
+        :type key: int
+        """
+        while self._records:
+            size = sum(record['bytes'] for record in self._records.values())
+            if len(self._records) <= self.MAX_ENTRIES and size <= self.MAX_BYTES: break
+            oldest = next((other for other in self._proxy_buffer if other != key and other in self._records), None)
+            if oldest is None: break
+            record = self._records.pop(oldest)
+            self._proxy_buffer.pop(oldest, None)
+            self._logger.warning("Outbox full, evicted request %s", record['request'])
+            self._release(record)
+
+    def _spill(self) -> None:
+        """
+        Spill the captures of the oldest persisted requests until the captures held in memory are
+        within the RAM budget. Must be called while holding the lock.
+        """
+        resident = {key: self._resident(request) for key, request in self._proxy_buffer.items()}
+        total = sum(resident.values())
+        for key, request in list(self._proxy_buffer.items()):
+            if total <= self.RAM_BUDGET: break
+            record = self._records.get(key)
+            # requests which are not persisted have no payload files and stay in memory
+            if not resident[key] or record is None: continue
+            try:
+                args = [self._decode(value, request.args[0]) for value in record['args']]
+                kwargs = {name: self._decode(value, request.args[0]) for name, value in record['kwargs'].items()}
+            except OSError as exc:
+                self._logger.warning("Could not spill request %s: %s", record['request'], exc)
+                continue
+            self._proxy_buffer[key] = partial(request.func, *args, **kwargs)
+            total -= resident[key]
+            self._logger.info("Spilled %s MB of request %s", round(resident[key] / 1e6, 2), record['request'])
+        _RESIDENT.set(total)
+
+    def _resident(self, request: partial) -> int:
+        """
+        Get the bytes of capture frames held in memory by a cached request
+        """
+        return sum(
+            sum(frame.nbytes for frame in value.captures)
+            for value in (*request.args, *request.keywords.values()) if isinstance(value, Capture)
+        )
+
+    def _load(self, request: partial) -> partial:
+        """
+        Get a cached request with its spilled captures loaded
+
+        :raises OSError: if a payload file is missing
+        """
+        if not any(isinstance(value, SpilledCapture) for value in (*request.args, *request.keywords.values())):
+            return request
+        def load(value: Any) -> Any:
+            if not isinstance(value, SpilledCapture): return value
+            capture = value.load()
+            # the payload file is reused if the request fails again
+            self._files[capture] = os.path.basename(value.path)
+            return capture
+        return partial(
+            request.func, *[load(value) for value in request.args],
+            **{name: load(value) for name, value in request.keywords.items()}
+        )
+
+    def _record(self, proxy_request: Callable[..., None], args: tuple,
+                kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Serialize a request into an outbox record. Only requests made by a proxy method can be
+        resolved after a reboot so other requests are kept in memory only.
+
+        :raises TypeError: if an argument cannot be serialized
+        :return: outbox record or None if the request is not made by a proxy method
+        :rtype: Optional[Dict[str, Any]]
+        """
+        name = getattr(proxy_request, '__name__', None)
+        if not args or getattr(getattr(type(args[0]), str(name), None), '__wrapped__', None) is not proxy_request:
+            return None
+        record: Dict[str, Any] = {'request': name, 'timestamp': time.time(), 'files': [], 'bytes': 0}
+        try:
+            record['args'] = [{'__owner__': True}] + [self._encode(value, record) for value in args[1:]]
+            record['kwargs'] = {key: self._encode(value, record) for key, value in kwargs.items()}
+        except BaseException:
+            self._release(record)
+            raise
+        return record
+
+    def _encode(self, value: Any, record: Dict[str, Any]) -> Any:
+        """
+        Encode an argument as json. Capture image stacks are written to a compressed payload file
+        unless they were already written by a previous failure.
+
+        :raises TypeError: if the argument cannot be serialized
+        """
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, (list, tuple)):
+            return [self._encode(item, record) for item in value]
+        if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+            return {key: self._encode(item, record) for key, item in value.items()}
+        if isinstance(value, Capture):
+            filename = self._files.get(value)
+            if filename is None or not os.path.exists(os.path.join(self.path, filename)):
+                filename = '{}.npz'.format(uuid.uuid4().hex)
+                path = os.path.join(self.path, filename)
+                os.makedirs(self.path, exist_ok=True)
+                with open(path + '.tmp', 'wb') as fp:
+                    np.savez_compressed(fp, *value.captures)
+                os.replace(path + '.tmp', path)
+                self._files[value] = filename
+            path = os.path.join(self.path, filename)
+            record['files'].append(filename)
+            record['bytes'] += os.path.getsize(path)
+            return {'__capture__': filename, 'dpc_exposure': value.dpc_exposure, 'gfp_capture': value.gfp_capture}
+        raise TypeError("{} is not serializable".format(type(value).__name__))
+
+    def _decode(self, value: Any, owner: Any) -> Any:
+        """
+        Decode an outbox argument. Captures are decoded as spilled captures.
+
+        :raises OSError: if a payload file is missing
+        """
+        if isinstance(value, list):
+            return [self._decode(item, owner) for item in value]
+        if isinstance(value, dict):
+            if value.get('__owner__'):
+                return owner
+            if '__capture__' in value:
+                path = os.path.join(self.path, value['__capture__'])
+                if not os.path.exists(path): raise FileNotFoundError(path)
+                return SpilledCapture(path, value['dpc_exposure'], value['gfp_capture'])
+            return {key: self._decode(item, owner) for key, item in value.items()}
+        return value
+
+    def _save(self) -> None:
+        """
+        Atomically replace the outbox manifest. Must be called while holding the lock.
+        """
+        records = [self._records[key] for key in self._proxy_buffer if key in self._records]
+        path = os.path.join(self.path, self.MANIFEST)
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(path + '.tmp', 'w') as fp:
+                json.dump(records, fp)
+            os.replace(path + '.tmp', path)
+        except OSError as exc:
+            self._logger.error("Outbox manifest could not be written: %s", exc)
+
+    def _prune(self) -> None:
+        """
+        Remove payload files which are not referenced by the outbox (left behind by a power loss
+        between a payload write and the manifest update)
+        """
+        with self._lock:
+            referenced = {filename for record in self._records.values() for filename in record['files']}
+        try:
+            filenames = os.listdir(self.path)
+        except FileNotFoundError:
+            return
+        for filename in filenames:
+            if filename != self.MANIFEST and filename not in referenced:
+                self._release({'files': [filename]})
+
+    def _release(self, record: Dict[str, Any]) -> None:
+        """
+        Remove the payload files of a record which are not referenced by a cached request
+        """
+        with self._lock:
+            referenced = {filename for other in self._records.values() for filename in other['files']}
+        for filename in set(record['files']) - referenced:
+            try:
+                os.remove(os.path.join(self.path, filename))
+            except FileNotFoundError:
+                pass
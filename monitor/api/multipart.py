@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Multipart Stream
+================
+Modified: 2026-10
+
+multipart/form-data request body which is streamed instead of assembled. The form field headers
+are the only bytes created; file payloads (encoded images) are referenced through memoryviews and
+read out in chunks by the http client so an upload never holds more than the one encoded image
+it was handed. The body is laid out like the body requests builds for `files=` so the api sees the
+same request.
+
+Dependencies:
+-------------
+```
+import os
+import uuid
+from typing import Dict, List, Optional, Union
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import os
+import uuid
+from typing import Dict, List, Optional, Union
+
+Part = Union[bytes, memoryview]
+
+
+class MultipartStream:
+
+    def __init__(self, fields: Dict[str, str], files: Dict[str, Union[bytes, bytearray, memoryview]],
+                 boundary: Optional[str] = None) -> None:
+        """
+        :param fields: form fields
+        :type fields: Dict[str, str]
+        :param files: file payloads keyed by form field name (also used as the filename)
+        :type files: Dict[str, Union[bytes, bytearray, memoryview]]
+        :param boundary: part boundary, defaults to a random boundary
+        :type boundary: Optional[str], optional
+        """
+        self.boundary = boundary or uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary={}'.format(self.boundary)
+        self.parts: List[Part] = []
+        for name, value in fields.items():
+            self.parts.append('--{}\r\nContent-Disposition: form-data; name="{}"\r\n\r\n{}\r\n'.format(
+                self.boundary, name, value).encode())
+        for name, payload in files.items():
+            self.parts.append('--{0}\r\nContent-Disposition: form-data; name="{1}"; filename="{1}"\r\n\r\n'.format(
+                self.boundary, name).encode())
+            self.parts.append(memoryview(payload).cast('B'))
+            self.parts.append(b'\r\n')
+        self.parts.append('--{}--\r\n'.format(self.boundary).encode())
+        self.len = sum(len(part) for part in self.parts)
+        self._position = 0
+        self._part = 0
+        self._offset = 0
+
+    def __len__(self) -> int:
+        return self.len
+
+    def read(self, size: int = -1) -> Part:
+        """
+        Read the next chunk of the body. A chunk never spans two parts so file payload chunks are
+        views into the payload rather than copies.
+
+        :param size: maximum chunk size, defaults to -1 (the rest of the current part)
+        :type size: int, optional
+        :return: chunk or an empty bytes object at the end of the body
+        :rtype: Union[bytes, memoryview]
+        """
+        while self._part < len(self.parts):
+            part = self.parts[self._part]
+            if self._offset < len(part):
+                end = len(part) if size is None or size < 0 else min(len(part), self._offset + size)
+                chunk = part[self._offset:end]
+                self._position += end - self._offset
+                self._offset = end
+                return chunk
+            self._part += 1
+            self._offset = 0
+        return b''
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """
+        Move the read position (requests rewinds the body on redirects)
+        """
+        if whence == os.SEEK_CUR: offset += self._position
+        elif whence == os.SEEK_END: offset += self.len
+        self._position = position = max(0, min(offset, self.len))
+        self._part = 0
+        while self._part < len(self.parts) and position >= len(self.parts[self._part]):
+            position -= len(self.parts[self._part])
+            self._part += 1
+        self._offset = position
+        return self._position
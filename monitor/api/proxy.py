@@ -2,50 +2,76 @@
 """
 API Proxy
 =========
-Modified: 2021-06
+Modified: 2026-10
 
 Dependencies:
 -------------
 ```
+import os
+import time
 import logging
+from typing import List, Optional
+from threading import BoundedSemaphore
+from concurrent.futures import ThreadPoolExecutor
 from monitor.sys import decorators
 from monitor.imaging.capture import Capture
 from monitor.cloud.api_handler import ApiHandler
 from monitor.models.experiment import Experiment
 from monitor.events.event_handler import EventHandler
+from monitor.metrics.registry import MetricsRegistry as metrics
 ```
 Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
 from datetime import datetime
+import os
+import time
 import logging
+from typing import List, Optional
+from threading import BoundedSemaphore
+from concurrent.futures import ThreadPoolExecutor
 
 from monitor.sys.decorators import cache
 from monitor.api.cache import ProxyCache
 from monitor.imaging.capture import Capture
 from monitor.api.api_handler import ApiHandler
 from monitor.environment.state_manager import StateManager
+from monitor.events.event import Event
 from monitor.events.registry import Registry as events
+from monitor.ui.static.settings import UISettings as uis
+from monitor.metrics.registry import MetricsRegistry as metrics
+
+_UPLOAD_SET = metrics.histogram('api.upload_set', bounds=(1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0))
 
 
 class ApiProxy:
 
+    # images of a capture set uploaded in parallel
+    UPLOAD_WORKERS = int(os.environ.get('MONITOR_API_UPLOADS', default=4))
+
     def __init__(self, base_url: str, base_path: str):
         # register logger with module name
         self._logger = logging.getLogger(__name__)
         self._api_handler = ApiHandler(base_url, base_path)
         self.cache = ProxyCache()
+        self._uploads = ThreadPoolExecutor(max_workers=max(1, self.UPLOAD_WORKERS), thread_name_prefix='upload')
+        # encoded images waiting for or being posted; an image is only encoded once a post can take it
+        self._in_flight = BoundedSemaphore(max(1, self.UPLOAD_WORKERS))
         # stage pipeline execution sequences
         events.preview_pipeline.stage(self.upload_preview, 1)
         events.thumbnail_pipeline.stage(self.get_thumbnail, 0)
         events.registration_pipeline.stage(self.get_device_registration_key, 1)
         # event registration
         events.capture_pipeline.stage(self.upload_images, 2)
-        events.new_protocol.register(self.get_protocol)
-        events.new_device.register(self.get_device_info_and_avatar)
-        events.new_experiment.register(self.get_experiment)
-        events.renew_jwt.register(self.request_jwt)
+        # api refreshes run in trigger order on one worker so each request runs after the jwt
+        # request and cache replay triggered ahead of it
+        events.new_protocol.register(self.get_protocol, mode=Event.SERIAL)
+        events.new_device.register(self.get_device_info_and_avatar, mode=Event.SERIAL)
+        events.new_experiment.register(self.get_experiment, mode=Event.SERIAL)
+        events.renew_jwt.register(self.request_jwt, mode=Event.SERIAL)
+        # reload requests which failed before the last shutdown; they are replayed on the next jwt
+        self.cache.restore(self)
         self._logger.info("Instantiation successful.")
 
     def request_jwt(self) -> None:
@@ -101,7 +127,7 @@ class ApiProxy:
         else:
             events.avatar_pipeline.begin(response)
         with StateManager() as state:
-            device = state.device
+            device = state.device.edit()
             device.setattrs(**device_payload)
             state.commit(device)
 
@@ -114,7 +140,7 @@ class ApiProxy:
         """
         protocol_payload = self._api_handler.get_protocol(protocol_id)
         with StateManager() as state:
-            protocol = state.protocol
+            protocol = state.protocol.edit()
             protocol.setattrs(**protocol_payload)
             state.commit(protocol)
 
@@ -136,7 +162,7 @@ class ApiProxy:
             # commit the experiment state first so setpoint scheduler can reference experiment start time
             # and validate experiment and protocol id match
             with StateManager() as state:
-                experiment = state.experiment
+                experiment = state.experiment.edit()
                 experiment.setattrs(**experiment_payload)
                 state.commit(experiment)
             # protocol resolution
@@ -148,7 +174,7 @@ class ApiProxy:
         else:
             # if the payload is None then we manually set the stop_at to the current time and update the system
             with StateManager() as state:
-                experiment = state.experiment
+                experiment = state.experiment.edit()
                 # set the stop_at to now
                 experiment.stop_at = datetime.utcnow()
                 state.commit(experiment)
@@ -169,28 +195,90 @@ class ApiProxy:
         # trigger external events
         self._logger.debug("Fetched imaging profile payload: %s", imaging_profile_payload)
         with StateManager() as state:
-            imaging_profile = state.imaging_profile
+            imaging_profile = state.imaging_profile.edit()
             imaging_profile.setattrs(**imaging_profile_payload)
             result = state.commit(imaging_profile)
             if not result: self._logger.error("Inbound imaging profile failed ISV checks")
             else: self._logger.info("Inbound imaging profile successfully commited to the system")
 
     @cache
-    def upload_images(self, capture: Capture, image_id: int = None, index: int = 0) -> None:
+    def upload_images(self, capture: Capture, image_id: int = None, index: int = 0,
+                      pending: Optional[List[int]] = None) -> None:
         """
         Post captures to AWS lambda for post-processing. The first image post is using image
         number 0 with the image payload. This creates a dpc image row in our table. This in turn
-        returns an image ID for that image pack. Subsequent images (1,2,3) will be posted with the
-        image pack ID field specified. The capture object may include an optional 5th GFP capture.
+        returns an image ID for that image pack. Subsequent images (1,2,3) are then encoded one at a
+        time on this thread and posted in parallel with the image pack ID field specified. At most
+        UPLOAD_WORKERS encoded images are held at once. The capture object may include an optional 5th
+        GFP capture. If any of the subsequent posts fail only those images are cached for a retry.
 
+        :param capture: capture set
+        :type capture: Capture
+        :param image_id: image pack id, defaults to None (DPC_0 has not been posted)
+        :type image_id: int, optional
+        :param index: first image to post when pending is not specified, defaults to 0
+        :type index: int, optional
+        :param pending: indices of the images to post, defaults to every image from index
+        :type pending: Optional[List[int]], optional
         :raises ConnectionError: if the response is not fetched due to a connection error or timeout
         :raises ReferenceError: the jwt was requested on a 401 not be updated locally in time for
         the request to be completed
         """
+        start = time.perf_counter()
         with StateManager() as state:
             exp_id = state.experiment.id
-        file_payload = capture.get_processed(index=index)
-        # json cannot be serialized with raw bytes so we decode it to a utf-8 string
+        if image_id is None:
+            # DPC_0 creates the image pack which every other image is posted to
+            image_id = self._post_image(exp_id, None, 0, capture.get_processed(index=0))
+            index = 1
+        if pending is None:
+            pending = list(range(index, len(capture.captures)))
+        uploads = []
+        for i in pending:
+            # encoding is sequential and waits for a free upload worker so queued posts never hold
+            # more than one encoded image per worker
+            self._in_flight.acquire()
+            try:
+                file_payload = capture.get_processed(index=i)
+                upload = self._uploads.submit(self._post_image, exp_id, image_id, i, file_payload)
+            except BaseException:
+                self._in_flight.release()
+                raise
+            del file_payload
+            upload.add_done_callback(lambda _: self._in_flight.release())
+            uploads.append((i, upload))
+        failed = []
+        for i, upload in uploads:
+            try:
+                upload.result()
+            except (ConnectionError, ReferenceError, TimeoutError, KeyError) as exc:
+                self._logger.warning("Failed posting image %s of image pack %s: %s", i, image_id, exc)
+                failed.append(i)
+        if failed:
+            # cache only the failed images of the set (the decorator would cache the whole set)
+            self.cache.cache(ApiProxy.upload_images.__wrapped__, self, capture, image_id=image_id, pending=failed)
+            self._logger.info("Cached failed proxy request")
+            events.system_status.trigger(status=uis.STATUS_OK)
+            return
+        elapsed = time.perf_counter() - start
+        _UPLOAD_SET.observe(elapsed)
+        self._logger.info("Uploaded image pack %s in %.2f s", image_id, elapsed)
+
+    def _post_image(self, exp_id: int, image_id: Optional[int], index: int, file_payload: bytes) -> int:
+        """
+        Post one encoded image of a capture set
+
+        :param exp_id: experiment id
+        :type exp_id: int
+        :param image_id: image pack id or None for the first image
+        :type image_id: Optional[int]
+        :param index: image index
+        :type index: int
+        :param file_payload: encoded image
+        :type file_payload: bytes
+        :return: image pack id
+        :rtype: int
+        """
         # build payload using current index as a key generator
         payload = {
             'type': 'DPC_{}'.format(index) if index != 4 else 'GFP',
@@ -198,10 +286,7 @@ class ApiProxy:
         }
         self._logger.debug("Generated payload %s", payload)
         # api request
-        image_id = self._api_handler.post_img(payload, exp_id, file_payload)
-        # recurse until all images are uploaded
-        if (index < len(capture.captures) - 1):
-            self.upload_images(capture, image_id=image_id, index=index + 1)
+        return self._api_handler.post_img(payload, exp_id, file_payload)
 
     @cache
     def upload_preview(self, capture: Capture, index: int = 0) -> None:
@@ -19,11 +19,13 @@ from AWSIoTPythonSDK.MQTTLib import AWSIoTMQTTShadowClient
 from monitor.models.icb import ICB
 from monitor.exceptions.mqtt import ImageTopicError
 from monitor.environment.state_manager import StateManager
+from monitor.environment.archive import TelemetryArchive
 from monitor.cloud.config import MQTTConfig as conf
 from monitor.events.registry import Registry as events
 from monitor.models.imaging_profile import ImagingProfile
 from monitor.ui.static.settings import UISettings as uis
 from monitor.environment.thread_manager import ThreadManager as tm
+from monitor.metrics.registry import MetricsRegistry as metrics
 ```
 Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
@@ -41,10 +43,17 @@ from json.decoder import JSONDecodeError
 # from monitor.models.icb import ICB
 from monitor.exceptions.mqtt import ImageTopicError
 from monitor.environment.state_manager import StateManager
+from monitor.environment.archive import TelemetryArchive
 from monitor.cloud.config import MQTTConfig as conf
 from monitor.events.registry import Registry as events
 from monitor.ui.static.settings import UISettings as uis
 from monitor.environment.thread_manager import ThreadManager as tm
+from monitor.metrics.registry import MetricsRegistry as metrics
+
+_PUBLISHED = metrics.counter('mqtt.published')
+_PUBLISH_FAILURES = metrics.counter('mqtt.publish_failures')
+_RECEIVED = metrics.counter('mqtt.received')
+_CONNECTED = metrics.gauge('mqtt.connected')
 
 
 class MQTT():
@@ -111,7 +120,7 @@ class MQTT():
 
             except ConnectionError:
                 with StateManager() as state:
-                    device = state.device
+                    device = state.device.edit()
                     device.mqtt_status = False
                     state.commit(device)
                 self._logger.warning("Connection to mqtt failed. Entering reconnection phase...")
@@ -126,6 +135,7 @@ class MQTT():
         MQTT connect on callback
         """
         self._logger.info("Connected to MQTT broker")
+        _CONNECTED.set(1)
 
         # subscribe to mulitple topics
         res = self.client.subscribe(self.topic_desired, 0)
@@ -143,7 +153,7 @@ class MQTT():
         events.renew_jwt.trigger()
         events.new_device.trigger()
         with StateManager() as state:
-            device = state.device
+            device = state.device.edit()
             device.mqtt_status = True
             state.commit(device)
 
@@ -153,9 +163,10 @@ class MQTT():
         MQTT disconnect callback
         """
         self._logger.info("Disconnected from MQTT broker")
+        _CONNECTED.set(0)
         events.system_status.trigger(status=uis.STATUS_OK)
         with StateManager() as state:
-            device = state.device
+            device = state.device.edit()
             device.mqtt_status = False
             state.commit(device)
 
@@ -222,6 +233,7 @@ class MQTT():
         except (JSONDecodeError, TypeError) as exc:
             raise ImageTopicError from exc
         self._logger.info("Received payload: %s from subscriber topic: %s", payload, message.topic)
+        _RECEIVED.inc()
         if payload.get('type') == "experiment":
             events.thumbnail_pipeline.begin()
         elif payload.get('type') == "dpc-capture":
@@ -241,6 +253,7 @@ class MQTT():
         except (JSONDecodeError, TypeError) as exc:
             raise ImageTopicError from exc
         self._logger.info("Received payload: %s from subscriber topic: %s", payload, message.topic)
+        _RECEIVED.inc()
         req_id = payload.get('req_id')
         if req_id is None:
             self._logger.info("Missing req_id, ignoring.")
@@ -260,7 +273,7 @@ class MQTT():
             self._logger.info("got JWT request!")
 
             with StateManager() as state:
-                device = state.device
+                device = state.device.edit()
                 device.jwt = requests["jwt"]
                 result = state.commit(device)
                 # if commit fails do not report success
@@ -268,38 +281,21 @@ class MQTT():
                     err_status = "Failed to resolve JWT\n"
                     self._logger.warning(err_status)
                     self._error_msg += err_status
-        # resolve setpoints
-        if "TP" in requests:
-            tp = float(requests['TP'])
-            with StateManager() as state:
-                icb = state.icb
-                icb.tp = tp
-                result = state.commit(icb)
-                # if commit fails do not report success
-                if not result:
-                    err_status = f"REQ:{req_id}: Failed to resolve TP\n"
-                    self._logger.warning(err_status)
-                    self._error_msg += err_status
-        if "OP" in requests:
-            op = float(requests['OP'])
+        # resolve setpoints as a single commit
+        setpoints = [key for key in ("TP", "OP", "CP") if key in requests]
+        if setpoints:
             with StateManager() as state:
-                icb = state.icb
-                icb.op = op
-                result = state.commit(icb)
+                # restaged if a sensor frame is committed meanwhile
+                for _ in range(state.TRANSACTION_ATTEMPTS):
+                    with state.transaction() as txn:
+                        icb = txn.icb
+                        if "TP" in requests: icb.tp = float(requests['TP'])
+                        if "OP" in requests: icb.op = float(requests['OP'])
+                        if "CP" in requests: icb.cp = float(requests['CP'])
+                    if not txn.stale: break
                 # if commit fails do not report success
-                if not result:
-                    err_status = f"REQ:{req_id}: Failed to resolve OP\n"
-                    self._logger.warning(err_status)
-                    self._error_msg += err_status
-        if "CP" in requests:
-            cp = float(requests['CP'])
-            with StateManager() as state:
-                icb = state.icb
-                icb.cp = cp
-                result = state.commit(icb)
-                # if commit fails do not report success
-                if not result:
-                    err_status = f"REQ:{req_id}: Failed to resolve CP\n"
+                if not txn.committed:
+                    err_status = f"REQ:{req_id}: Failed to resolve {', '.join(setpoints)}\n"
                     self._logger.warning(err_status)
                     self._error_msg += err_status
 
@@ -316,7 +312,7 @@ class MQTT():
         if "imaging_settings" in requests:
             imaging_settings = requests["imaging_settings"]
             with StateManager() as state:
-                imaging_profile = state.imaging_profile
+                imaging_profile = state.imaging_profile.edit()
                 imaging_profile.deserialize(**imaging_settings)
                 result = state.commit(imaging_profile)
                 # if commit fails do not report success
@@ -357,9 +353,10 @@ class MQTT():
                 epoch = round(datetime.now(timezone.utc).timestamp())
                 self._logger.info("reporting telemetry results: %s", epoch)
                 self.client.publish(self.aws_tt, json.dumps({"tele_test": epoch}), qos=0)
+                _PUBLISHED.inc()
 
-                # publish long point once every 15 minutes
-                if epoch >= self.last_lpt_publish + (15 * 60):
+                # publish long point once every 15 minutes aligned with the telemetry archive long tier
+                if epoch // TelemetryArchive.LONG_INTERVAL > self.last_lpt_publish // TelemetryArchive.LONG_INTERVAL:
                     save_point = True
                     self.last_lpt_publish = epoch
                 else:
@@ -385,6 +382,7 @@ class MQTT():
                     payload['errors'] = self._error_msg
 
                     self.client.publish(self.aws_tt, json.dumps(payload), qos=0)
+                    _PUBLISHED.inc()
                     self._logger.debug("Published telemetry document %s", payload)
                     with StateManager() as state:
                         experiment = state.experiment
@@ -392,9 +390,11 @@ class MQTT():
                         # republish old telemetry, but with exp_id
                         payload['exp_id'] = experiment.id
                         self.client.publish(self.aws_tt, json.dumps(payload), qos=0)
+                        _PUBLISHED.inc()
                         self._logger.debug("Published experiment telemetry document %s", payload)
                     # reset the error_msgs
                     self._error_msg = ""
             except (ValueError, TypeError) as exc:
+                _PUBLISH_FAILURES.inc()
                 self._logger.exception("Telemetry document publish failed: %s", exc)
             time.sleep(5)
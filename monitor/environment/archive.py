@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+Telemetry Archive
+=================
+Modified: 2026-10
+
+On-device multi-resolution archive of ICB telemetry. Frames are downsampled into three tiers:
+
+- raw: 5 second samples retained for 24 hours
+- minute: 1 minute aggregates retained for 30 days
+- long: 15 minute aggregates retained per experiment until LONG_RETENTION after its last record
+
+Each tier is a directory of append-only segment files of fixed size numpy records under
+`MONITOR_CACHE/telemetry` which can be memory mapped for plotting and cloud backfill without loading
+the full history. A partially written trailing record (power loss) is ignored on read and truncated
+before the next append. The open minute and long aggregates are flushed on shutdown and reboot.
+
+Dependancies
+------------
+```
+import os
+import time
+import asyncio
+import logging
+import numpy as np
+from threading import Lock
+from datetime import datetime
+from typing import List, Optional
+from monitor.models.icb import ICB
+from monitor.environment.telemetry import TelemetryBuffer
+from monitor.environment.state_manager import StateManager
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import os
+import time
+import asyncio
+import logging
+import numpy as np
+from threading import Lock
+from datetime import datetime
+from typing import List, Optional
+from monitor.models.icb import ICB
+from monitor.environment.telemetry import TelemetryBuffer
+from monitor.environment.state_manager import StateManager
+
+_FIELDS = len(TelemetryBuffer.FIELDS)
+# experiment id used for telemetry recorded outside of an active experiment (matches mqtt exp_id)
+NO_EXPERIMENT = '-1'
+
+
+class _Aggregate:
+    """
+    Running min, max and mean of the frames in one aggregation bucket. Uninitialized readings (NaN)
+    are excluded per reading.
+    """
+    __slots__ = ('start', 'count', 'total', 'samples', 'low', 'high')
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.count = 0
+        self.total = np.zeros(_FIELDS, dtype=np.float64)
+        self.samples = np.zeros(_FIELDS, dtype=np.uint32)
+        self.low = np.full(_FIELDS, np.nan, dtype=np.float32)
+        self.high = np.full(_FIELDS, np.nan, dtype=np.float32)
+
+    def add(self, row: np.ndarray) -> None:
+        valid = ~np.isnan(row)
+        self.count += 1
+        self.total[valid] += row[valid]
+        self.samples += valid
+        np.fmin(self.low, row, out=self.low)
+        np.fmax(self.high, row, out=self.high)
+
+    def record(self) -> np.ndarray:
+        record = np.zeros(1, dtype=TelemetryArchive.AGGREGATE_DTYPE)
+        record['time'] = self.start
+        record['count'] = self.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            record['mean'] = np.where(self.samples > 0, self.total / np.maximum(self.samples, 1), np.nan)
+        record['min'] = self.low
+        record['max'] = self.high
+        return record
+
+
+class TelemetryArchive:
+
+    RAW = 'raw'
+    MINUTE = 'minute'
+    LONG = 'long'
+    # sampling and aggregation intervals in seconds
+    RAW_INTERVAL = 5
+    MINUTE_INTERVAL = 60
+    LONG_INTERVAL = 15 * 60         # aligned with the mqtt long point telemetry publish
+    # retention in seconds (long segments are kept while their experiment is active and for
+    # LONG_RETENTION after their last record once it is not)
+    RAW_RETENTION = 24 * 60 * 60
+    MINUTE_RETENTION = 30 * 24 * 60 * 60
+    LONG_RETENTION = int(os.environ.get('MONITOR_TELEMETRY_LONG_RETENTION', default=90 * 24 * 60 * 60))
+    # segment file spans in seconds
+    RAW_SEGMENT = 60 * 60
+    MINUTE_SEGMENT = 24 * 60 * 60
+    # on-disk record formats (little endian, fixed size)
+    RAW_DTYPE = np.dtype([('time', '<f8'), ('values', '<f4', (_FIELDS,))])
+    AGGREGATE_DTYPE = np.dtype([
+        ('time', '<f8'), ('count', '<u4'),
+        ('mean', '<f4', (_FIELDS,)), ('min', '<f4', (_FIELDS,)), ('max', '<f4', (_FIELDS,))
+    ])
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self._logger = logging.getLogger(__name__)
+        if path is None:
+            path = os.environ.get('MONITOR_CACHE', default='/etc/iris/cache') + '/telemetry'
+        self.path = path
+        self._lock = Lock()
+        self._last_raw = -1.0
+        self._minute: Optional[_Aggregate] = None
+        self._long: Optional[_Aggregate] = None
+        self._experiment = NO_EXPERIMENT
+
+    def start(self) -> None:
+        """
+        Begin archiving committed icb frames
+        """
+        with StateManager() as state:
+            state.subscribe(ICB, self._archive)
+        self._logger.info("Telemetry archive active: %s", self.path)
+
+    async def _archive(self, icb: ICB) -> None:
+        """
+        ICB subscriber. Disk writes are moved off the subscriber loop.
+
+        :param icb: committed icb snapshot
+        :type icb: ICB
+        """
+        with StateManager() as state:
+            experiment = state.experiment
+        experiment_id = str(experiment.id) if experiment.active else NO_EXPERIMENT
+        await asyncio.get_running_loop().run_in_executor(None, self.record, icb, experiment_id)
+
+    def record(self, icb: ICB, experiment_id: str = NO_EXPERIMENT, timestamp: Optional[float] = None) -> None:
+        """
+        Archive an icb frame into every tier
+
+        :param icb: icb frame
+        :type icb: ICB
+        :param experiment_id: active experiment id, defaults to NO_EXPERIMENT
+        :type experiment_id: str, optional
+        :param timestamp: frame time in epoch seconds, defaults to the frame timestamp
+        :type timestamp: Optional[float], optional
+        """
+        if timestamp is None:
+            try:
+                timestamp = datetime.fromisoformat(icb.timestamp).timestamp()
+            except (AttributeError, ValueError):
+                timestamp = time.time()
+        row = np.array([getattr(icb, field, np.nan) for field in TelemetryBuffer.FIELDS], dtype=np.float32)
+        with self._lock:
+            try:
+                self._record(row, experiment_id, timestamp)
+            except OSError as exc:
+                self._logger.error("Failed to archive telemetry: %s", exc)
+
+    def _record(self, row: np.ndarray, experiment_id: str, timestamp: float) -> None:
+        # raw tier: first frame of each sampling interval
+        if timestamp // self.RAW_INTERVAL > self._last_raw // self.RAW_INTERVAL:
+            self._last_raw = timestamp
+            raw = np.zeros(1, dtype=self.RAW_DTYPE)
+            raw['time'] = timestamp
+            raw['values'] = row
+            self._append(self.RAW, self._segment(timestamp, self.RAW_SEGMENT), raw)
+        # aggregate tiers: flush the previous bucket when a frame lands in a new one
+        start = timestamp - timestamp % self.MINUTE_INTERVAL
+        if self._minute is not None and self._minute.start != start:
+            self._append(self.MINUTE, self._segment(self._minute.start, self.MINUTE_SEGMENT), self._minute.record())
+            self._minute = None
+        if self._minute is None: self._minute = _Aggregate(start)
+        self._minute.add(row)
+        start = timestamp - timestamp % self.LONG_INTERVAL
+        if self._long is not None and (self._long.start != start or self._experiment != experiment_id):
+            self._append(self.LONG, self._experiment, self._long.record())
+            self._long = None
+        if self._long is None: self._long = _Aggregate(start)
+        self._experiment = experiment_id
+        self._long.add(row)
+
+    def flush(self) -> None:
+        """
+        Append the open minute and long aggregates. Frames recorded after a flush start new aggregates
+        of the same buckets.
+        """
+        with self._lock:
+            try:
+                if self._minute is not None:
+                    self._append(self.MINUTE, self._segment(self._minute.start, self.MINUTE_SEGMENT),
+                                 self._minute.record())
+                if self._long is not None:
+                    self._append(self.LONG, self._experiment, self._long.record())
+            except OSError as exc:
+                self._logger.error("Failed to flush telemetry aggregates: %s", exc)
+            self._minute = None
+            self._long = None
+
+    @staticmethod
+    def _segment(timestamp: float, span: int) -> str:
+        return str(int(timestamp - timestamp % span))
+
+    def _append(self, tier: str, segment: str, record: np.ndarray) -> None:
+        """
+        Append a record to a tier segment, pruning expired segments when a new segment is opened. The
+        long tier is also pruned once a day when a new minute segment is opened.
+        """
+        directory = f'{self.path}/{tier}'
+        filename = f'{directory}/{segment}.bin'
+        if not os.path.isfile(filename):
+            os.makedirs(directory, exist_ok=True)
+            if tier == self.RAW: self._prune(tier, float(segment) - self.RAW_RETENTION)
+            elif tier == self.MINUTE: self._prune(tier, float(segment) - self.MINUTE_RETENTION)
+            if tier != self.RAW: self._prune_long(segment, float(record['time'][0]) - self.LONG_RETENTION)
+        with open(filename, 'ab') as fp:
+            size = fp.seek(0, os.SEEK_END)
+            if size % record.dtype.itemsize:
+                # drop a partially written trailing record so the appended records stay aligned
+                fp.truncate(size - size % record.dtype.itemsize)
+                self._logger.warning("Truncated a partial record of %s telemetry segment %s", tier, segment)
+            fp.write(record.tobytes())
+
+    def _prune(self, tier: str, cutoff: float) -> None:
+        """
+        Remove segments of a tier which ended before the cutoff
+        """
+        span = self.RAW_SEGMENT if tier == self.RAW else self.MINUTE_SEGMENT
+        for segment in self.segments(tier):
+            if float(segment) + span <= cutoff:
+                os.remove(f'{self.path}/{tier}/{segment}.bin')
+                self._logger.debug("Pruned %s telemetry segment %s", tier, segment)
+
+    def _prune_long(self, segment: str, cutoff: float) -> None:
+        """
+        Remove long segments of inactive experiments whose last record is older than the cutoff. The
+        segment being written and the segment of the open long bucket are active. The no experiment
+        segment is reused between experiments so its expired records are trimmed instead.
+        """
+        active = {self._experiment, segment} - {NO_EXPERIMENT}
+        for name in self.segments(self.LONG):
+            if name in active: continue
+            filename = f'{self.path}/{self.LONG}/{name}.bin'
+            records = self.open(self.LONG, name)
+            if not len(records) or records['time'][-1] < cutoff:
+                del records
+                os.remove(filename)
+                self._logger.debug("Pruned long telemetry segment %s", name)
+            elif name == NO_EXPERIMENT and records['time'][0] < cutoff:
+                retained = np.array(records[np.searchsorted(records['time'], cutoff):])
+                del records
+                with open(filename + '.tmp', 'wb') as fp:
+                    fp.write(retained.tobytes())
+                os.replace(filename + '.tmp', filename)
+                self._logger.debug("Trimmed %s expired long telemetry records", name)
+
+    def segments(self, tier: str) -> List[str]:
+        """
+        Get the segment names of a tier. Raw and minute segments are named by their start epoch and
+        sort chronologically; long segments are named by experiment id.
+
+        :param tier: archive tier
+        :type tier: str
+        :return: segment names
+        :rtype: List[str]
+        """
+        try:
+            names = [name[:-4] for name in os.listdir(f'{self.path}/{tier}') if name.endswith('.bin')]
+        except FileNotFoundError:
+            return []
+        if tier == self.LONG: return sorted(names)
+        return sorted(names, key=float)
+
+    def open(self, tier: str, segment: str) -> np.ndarray:
+        """
+        Memory map a segment read only
+
+        :param tier: archive tier
+        :type tier: str
+        :param segment: segment name
+        :type segment: str
+        :return: segment records
+        :rtype: np.ndarray
+        """
+        dtype = self.RAW_DTYPE if tier == self.RAW else self.AGGREGATE_DTYPE
+        filename = f'{self.path}/{tier}/{segment}.bin'
+        # ignore a partially written trailing record
+        count = os.path.getsize(filename) // dtype.itemsize
+        if not count: return np.zeros(0, dtype=dtype)
+        return np.memmap(filename, dtype=dtype, mode='r', shape=(count,))
+
+    def read(self, tier: str, start: float = 0.0, end: float = float('inf'),
+             experiment_id: Optional[str] = None) -> np.ndarray:
+        """
+        Read the records of a tier within a time range. Only the matching slices of each mapped
+        segment are copied into memory.
+
+        :param tier: archive tier
+        :type tier: str
+        :param start: range start in epoch seconds (inclusive), defaults to 0.0
+        :type start: float, optional
+        :param end: range end in epoch seconds (exclusive), defaults to inf
+        :type end: float, optional
+        :param experiment_id: long tier experiment id, defaults to all experiments
+        :type experiment_id: Optional[str], optional
+        :return: records sorted by time
+        :rtype: np.ndarray
+        """
+        dtype = self.RAW_DTYPE if tier == self.RAW else self.AGGREGATE_DTYPE
+        if tier == self.LONG and experiment_id is not None:
+            segments = [experiment_id] if experiment_id in self.segments(tier) else []
+        else:
+            segments = self.segments(tier)
+        chunks: List[np.ndarray] = []
+        for segment in segments:
+            records = self.open(tier, segment)
+            if not len(records): continue
+            lo, hi = np.searchsorted(records['time'], (start, end))
+            if hi > lo: chunks.append(np.array(records[lo:hi]))
+        if not chunks: return np.zeros(0, dtype=dtype)
+        merged = np.concatenate(chunks)
+        # long tier segments interleave in time when experiments change
+        return merged[np.argsort(merged['time'], kind='stable')] if tier == self.LONG else merged
@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+"""
+Cache Writer
+============
+Modified: 2026-10
+
+Background persistence of committed state models. Commits hand their frozen snapshot to the writer
+and return immediately; the writer debounces bursts of commits, coalesces them so only the latest
+snapshot of each model is written and replaces cache files atomically so a power loss never leaves
+a truncated cache file behind.
+
+After each batch the writer also refreshes the consolidated snapshot store: a single versioned and
+checksummed file holding every runtime model so boot can restore all state in one read. The store
+holds the last snapshot submitted for caching of each model (not the live registry slots) so commits
+made with cache=False are never persisted, as with the per model json files which remain the
+fallback and migration path.
+
+Commits are recorded in an append-only journal ahead of the debounced cache write so a commit
+survives the process dying before it is cached. Commits are queued for the journal while their state
+slot is swapped and each record carries the slot sequence number so the journal follows commit order;
+the writer thread appends the queued records as soon as it wakes so no disk I/O runs on the commit
+path. The journal is replayed at boot and compacted into the snapshot store each time the snapshot is
+saved which keeps replay (and restart time) bounded.
+
+Dependancies
+------------
+```
+import os
+import json
+import time
+import zlib
+import struct
+import atexit
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from monitor.models.state import StateModel
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import os
+import json
+import time
+import zlib
+import struct
+import atexit
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from monitor.models.state import StateModel
+
+
+class SnapshotStore:
+
+    MAGIC = b'IRIS'
+    VERSION = 1
+    # magic, format version, crc32 of the body
+    HEADER = struct.Struct('<4sHI')
+    FILENAME = 'state.snapshot'
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self._logger = logging.getLogger(__name__)
+        if path is None:
+            path = os.environ.get('MONITOR_CACHE', default='/etc/iris/cache') + '/' + self.FILENAME
+        self.path = path
+        self._directory = False
+
+    def save(self, models: Iterable[StateModel], fsync: bool = False) -> None:
+        """
+        Atomically replace the snapshot file with the serialized models
+
+        :param models: runtime models keyed in the snapshot by their cache filename (unpopulated
+            models are skipped)
+        :type models: Iterable[StateModel]
+        :param fsync: flush the file and its directory entry to disk, defaults to False
+        :type fsync: bool, optional
+        """
+        payload: Dict[str, Dict[str, Any]] = {}
+        for model in models:
+            try:
+                payload[os.path.basename(model.cache_path)] = model.serialize()
+            except AttributeError:
+                # models which were never populated have nothing to restore
+                continue
+        body = zlib.compress(json.dumps(payload, separators=(',', ':'), default=str).encode())
+        tmp_path = self.path + '.tmp'
+        if not self._directory:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._directory = True
+        try:
+            with open(tmp_path, 'wb') as fp:
+                fp.write(self.HEADER.pack(self.MAGIC, self.VERSION, zlib.crc32(body)))
+                fp.write(body)
+                if fsync:
+                    fp.flush()
+                    os.fsync(fp.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+        self._logger.debug("Saved state snapshot with %s models", len(payload))
+
+    def load(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read the snapshot file
+
+        :return: serialized models keyed by cache filename or None if the snapshot is missing,
+            from another format version or fails its checksum
+        :rtype: Optional[Dict[str, Dict[str, Any]]]
+        """
+        try:
+            with open(self.path, 'rb') as fp:
+                data = fp.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < self.HEADER.size:
+            self._logger.warning("State snapshot %s is truncated", self.path)
+            return None
+        magic, version, checksum = self.HEADER.unpack_from(data)
+        body = memoryview(data)[self.HEADER.size:]
+        if magic != self.MAGIC or version != self.VERSION:
+            self._logger.warning("State snapshot %s has unsupported format %s v%s", self.path, magic, version)
+            return None
+        if zlib.crc32(body) != checksum:
+            self._logger.warning("State snapshot %s failed its checksum", self.path)
+            return None
+        try:
+            return json.loads(zlib.decompress(body))
+        except (zlib.error, ValueError) as exc:
+            self._logger.warning("State snapshot %s could not be decoded: %s", self.path, exc)
+            return None
+
+
+class CommitJournal:
+
+    # body length, crc32 of the body
+    RECORD = struct.Struct('<II')
+    FILENAME = 'state.journal'
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self._logger = logging.getLogger(__name__)
+        if path is None:
+            path = os.environ.get('MONITOR_CACHE', default='/etc/iris/cache') + '/' + self.FILENAME
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+
+    def _open(self) -> int:
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+        return self._fd
+
+    def append(self, model: StateModel, seq: Optional[int] = None) -> None:
+        """
+        Record a committed model. The record is handed to the os in a single unbuffered write so it
+        survives the process dying; it is made durable against power loss when it is compacted into
+        the fsynced snapshot store.
+
+        :param model: committed state model
+        :type model: StateModel
+        :param seq: slot sequence number of the commit, defaults to None
+        :type seq: Optional[int], optional
+        """
+        body = json.dumps(
+            {'file': os.path.basename(model.cache_path), 'seq': seq, 'model': model.serialize()},
+            separators=(',', ':'), default=str
+        ).encode()
+        record = self.RECORD.pack(len(body), zlib.crc32(body)) + body
+        with self._lock:
+            os.write(self._open(), record)
+
+    def size(self) -> int:
+        """
+        Get the journal length in bytes
+
+        :return: journal length
+        :rtype: int
+        """
+        with self._lock:
+            try:
+                return os.path.getsize(self.path)
+            except FileNotFoundError:
+                return 0
+
+    def replay(self) -> List[Tuple[str, Optional[int], Dict[str, Any]]]:
+        """
+        Read the journaled commits in commit order. Reading stops at the first torn or corrupt record.
+
+        :return: (cache filename, slot sequence number, serialized model) for each journaled commit
+        :rtype: List[Tuple[str, Optional[int], Dict[str, Any]]]
+        """
+        try:
+            with open(self.path, 'rb') as fp:
+                data = fp.read()
+        except FileNotFoundError:
+            return []
+        records: List[Tuple[str, Optional[int], Dict[str, Any]]] = []
+        offset = 0
+        while offset + self.RECORD.size <= len(data):
+            length, checksum = self.RECORD.unpack_from(data, offset)
+            body = data[offset + self.RECORD.size:offset + self.RECORD.size + length]
+            if len(body) != length or zlib.crc32(body) != checksum:
+                break
+            try:
+                entry = json.loads(body)
+                records.append((entry['file'], entry.get('seq'), entry['model']))
+            except (ValueError, KeyError, TypeError):
+                break
+            offset += self.RECORD.size + length
+        if offset != len(data):
+            self._logger.warning("Discarding %s bytes of torn journal records", len(data) - offset)
+        return records
+
+    def compact(self, offset: int) -> None:
+        """
+        Drop the journal prefix up to an offset once it is reflected in the snapshot store. Records
+        appended after the offset are kept.
+
+        :param offset: journal length captured before the snapshot was taken
+        :type offset: int
+        """
+        with self._lock:
+            try:
+                with open(self.path, 'rb') as fp:
+                    fp.seek(offset)
+                    tail = fp.read()
+            except FileNotFoundError:
+                return
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'wb') as fp:
+                fp.write(tail)
+            os.replace(tmp_path, self.path)
+        self._logger.debug("Compacted state journal to %s bytes", len(tail))
+
+
+class CacheWriter:
+
+    # seconds to wait for further commits of a model before writing it
+    DEBOUNCE = float(os.environ.get('MONITOR_CACHE_DEBOUNCE', default=0.5))
+    # upper bound in seconds on how long a continuously committed model can be deferred
+    MAX_DELAY = float(os.environ.get('MONITOR_CACHE_MAX_DELAY', default=5.0))
+    # fsync cache files (and their directory) before and after they are replaced
+    FSYNC = os.environ.get('MONITOR_CACHE_FSYNC', default='1') not in ('0', 'false', 'False')
+    # maintain the consolidated snapshot store alongside the per model json files
+    SNAPSHOT = os.environ.get('MONITOR_STATE_SNAPSHOT', default='1') not in ('0', 'false', 'False')
+    # journal commits ahead of the debounced writes (requires the snapshot store for compaction)
+    JOURNAL = os.environ.get('MONITOR_STATE_JOURNAL', default='1') not in ('0', 'false', 'False')
+
+    def __init__(self, debounce: float = DEBOUNCE, fsync: bool = FSYNC, snapshot: bool = SNAPSHOT,
+                 journal: bool = JOURNAL) -> None:
+        self._logger = logging.getLogger(__name__)
+        self.debounce = debounce
+        self.fsync = fsync
+        self.store = SnapshotStore() if snapshot else None
+        self.journal = CommitJournal() if snapshot and journal else None
+        self._pending: Dict[str, StateModel] = {}
+        # submitted snapshots waiting to be journaled in commit order
+        self._unjournaled: List[Tuple[StateModel, Optional[int]]] = []
+        # slot sequence number of the newest snapshot pending or written per cache file
+        self._seqs: Dict[str, int] = {}
+        # last snapshot submitted for caching per cache file, the content of the snapshot store
+        self._cached: Dict[str, StateModel] = {}
+        self._condition = threading.Condition()
+        # number of submitted snapshots not yet written
+        self._inflight = 0
+        # submissions counter used to detect commits during the debounce window
+        self._submitted = 0
+        self._flushing = False
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, snapshot: StateModel, seq: Optional[int] = None) -> None:
+        """
+        Schedule a committed snapshot to be written to its cache file. A pending snapshot of the same
+        model is replaced. Racing commits can be submitted out of commit order so a snapshot older
+        than the one already pending or written for its model is ignored.
+
+        :param snapshot: frozen state model
+        :type snapshot: StateModel
+        :param seq: slot sequence number of the commit, defaults to None (always newest)
+        :type seq: Optional[int], optional
+        """
+        with self._condition:
+            if seq is not None:
+                if seq <= self._seqs.get(snapshot.cache_path, -1):
+                    self._logger.debug("Ignoring stale %s snapshot %s", type(snapshot).__name__, seq)
+                    return
+                self._seqs[snapshot.cache_path] = seq
+            self._cached[snapshot.cache_path] = snapshot
+            if self.journal is not None: self._unjournaled.append((snapshot, seq))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='cache-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+            if snapshot.cache_path not in self._pending: self._inflight += 1
+            self._pending[snapshot.cache_path] = snapshot
+            self._submitted += 1
+            self._condition.notify_all()
+
+    def track(self, snapshot: StateModel, seq: Optional[int] = None) -> None:
+        """
+        Record a snapshot as the cached state of its model without writing it. Used for models
+        restored from cache at boot which are committed with cache=False.
+
+        :param snapshot: frozen state model
+        :type snapshot: StateModel
+        :param seq: slot sequence number of the commit, defaults to None
+        :type seq: Optional[int], optional
+        """
+        with self._condition:
+            if seq is not None:
+                if seq <= self._seqs.get(snapshot.cache_path, -1): return
+                self._seqs[snapshot.cache_path] = seq
+            self._cached[snapshot.cache_path] = snapshot
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write all pending snapshots now and wait until they are on disk
+
+        :param timeout: maximum seconds to wait, defaults to None (no limit)
+        :type timeout: Optional[float], optional
+        :return: True if nothing remains pending
+        :rtype: bool
+        """
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                # no writer (or interpreter shutdown): write on the calling thread
+                pending, self._pending = self._pending, {}
+                self._inflight = 0
+                self._journal()
+                for snapshot in pending.values(): self._write(snapshot)
+                if pending: self.save_snapshot()
+                return True
+            self._flushing = True
+            self._condition.notify_all()
+            flushed = self._condition.wait_for(lambda: self._inflight == 0, timeout)
+            self._flushing = False
+            return flushed
+
+    def _run(self) -> None:
+        """
+        Writer loop
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: bool(self._pending))
+                deadline = time.monotonic() + self.MAX_DELAY
+            # debounce: collect further commits until the writer has been idle for the window, journaling
+            # the commits submitted meanwhile each time the writer wakes
+            while True:
+                self._journal()
+                with self._condition:
+                    if self._flushing: break
+                    submitted = self._submitted
+                    self._condition.wait(min(self.debounce, max(0.0, deadline - time.monotonic())))
+                    if self._submitted == submitted or time.monotonic() >= deadline: break
+            self._journal()
+            with self._condition:
+                pending, self._pending = self._pending, {}
+            for snapshot in pending.values():
+                self._write(snapshot)
+            self.save_snapshot()
+            with self._condition:
+                self._inflight -= len(pending)
+                self._condition.notify_all()
+
+    def _journal(self) -> None:
+        """
+        Append the queued commits to the journal in the order they were submitted
+        """
+        with self._condition:
+            records, self._unjournaled = self._unjournaled, []
+        for snapshot, seq in records:
+            try:
+                self.journal.append(snapshot, seq)
+            except (OSError, TypeError, ValueError, AttributeError) as exc:
+                self._logger.error("Failed to journal %s: %s", type(snapshot).__name__, exc)
+
+    def _write(self, snapshot: StateModel) -> None:
+        try:
+            snapshot.cache(fsync=self.fsync)
+        except (OSError, TypeError, ValueError) as exc:
+            self._logger.error("Failed to cache %s: %s", type(snapshot).__name__, exc)
+
+    def save_snapshot(self) -> None:
+        """
+        Refresh the consolidated snapshot store from the last cached snapshot of each model and compact
+        the journal
+        """
+        if self.store is None: return
+        with self._condition:
+            # commits are queued for the journal after their cached snapshot is updated so every record
+            # before this offset is reflected in the models read here
+            offset = self.journal.size() if self.journal is not None else 0
+            models = list(self._cached.values())
+        try:
+            self.store.save(models, fsync=self.fsync)
+            if self.journal is not None and offset: self.journal.compact(offset)
+        except (OSError, TypeError, ValueError) as exc:
+            self._logger.error("Failed to save state snapshot: %s", exc)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Subscriber Profiler
+===================
+Modified: 2026-10
+
+Records state subscriber latencies per runtime model and subscriber and tracks subscriber deadline
+overruns so slow gauge, menu or scheduler callbacks stalling commits can be identified.
+
+Dependancies
+------------
+```
+import os
+import logging
+from threading import Lock
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+from tabulate import tabulate
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import os
+import logging
+from threading import Lock
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+from tabulate import tabulate
+
+
+class SubscriberStats:
+    """
+    Latency samples for a single subscriber. Percentiles are computed over a bounded window of the
+    most recent samples; count, max and overruns cover the full runtime.
+    """
+    __slots__ = ('samples', 'count', 'total', 'max', 'overruns')
+
+    def __init__(self, window: int) -> None:
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.overruns = 0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Get a latency percentile over the sample window (nearest rank)
+
+        :param percent: percentile in [0, 100]
+        :type percent: float
+        :return: latency in seconds
+        :rtype: float
+        """
+        if not self.samples: return 0.0
+        ordered = sorted(self.samples)
+        rank = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+
+class SubscriberProfiler:
+
+    WINDOW = 512                # latency samples retained per subscriber
+    # per subscriber deadline in seconds (0 disables overrun detection)
+    DEADLINE = float(os.environ.get('MONITOR_SUBSCRIBER_DEADLINE', default=0.1))
+
+    def __init__(self, deadline: float = DEADLINE) -> None:
+        self._logger = logging.getLogger(__name__)
+        self.deadline = deadline
+        self._lock = Lock()
+        self._stats: Dict[Tuple[str, str], SubscriberStats] = {}
+
+    def __str__(self) -> str:
+        rows = [
+            (
+                row['model'], row['subscriber'], row['count'], row['p50'] * 1e3,
+                row['p99'] * 1e3, row['max'] * 1e3, row['overruns']
+            ) for row in self.dump()
+        ]
+        return "\n" + str(tabulate(
+            rows, headers=['Model', 'Subscriber', 'Count', 'p50 (ms)', 'p99 (ms)', 'Max (ms)', 'Overruns'],
+            floatfmt=".3f"
+        ))
+
+    def record(self, model: str, subscriber: str, elapsed: float) -> None:
+        """
+        Record a subscriber execution latency
+
+        :param model: runtime model type name
+        :type model: str
+        :param subscriber: subscriber qualified name
+        :type subscriber: str
+        :param elapsed: execution time in seconds
+        :type elapsed: float
+        """
+        overrun = 0 < self.deadline < elapsed
+        with self._lock:
+            stats = self._stats.get((model, subscriber))
+            if stats is None:
+                stats = self._stats[(model, subscriber)] = SubscriberStats(self.WINDOW)
+            stats.samples.append(elapsed)
+            stats.count += 1
+            stats.total += elapsed
+            if elapsed > stats.max: stats.max = elapsed
+            if overrun: stats.overruns += 1
+        if overrun:
+            self._logger.warning("%s subscriber %s overran its %.1f ms deadline: %.1f ms",
+                                 model, subscriber, self.deadline * 1e3, elapsed * 1e3)
+
+    def dump(self) -> List[Dict[str, Any]]:
+        """
+        Get latency statistics for all subscribers, slowest (p99) first. Latencies are in seconds.
+
+        :return: subscriber statistics
+        :rtype: List[Dict[str, Any]]
+        """
+        with self._lock:
+            rows = [
+                {
+                    'model': model,
+                    'subscriber': subscriber,
+                    'count': stats.count,
+                    'mean': stats.total / stats.count,
+                    'p50': stats.percentile(50),
+                    'p99': stats.percentile(99),
+                    'max': stats.max,
+                    'overruns': stats.overruns
+                } for (model, subscriber), stats in self._stats.items()
+            ]
+        return sorted(rows, key=lambda row: row['p99'], reverse=True)
+
+    def reset(self) -> None:
+        """
+        Clear all recorded statistics
+        """
+        with self._lock:
+            self._stats.clear()
@@ -21,7 +21,8 @@ Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
-from typing import Any, Callable, Coroutine, Dict, List, Tuple
+from threading import Lock
+from typing import Any, Callable, Coroutine, Dict, FrozenSet, Generic, Iterable, List, Optional, Tuple, TypeVar, Union
 
 from monitor.models.icb import ICB
 from monitor.models.device import Device
@@ -29,6 +30,136 @@ from monitor.models.protocol import Protocol
 from monitor.models.experiment import Experiment
 from monitor.models.imaging_profile import ImagingProfile
 
+# generic runtime model type
+_S = TypeVar('_S', bound=Union[ICB, Experiment, Device, Protocol, ImagingProfile])
+
+
+class PropertyRegistry(Generic[_S]):
+    """
+    Property subscriptions for a single runtime model. Subscriptions which declare the fields they
+    watch are indexed by field name so a commit only evaluates the triggers of changed fields.
+    """
+
+    def __init__(self) -> None:
+        # callback -> [(trigger, callback_on_init, fields)]
+        self.triggers: Dict[Callable[[_S], Coroutine[Any, Any, None]],
+                            List[Tuple[Callable[[_S, _S], bool], bool, Optional[FrozenSet[str]]]]] = {}
+        # field name -> callbacks watching the field
+        self.index: Dict[str, List[Callable[[_S], Coroutine[Any, Any, None]]]] = {}
+        # callbacks with at least one trigger that does not declare its fields
+        self.unindexed: List[Callable[[_S], Coroutine[Any, Any, None]]] = []
+
+    def add(self, callback: Callable[[_S], Coroutine[Any, Any, None]], trigger: Callable[[_S, _S], bool],
+            callback_on_init: bool, fields: Optional[Iterable[str]] = None) -> None:
+        """
+        Register a property trigger for a callback
+
+        :param callback: state change listener callback
+        :type callback: Callable[[_S], Coroutine[Any, Any, None]]
+        :param trigger: property change condition
+        :type trigger: Callable[[_S, _S], bool]
+        :param callback_on_init: run the callback on the initial commit
+        :type callback_on_init: bool
+        :param fields: names of the fields the trigger depends on, defaults to None (always evaluated)
+        :type fields: Optional[Iterable[str]], optional
+        """
+        watched = frozenset(fields) if fields is not None else None
+        self.triggers.setdefault(callback, []).append((trigger, callback_on_init, watched))
+        if watched is None:
+            if callback not in self.unindexed: self.unindexed.append(callback)
+            return
+        for field in watched:
+            subscribers = self.index.setdefault(field, [])
+            if callback not in subscribers: subscribers.append(callback)
+
+    def candidates(self, changed: Iterable[str]) -> List[Callable[[_S], Coroutine[Any, Any, None]]]:
+        """
+        Get the callbacks whose triggers may be satisfied by a set of changed fields
+
+        :param changed: changed field names
+        :type changed: Iterable[str]
+        :return: candidate callbacks in registration order per field
+        :rtype: List[Callable[[_S], Coroutine[Any, Any, None]]]
+        """
+        candidates = dict.fromkeys(self.unindexed)
+        for field in changed:
+            candidates.update(dict.fromkeys(self.index.get(field, ())))
+        return list(candidates)
+
+    def clear(self) -> None:
+        """
+        Remove all property subscriptions
+        """
+        self.triggers.clear()
+        self.index.clear()
+        self.unindexed.clear()
+
+
+class StateSlot(Generic[_S]):
+    """
+    Versioned reference to a committed runtime model snapshot. The snapshot and its sequence number
+    are held in a single tuple so readers always see a consistent pair without locking; writers
+    serialize on a per-slot lock only for the reference swap.
+    """
+
+    def __init__(self, snapshot: _S) -> None:
+        self._entry: Tuple[_S, int] = (snapshot, 0)
+        self._lock = Lock()
+
+    @property
+    def snapshot(self) -> _S:
+        """
+        Get the committed runtime model snapshot
+
+        :return: frozen runtime model
+        :rtype: _S
+        """
+        return self._entry[0]
+
+    @property
+    def seq(self) -> int:
+        """
+        Get the sequence number of the committed snapshot. Incremented on every swap.
+
+        :return: sequence number
+        :rtype: int
+        """
+        return self._entry[1]
+
+    def read(self) -> Tuple[_S, int]:
+        """
+        Get the committed snapshot along with its sequence number
+
+        :return: frozen runtime model and sequence number
+        :rtype: Tuple[_S, int]
+        """
+        return self._entry
+
+    def swap(self, snapshot: _S, expected: Optional[int] = None,
+             publish: Optional[Callable[[_S, int], None]] = None) -> Optional[Tuple[_S, int]]:
+        """
+        Replace the committed snapshot. If an expected sequence number is given the swap only succeeds
+        if no other commit has happened since (compare-and-swap).
+
+        :param snapshot: frozen runtime model to commit
+        :type snapshot: _S
+        :param expected: expected current sequence number, defaults to None (unconditional)
+        :type expected: Optional[int], optional
+        :param publish: called with the snapshot and its sequence number while the slot lock is held so
+            side effects which must follow commit order (journaling) are ordered like the slot,
+            defaults to None
+        :type publish: Optional[Callable[[_S, int], None]], optional
+        :return: replaced snapshot and its sequence number or None if the compare-and-swap failed
+        :rtype: Optional[Tuple[_S, int]]
+        """
+        with self._lock:
+            previous = self._entry
+            if expected is not None and previous[1] != expected:
+                return None
+            self._entry = (snapshot, previous[1] + 1)
+            if publish is not None: publish(snapshot, previous[1] + 1)
+        return previous
+
 
 class CallbackRegistry:
     # validator registries
@@ -41,22 +172,17 @@ class CallbackRegistry:
     experiment: List[Callable[[Experiment], Coroutine[Any, Any, None]]] = []
     protocol: List[Callable[[Protocol], Coroutine[Any, Any, None]]] = []
     ip: List[Callable[[ImagingProfile], Coroutine[Any, Any, None]]] = []
-    ip_properties: Dict[Callable[[ImagingProfile], Coroutine[Any, Any, None]],
-                        List[Tuple[Callable[[ImagingProfile, ImagingProfile], bool], bool]]] = {}
-    experiment_properties: Dict[Callable[[Experiment], Coroutine[Any, Any, None]],
-                                List[Tuple[Callable[[Experiment, Experiment], bool], bool]]] = {}
-    protocol_properties: Dict[Callable[[Protocol], Coroutine[Any, Any, None]],
-                              List[Tuple[Callable[[Protocol, Protocol], bool], bool]]] = {}
-    icb_properties: Dict[Callable[[ICB], Coroutine[Any, Any, None]],
-                         List[Tuple[Callable[[ICB, ICB], bool], bool]]] = {}
-    device_properties: Dict[Callable[[Device], Coroutine[Any, Any, None]],
-                            List[Tuple[Callable[[Device, Device], bool], bool]]] = {}
+    ip_properties: PropertyRegistry[ImagingProfile] = PropertyRegistry()
+    experiment_properties: PropertyRegistry[Experiment] = PropertyRegistry()
+    protocol_properties: PropertyRegistry[Protocol] = PropertyRegistry()
+    icb_properties: PropertyRegistry[ICB] = PropertyRegistry()
+    device_properties: PropertyRegistry[Device] = PropertyRegistry()
 
 
 class StateRegistry:
-    # state variables
-    icb: ICB = ICB()
-    protocol: Protocol = Protocol()
-    device: Device = Device()
-    imaging_profile: ImagingProfile = ImagingProfile()
-    experiment: Experiment = Experiment()
+    # state variables (frozen snapshots swapped on each commit)
+    icb: StateSlot[ICB] = StateSlot(ICB().snapshot())
+    protocol: StateSlot[Protocol] = StateSlot(Protocol().snapshot())
+    device: StateSlot[Device] = StateSlot(Device().snapshot())
+    imaging_profile: StateSlot[ImagingProfile] = StateSlot(ImagingProfile().snapshot())
+    experiment: StateSlot[Experiment] = StateSlot(Experiment().snapshot())
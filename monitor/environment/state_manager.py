@@ -21,11 +21,14 @@ Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
-import copy
+import os
+import time
 import logging
 import asyncio
 import traceback
-from typing import Any, Coroutine, Dict, Generic, Tuple, Type, TypeVar, Callable, List, Union
+import threading
+from typing import (Any, Coroutine, Dict, FrozenSet, Generic, Iterable, Optional, Tuple, Type, TypeVar, Callable,
+                    List, Union)
 
 from monitor.models.icb import ICB
 from monitor.models.device import Device
@@ -33,22 +36,32 @@ from monitor.models.protocol import Protocol
 from monitor.models.experiment import Experiment
 from monitor.models.imaging_profile import ImagingProfile
 from monitor.environment.registry import CallbackRegistry as cr
+from monitor.environment.registry import PropertyRegistry
+from monitor.environment.profiler import SubscriberProfiler
+from monitor.environment.telemetry import TelemetryBuffer
+from monitor.environment.persistence import CacheWriter
 from monitor.environment.registry import StateRegistry as sr
 from monitor.sys.helpers import clear_thumbnail, write_lab_id, read_lab_id
+from monitor.metrics.registry import MetricsRegistry as metrics
 
 StateModel = Union[ICB, Experiment, Device, Protocol, ImagingProfile]
 
 # generic runtime model type
 _S = TypeVar('_S', bound=StateModel)
 
+_COMMITS = metrics.counter('state.commits')
+_STALE_COMMITS = metrics.counter('state.stale_commits')
+_APPLY_TIME = metrics.histogram('state.apply')
+
 
 class PropertyCondition(Generic[_S]):
 
     def __init__(self, trigger: Callable[[_S, _S], bool], callback: Callable[[_S], Coroutine[Any, Any, None]],
-                 callback_on_init=False) -> None:
+                 callback_on_init=False, fields: Optional[Iterable[str]] = None) -> None:
         self.trigger = trigger
         self.callback = callback
         self.callback_on_init = callback_on_init
+        self.fields = fields
 
     @property
     def trigger(self) -> Callable[[_S, _S], bool]:
@@ -74,9 +87,36 @@ class PropertyCondition(Generic[_S]):
     def callback_on_init(self, value: bool):
         self.__callback_on_init = value
 
+    @property
+    def fields(self) -> Optional[FrozenSet[str]]:
+        """
+        Get the model fields read by the trigger. A trigger is only evaluated when one of its fields
+        changes; if no fields are declared it is evaluated on every commit.
+
+        :return: watched field names
+        :rtype: Optional[FrozenSet[str]]
+        """
+        return self.__fields
+
+    @fields.setter
+    def fields(self, fields: Optional[Iterable[str]]):
+        self.__fields = frozenset(fields) if fields is not None else None
+
 
 class StateManager:
 
+    # attempts for transactions restaged when a staged runtime model was committed since staging
+    TRANSACTION_ATTEMPTS = 3
+    # long-lived subscriber dispatch loop shared by all state manager instances
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _loop_thread: Optional[threading.Thread] = None
+    _loop_lock = threading.Lock()
+    # subscriber latency and deadline overrun statistics
+    profiler = SubscriberProfiler()
+    telemetry = TelemetryBuffer()
+    # background cache file persistence
+    writer = CacheWriter()
+
     def __init__(self) -> None:
         self._logger = logging.getLogger(__name__)
 
@@ -89,12 +129,13 @@ class StateManager:
     @property
     def device(self) -> Device:
         """
-        Get device runtime model
+        Get device runtime model snapshot. The snapshot is shared by all readers until the next commit
+        replaces it; use `edit()` to stage changes.
 
-        :return: device runtime model
+        :return: frozen device runtime model
         :rtype: Device
         """
-        return copy.deepcopy(sr.device)
+        return sr.device.snapshot
 
     @device.setter
     def device(self, device: Device) -> None:
@@ -104,17 +145,18 @@ class StateManager:
         :param device: device runtime model
         :type device: Device
         """
-        sr.device.deserialize(**device.__dict__)
+        sr.device.swap(device.snapshot())
 
     @property
     def imaging_profile(self) -> ImagingProfile:
         """
-        Get imaging profile runtime model
+        Get imaging profile runtime model snapshot. The snapshot is shared by all readers until the next commit
+        replaces it; use `edit()` to stage changes.
 
-        :return: imaging profile runtime model
+        :return: frozen imaging profile runtime model
         :rtype: ImagingProfile
         """
-        return copy.deepcopy(sr.imaging_profile)
+        return sr.imaging_profile.snapshot
 
     @imaging_profile.setter
     def imaging_profile(self, imaging_profile: ImagingProfile) -> None:
@@ -124,17 +166,18 @@ class StateManager:
         :param imaging_profile: imaging profile runtime model
         :type imaging_profile: ImagingProfile
         """
-        sr.imaging_profile.deserialize(**imaging_profile.__dict__)
+        sr.imaging_profile.swap(imaging_profile.snapshot())
 
     @property
     def protocol(self) -> Protocol:
         """
-        Get protocol runtime model
+        Get protocol runtime model snapshot. The snapshot is shared by all readers until the next commit
+        replaces it; use `edit()` to stage changes.
 
-        :return: protocol runtime model
+        :return: frozen protocol runtime model
         :rtype: Protocol
         """
-        return copy.deepcopy(sr.protocol)
+        return sr.protocol.snapshot
 
     @protocol.setter
     def protocol(self, protocol: Protocol) -> None:
@@ -144,17 +187,18 @@ class StateManager:
         :param protocol: protocol runtime model
         :type protocol: Protocol
         """
-        sr.protocol.deserialize(**protocol.__dict__)
+        sr.protocol.swap(protocol.snapshot())
 
     @property
     def experiment(self) -> Experiment:
         """
-        Get experiment runtime model
+        Get experiment runtime model snapshot. The snapshot is shared by all readers until the next commit
+        replaces it; use `edit()` to stage changes.
 
-        :return: experiment runtime model
+        :return: frozen experiment runtime model
         :rtype: Experiment
         """
-        return copy.deepcopy(sr.experiment)
+        return sr.experiment.snapshot
 
     @experiment.setter
     def experiment(self, experiment: Experiment) -> None:
@@ -164,17 +208,18 @@ class StateManager:
         :param experiment: experiment runtime model
         :type experiment: Experiment
         """
-        sr.experiment.deserialize(**experiment.__dict__)
+        sr.experiment.swap(experiment.snapshot())
 
     @property
     def icb(self) -> ICB:
         """
-        Get icb runtime model
+        Get icb runtime model snapshot. The snapshot is shared by all readers until the next commit
+        replaces it; use `edit()` to stage changes.
 
-        :return: icb runtime model
+        :return: frozen icb runtime model
         :rtype: ICB
         """
-        return copy.deepcopy(sr.icb)
+        return sr.icb.snapshot
 
     @icb.setter
     def icb(self, icb: ICB) -> None:
@@ -184,32 +229,72 @@ class StateManager:
         :param icb: icb runtime model
         :type icb: ICB
         """
-        sr.icb.setattrs(**icb.__dict__)
+        sr.icb.swap(icb.snapshot())
+
+    @classmethod
+    def _dispatcher(cls) -> asyncio.AbstractEventLoop:
+        """
+        Get the subscriber dispatch loop, starting its thread on first use
+
+        :return: running subscriber dispatch loop
+        :rtype: asyncio.AbstractEventLoop
+        """
+        with cls._loop_lock:
+            if cls._loop is None:
+                loop = asyncio.new_event_loop()
+                cls._loop_thread = threading.Thread(
+                    name='state-dispatch', target=loop.run_forever, daemon=True)
+                cls._loop_thread.start()
+                cls._loop = loop
+                logging.getLogger(__name__).info("Started state subscriber dispatch loop")
+        return cls._loop
 
     def _load_runtime_models(self) -> None:
         """
-        Load in runtime models from cache
+        Load in runtime models from cache. Models are restored from the consolidated snapshot store
+        in a single read when available, falling back to each model's json cache file. Journaled
+        commits are then replayed on top.
         """
+        store, journal = self.writer.store, self.writer.journal
+        payloads = store.load() if store is not None else None
+        # commits which may not have reached the cache files before the last shutdown
+        journaled = journal.replay() if journal is not None else []
         # read state vars from cache
-        self.protocol.load()
-        self.device.load()
-        self.experiment.load()
-        self.imaging_profile.load()
+        protocol = self.protocol.edit()
+        device = self.device.edit()
+        experiment = self.experiment.edit()
+        imaging_profile = self.imaging_profile.edit()
+        for model in (protocol, device, experiment, imaging_profile):
+            payload = payloads.get(os.path.basename(model.cache_path)) if payloads is not None else None
+            if payload is None: model.load()
+            else: model.deserialize(**payload)
+        models = {
+            os.path.basename(model.cache_path): model for model in (protocol, device, experiment, imaging_profile)
+        }
+        # records of a model are journaled in slot sequence order so the last record is the newest
+        for filename, _, payload in journaled:
+            if filename in models: models[filename].deserialize(**payload)
         # commit device cache to system
-        self.commit(self.device, initial=True, cache=False)
+        self.commit(device, initial=True, cache=False)
         # conditionally commit optional states based on initialization state
-        self.commit(self.protocol, initial=True, cache=False)
-        self.commit(self.experiment, initial=True, cache=False)
-        self.commit(self.imaging_profile, initial=True, cache=False)
-
-    def commit(self, state: StateModel, initial: bool = False, source: bool = False, cache: bool = True) -> bool:
+        self.commit(protocol, initial=True, cache=False)
+        self.commit(experiment, initial=True, cache=False)
+        self.commit(imaging_profile, initial=True, cache=False)
+        # the restored models are what is cached on disk, later cache=False commits are not
+        for slot in (sr.device, sr.protocol, sr.experiment, sr.imaging_profile):
+            self.writer.track(*slot.read())
+        # migrate json caches and replayed commits into the snapshot store
+        if store is not None and (payloads is None or journaled): self.writer.save_snapshot()
+
+    def commit(self, state: StateModel, initial: bool = False, source: bool = False, cache: bool = True,
+               wait: bool = True, seq: Optional[int] = None) -> bool:
         """
         Commiting a state variable change requires up to 3 steps:
           1. Independant system validation (for external system state changes)
           2. Update state variable in runtime layer (here)
           3. Notify subscribers of state change
 
-        :param state: proposed state variable change
+        :param state: proposed state variable change, committed as a frozen snapshot
         :type state: StateModel
         :param initial: flag indicating this is the initial commit for this runtime model. This acts as
                         an override for the model initialization check
@@ -218,110 +303,195 @@ class StateManager:
         :type source: bool
         :param cache: flag which indicates the commit should update the system cache, defaults to True
         :type cache: bool, optional
+        :param wait: block until subscribers have been notified, defaults to True
+        :type wait: bool, optional
+        :param seq: sequence number the change was based on. If set, the commit is rejected when another
+                    commit has replaced that snapshot in the meantime (compare-and-swap), defaults to None
+        :type seq: Optional[int], optional
         :return: commit status
         :rtype: bool
         """
         if initial:
             self._logger.info("Initial model commit for %s", state)
+        # await validators if state change is not from source
+        if not source and not self._validate(state):
+            return False
+        return self._apply(state, initial, cache, wait, seq)
+
+    def sequence(self, state_type: Type[_S]) -> int:
+        """
+        Get the sequence number of a runtime model. The sequence number increments on every commit so
+        readers can cheaply detect stale data and writers can pass it to `commit` for compare-and-swap.
+
+        :param state_type: runtime model type
+        :type state_type: Type[_S]
+        :return: sequence number
+        :rtype: int
+        """
+        if state_type is ImagingProfile: return sr.imaging_profile.seq
+        elif state_type is Device: return sr.device.seq
+        elif state_type is Protocol: return sr.protocol.seq
+        elif state_type is Experiment: return sr.experiment.seq
+        return sr.icb.seq
+
+    def transaction(self, source: bool = False, cache: bool = True, wait: bool = True) -> 'StateTransaction':
+        """
+        Open a state transaction. Changes staged on the transaction models are validated together and
+        committed on exit with a single diff and subscriber notification per runtime model.
+
+        :param source: flag indicating the source module is pushing these changes (do not call validator)
+        :type source: bool
+        :param cache: flag which indicates the commit should update the system cache, defaults to True
+        :type cache: bool, optional
+        :param wait: block until subscribers have been notified, defaults to True
+        :type wait: bool, optional
+        :return: state transaction context
+        :rtype: StateTransaction
+        """
+        return StateTransaction(self, source=source, cache=cache, wait=wait)
+
+    def _validate(self, state: StateModel) -> bool:
+        """
+        Run the independant system validator for a proposed state variable change
+
+        :param state: proposed state variable change
+        :type state: StateModel
+        :return: validation status
+        :rtype: bool
+        """
+        if isinstance(state, ImagingProfile): registry = cr.ip_isv
+        elif isinstance(state, ICB): registry = cr.icb_isv
+        else: return True
+        try:
+            self._isv_runner(state, registry)
+        except RuntimeError as exc:
+            self._logger.warning("State change validation failed: %s", exc)
+            return False
+        return True
+
+    def _apply(self, state: StateModel, initial: bool, cache: bool, wait: bool, seq: Optional[int] = None) -> bool:
+        """
+        Update a validated state variable in the runtime layer and notify subscribers
+
+        :param state: validated state variable change
+        :type state: StateModel
+        :param initial: initial commit flag
+        :type initial: bool
+        :param cache: flag which indicates the commit should update the system cache
+        :type cache: bool
+        :param wait: block until subscribers have been notified
+        :type wait: bool
+        :param seq: expected sequence number of the committed snapshot, defaults to None (unconditional)
+        :type seq: Optional[int], optional
+        :return: False if the compare-and-swap failed
+        :rtype: bool
+        """
+        start = time.perf_counter()
+        snapshot = state.snapshot()
         # filter by runtime model
         if isinstance(state, ImagingProfile):
-            # await validators if state change is not from source
-            if not source:
-                try:
-                    self._isv_runner(state, cr.ip_isv)
-                except RuntimeError as exc:
-                    self._logger.warning("State change validation failed: %s", exc)
-                    return False
-            # cache old model
-            cached = copy.deepcopy(self.imaging_profile)
-            # await update state
-            self.imaging_profile = state
-            # async update subscribers
-            self._resolve_subscriptions(initial, cr.ip, cr.ip_properties, cached, state)
+            slot, registry, properties = sr.imaging_profile, cr.ip, cr.ip_properties
         elif isinstance(state, ICB):
-            # await validators
-            if not source:
-                try:
-                    self._isv_runner(state, cr.icb_isv)
-                except RuntimeError as exc:
-                    self._logger.warning("State change validation failed: %s", exc)
-                    return False
-            # cache old model
-            cached = copy.deepcopy(self.icb)
-            # await update state
-            self.icb = state
-            # async update subscribers
-            self._resolve_subscriptions(initial, cr.icb, cr.icb_properties, cached, state)
+            slot, registry, properties = sr.icb, cr.icb, cr.icb_properties
         elif isinstance(state, Experiment):
+            slot, registry, properties = sr.experiment, cr.experiment, cr.experiment_properties
+        elif isinstance(state, Protocol):
+            slot, registry, properties = sr.protocol, cr.protocol, cr.protocol_properties
+        else:
+            slot, registry, properties = sr.device, cr.device, cr.device_properties
+        # write all state variables to cache for all runtime models (ICB exempt) if cache flag is set.
+        # Writes are deferred to the cache writer so commits never block on disk; the commit is
+        # queued for the journal and the writer under the swap so they see commits in slot sequence order.
+        submit = self.writer.submit if cache and not isinstance(snapshot, ICB) else None
+        # swap in the new snapshot, holding the replaced snapshot for the subscription diff
+        previous = slot.swap(snapshot, seq, submit)
+        if previous is None:
+            _STALE_COMMITS.inc()
+            self._logger.warning("Stale commit rejected for %s: expected sequence %s but found %s",
+                                 type(state).__name__, seq, slot.seq)
+            return False
+        cached, _ = previous
+        if isinstance(snapshot, Experiment):
             # clear thumbnail for new inbound experiments
             clear_thumbnail()
-            # cache old model
-            cached = copy.deepcopy(self.experiment)
-            # await update state
-            self.experiment = state
-            # async update subscribers
-            self._resolve_subscriptions(initial, cr.experiment,
-                                        cr.experiment_properties, cached, state)
-        elif isinstance(state, Protocol):
-            # cache old model
-            cached = copy.deepcopy(self.protocol)
-            # await update state
-            self.protocol = state
-            # async update subscribers
-            self._resolve_subscriptions(initial, cr.protocol, cr.protocol_properties, cached, state)
-        elif isinstance(state, Device):
-            # cache old model
-            cached = copy.deepcopy(self.device)
-            # await update state
-            self.device = state
+        elif isinstance(snapshot, ICB):
+            self.telemetry.append(snapshot)
+        elif isinstance(snapshot, Device):
             # update lab_id if delta
-            if state.lab_id != read_lab_id():
-                write_lab_id(state.lab_id)
-            # async update subscribers
-            self._resolve_subscriptions(initial, cr.device, cr.device_properties, cached, state)
-        # write all state variables to cache for all runtime
-        # models (ICB exempt) if cache flag is set.
-        if cache and not isinstance(state, ICB): state.cache()
-        self._logger.info("State change commit for %s successful", state)
+            if snapshot.lab_id != read_lab_id():
+                write_lab_id(snapshot.lab_id)
+        # async update subscribers
+        self._resolve_subscriptions(initial, registry, properties, cached, snapshot, wait)
+        _COMMITS.inc()
+        _APPLY_TIME.observe(time.perf_counter() - start)
+        self._logger.info("State change commit for %s successful", snapshot)
         return True
 
     def _resolve_subscriptions(self, initial: bool, state_registry: List[Callable[[_S], Coroutine[Any, Any, None]]],
-                               state_properties: Dict[Callable[[_S], Coroutine[Any, Any, None]],
-                                                      List[Tuple[Callable[[_S, _S], bool], bool]]],
-                               cached: _S, state: _S) -> None:
+                               state_properties: PropertyRegistry[_S], cached: _S, state: _S,
+                               wait: bool = True) -> None:
         """
-        State and property level subscription resolver
+        State and property level subscription resolver. Subscribers are dispatched to the persistent
+        subscriber loop; state level subscribers run before property level subscribers. Property
+        triggers are looked up by the fields changed in this commit.
 
         :param initial: initial state commit flag
         :type initial: bool
         :param state_registry: state model subscription registry
         :type state_registry: List[Callable[[_S], Coroutine[Any, Any, None]]]
         :param state_properties: state property subscription registry
-        :type state_properties: Dict[Callable[[_S], Coroutine[Any, Any, None]], 
-                                List[Tuple[Callable[[_S, _S], bool], bool]]]
+        :type state_properties: PropertyRegistry[_S]
         :param cached: previous state model
         :type cached: _S
         :param state: active state model
         :type state: _S
+        :param wait: block until all subscribers have completed, defaults to True
+        :type wait: bool, optional
         """
-        if state_registry:
-            asyncio.run(self._subscriber_runner(state, state_registry))
         prop_callbacks: List[Callable[[_S], Coroutine[Any, Any, None]]] = []
-        for callback, trigger_list in state_properties.items():
+        # field level diff computed once per commit
+        changed = cached.diff(state)
+        candidates = list(state_properties.triggers) if initial else state_properties.candidates(changed)
+        for callback in candidates:
             # if any triggers are true then the callback is appended to the callback list
-            for trigger, callback_on_init in trigger_list:
+            for trigger, callback_on_init, fields in state_properties.triggers[callback]:
                 if initial and callback_on_init:
                     self._logger.debug(
                         "First commit for model %s, and callback_on_init is set.\
                         Appending %s to property subscription callbacks", cached, callback)
                     prop_callbacks.append(callback)
+                    break
+                elif fields is not None and fields.isdisjoint(changed):
+                    continue
                 elif trigger(cached, state):
                     self._logger.debug(
                         "Trigger condition met.  Appending %s property subscription", callback)
                     prop_callbacks.append(callback)
                     break
+        if not state_registry and not prop_callbacks:
+            return
+        future = asyncio.run_coroutine_threadsafe(
+            self._dispatch(state, list(state_registry), prop_callbacks), self._dispatcher())
+        # a subscriber committing from the dispatch thread must not block on its own loop
+        if wait and threading.current_thread() is not self._loop_thread:
+            future.result()
+
+    async def _dispatch(self, state_var: _S, state_registry: List[Callable[[_S], Coroutine[Any, Any, None]]],
+                        prop_callbacks: List[Callable[[_S], Coroutine[Any, Any, None]]]) -> None:
+        """
+        Run state level then property level subscribers for a single commit
+
+        :param state_var: pre-validated runtime model to pass to subscribers
+        :type state_var: _S
+        :param state_registry: state model subscribers
+        :type state_registry: List[Callable[[_S], Coroutine[Any, Any, None]]]
+        :param prop_callbacks: triggered property subscribers
+        :type prop_callbacks: List[Callable[[_S], Coroutine[Any, Any, None]]]
+        """
+        if state_registry:
+            await self._subscriber_runner(state_var, state_registry)
         if prop_callbacks:
-            asyncio.run(self._subscriber_runner(state, prop_callbacks))
+            await self._subscriber_runner(state_var, prop_callbacks)
 
     def subscribe(self, state_type: Type[_S],
                   callback: Callable[[_S], Coroutine[Any, Any, None]]) -> None:
@@ -356,11 +526,7 @@ class StateManager:
         elif _type is Protocol: prop_callbacks = cr.protocol_properties
         elif _type is Experiment: prop_callbacks = cr.experiment_properties
         else: prop_callbacks = cr.icb_properties
-        if _property.callback in prop_callbacks.keys():
-            prop_callbacks[_property.callback].append(
-                (_property.trigger, _property.callback_on_init))
-        else:
-            prop_callbacks[_property.callback] = [(_property.trigger, _property.callback_on_init)]
+        prop_callbacks.add(_property.callback, _property.trigger, _property.callback_on_init, _property.fields)
 
     def subscribe_isv(self, state_type: Type[_S], callback: Callable[[_S], bool]) -> None:
         """
@@ -414,11 +580,11 @@ class StateManager:
         :type registry: List[Callable[[T], Awaitable[None]]]
         """
         # construct coroutine lists
-        tasks = [subscriber(state_var) for subscriber in registry]
+        tasks = [self._timed_subscriber(subscriber, state_var) for subscriber in registry]
         # return results from coroutines with exceptions if any
         results = await asyncio.gather(*tasks, return_exceptions=True)
         # reformat tasks to display only the name
-        operations = tuple(zip(map(lambda x: x.__qualname__, tasks), results))
+        operations = tuple(zip(map(lambda x: x.__qualname__, registry), results))
         self._logger.debug("%s Subscriber operations: %s", type(state_var).__name__, operations)
         # filter by operations which yielded an exception
         exceptions: List[Tuple[str, Exception]] = list(
@@ -428,3 +594,146 @@ class StateManager:
                                    "".join(traceback.format_exception(
                                        etype=type(exc), value=exc, tb=exc.__traceback__
                                    )))
+
+    async def _timed_subscriber(self, subscriber: Callable[[_S], Coroutine[Any, Any, None]], state_var: _S) -> None:
+        """
+        Await a subscriber coroutine recording its latency with the subscriber profiler
+
+        :param subscriber: subscriber coroutine function
+        :type subscriber: Callable[[_S], Coroutine[Any, Any, None]]
+        :param state_var: pre-validated runtime model to pass to the subscriber
+        :type state_var: _S
+        """
+        start = time.perf_counter()
+        try:
+            await subscriber(state_var)
+        finally:
+            self.profiler.record(type(state_var).__name__, subscriber.__qualname__, time.perf_counter() - start)
+
+
+# subscriber latencies are aggregated by the profiler
+metrics.collector('state.subscribers', StateManager.profiler.dump)
+
+
+class StateTransaction:
+    """
+    Batched state change. Runtime models accessed through the transaction are staged as mutable copies
+    of the committed snapshots; on a clean exit every staged model is validated and, only if all pass,
+    committed once in staging order. Each model is committed against the sequence number it was staged
+    at so the transaction fails instead of overwriting a commit made since.
+    """
+
+    def __init__(self, manager: StateManager, source: bool = False, cache: bool = True, wait: bool = True) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._manager = manager
+        self._source = source
+        self._cache = cache
+        self._wait = wait
+        self._staged: Dict[Type[StateModel], StateModel] = {}
+        self._seqs: Dict[Type[StateModel], int] = {}
+        self.committed = False
+        # set if the transaction failed because a staged runtime model was committed since staging
+        self.stale = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # discard staged changes if the transaction body raised
+        if exc_type is None:
+            self.committed = self._commit()
+
+    def _stage(self, seq: int, snapshot: _S) -> _S:
+        """
+        Get the staged copy of a runtime model, staging it from its snapshot on first access. The
+        sequence number is read before the snapshot so a commit in between fails the transaction.
+
+        :param seq: sequence number of the runtime model
+        :type seq: int
+        :param snapshot: committed runtime model snapshot
+        :type snapshot: _S
+        :return: staged runtime model
+        :rtype: _S
+        """
+        if type(snapshot) not in self._staged:
+            self._staged[type(snapshot)] = snapshot.edit()
+            self._seqs[type(snapshot)] = seq
+        return self._staged[type(snapshot)]  # type: ignore
+
+    @property
+    def device(self) -> Device:
+        """
+        Get staged device runtime model
+
+        :return: mutable device runtime model
+        :rtype: Device
+        """
+        return self._stage(self._manager.sequence(Device), self._manager.device)
+
+    @property
+    def imaging_profile(self) -> ImagingProfile:
+        """
+        Get staged imaging profile runtime model
+
+        :return: mutable imaging profile runtime model
+        :rtype: ImagingProfile
+        """
+        return self._stage(self._manager.sequence(ImagingProfile), self._manager.imaging_profile)
+
+    @property
+    def protocol(self) -> Protocol:
+        """
+        Get staged protocol runtime model
+
+        :return: mutable protocol runtime model
+        :rtype: Protocol
+        """
+        return self._stage(self._manager.sequence(Protocol), self._manager.protocol)
+
+    @property
+    def experiment(self) -> Experiment:
+        """
+        Get staged experiment runtime model
+
+        :return: mutable experiment runtime model
+        :rtype: Experiment
+        """
+        return self._stage(self._manager.sequence(Experiment), self._manager.experiment)
+
+    @property
+    def icb(self) -> ICB:
+        """
+        Get staged icb runtime model
+
+        :return: mutable icb runtime model
+        :rtype: ICB
+        """
+        return self._stage(self._manager.sequence(ICB), self._manager.icb)
+
+    def _commit(self) -> bool:
+        """
+        Validate all staged runtime models then commit each of them. The transaction fails if any of
+        the runtime models was committed since it was staged.
+
+        :return: transaction commit status
+        :rtype: bool
+        """
+        staged = list(self._staged.values())
+        if not self._source and not all(self._manager._validate(state) for state in staged):
+            self._logger.warning("State transaction rejected. Discarding staged changes for: %s",
+                                 [type(state).__name__ for state in staged])
+            return False
+        stale = [type(state).__name__ for state in staged
+                 if self._manager.sequence(type(state)) != self._seqs[type(state)]]
+        if stale:
+            self._logger.warning("State transaction failed. %s committed since staging", stale)
+            self.stale = True
+            return False
+        for state in staged:
+            if not self._manager._apply(state, initial=False, cache=self._cache, wait=self._wait,
+                                        seq=self._seqs[type(state)]):
+                self._logger.error("State transaction failed. %s committed during the transaction commit",
+                                   type(state).__name__)
+                self.stale = True
+                return False
+        return True
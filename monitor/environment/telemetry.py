@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Telemetry Buffer
+================
+Modified: 2026-10
+
+Fixed capacity ring buffer of ICB frames. Each committed ICB snapshot is appended in O(1) and recent
+history can be queried as vectorized windows for trend plots and summary statistics. Memory use is
+allocated once and stays constant over the lifetime of an experiment.
+
+Dependancies
+------------
+```
+import os
+import time
+import warnings
+import numpy as np
+from threading import Lock
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from monitor.models.icb import ICB
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import os
+import time
+import warnings
+import numpy as np
+from threading import Lock
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from monitor.models.icb import ICB
+
+
+class TelemetryBuffer:
+
+    FIELDS: Tuple[str, ...] = ('tc', 'cc', 'oc', 'rh', 'tp', 'cp', 'op', 'fc', 'hp')
+    # number of frames retained (24 hours of 1 s sensorframes by default)
+    CAPACITY = int(os.environ.get('MONITOR_TELEMETRY_CAPACITY', default=86400))
+
+    def __init__(self, capacity: int = CAPACITY) -> None:
+        self.capacity = capacity
+        self._lock = Lock()
+        self._time = np.zeros(capacity, dtype=np.float64)
+        self._values = np.full((capacity, len(self.FIELDS)), np.nan, dtype=np.float32)
+        self._head = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, icb: ICB, timestamp: Optional[float] = None) -> None:
+        """
+        Append an icb frame. Readings which have not been initialized are stored as NaN.
+
+        :param icb: icb frame
+        :type icb: ICB
+        :param timestamp: frame time in epoch seconds, defaults to the frame timestamp
+        :type timestamp: Optional[float], optional
+        """
+        if timestamp is None:
+            try:
+                timestamp = datetime.fromisoformat(icb.timestamp).timestamp()
+            except (AttributeError, ValueError):
+                timestamp = time.time()
+        row = [getattr(icb, field, np.nan) for field in self.FIELDS]
+        with self._lock:
+            head = self._head
+            # keep the time axis monotonic across wall clock corrections so windows can be bisected
+            if self._size and timestamp < self._time[head - 1]:
+                timestamp = self._time[head - 1]
+            self._time[head] = timestamp
+            self._values[head] = row
+            self._head = (head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def last(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the most recent frames in chronological order
+
+        :param n: number of frames
+        :type n: int
+        :return: frame times (n,) and readings (n, len(FIELDS)) as copies
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        with self._lock:
+            return self._last(n)
+
+    def window(self, seconds: float, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the frames recorded within the last number of seconds in chronological order
+
+        :param seconds: window length in seconds
+        :type seconds: float
+        :param now: end of the window in epoch seconds, defaults to the current time
+        :type now: Optional[float], optional
+        :return: frame times and readings as copies
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        cutoff = (time.time() if now is None else now) - seconds
+        with self._lock:
+            # the ring is two sorted runs: [head, size) holds the oldest frames and [0, head) the newest
+            older = self._time[self._head:self._size]
+            newer = self._time[:self._head]
+            expired = np.searchsorted(older, cutoff) + np.searchsorted(newer, cutoff)
+            # the frames are copied under the same lock so the window matches the head it was bisected on
+            return self._last(self._size - int(expired))
+
+    def _last(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        # caller holds the lock; fancy indexing copies the frames out of the ring
+        n = max(0, min(n, self._size))
+        index = np.arange(self._head - n, self._head) % self.capacity
+        return self._time[index], self._values[index]
+
+    def stats(self, seconds: float, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Get min, max and mean of each reading over a window ignoring uninitialized readings
+
+        :param seconds: window length in seconds
+        :type seconds: float
+        :param now: end of the window in epoch seconds, defaults to the current time
+        :type now: Optional[float], optional
+        :return: statistics keyed by reading name
+        :rtype: Dict[str, Dict[str, float]]
+        """
+        _, values = self.window(seconds, now)
+        if not len(values):
+            values = np.full((1, len(self.FIELDS)), np.nan, dtype=np.float32)
+        with warnings.catch_warnings():
+            # readings never reported in the window are all NaN and yield NaN
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            low, high, mean = np.nanmin(values, axis=0), np.nanmax(values, axis=0), np.nanmean(values, axis=0)
+        return {
+            field: {'min': float(low[i]), 'max': float(high[i]), 'mean': float(mean[i])}
+            for i, field in enumerate(self.FIELDS)
+        }
+
+    def clear(self) -> None:
+        """
+        Drop all frames
+        """
+        with self._lock:
+            self._head = 0
+            self._size = 0
@@ -3,7 +3,7 @@
 """
 Thread Manager
 ==============
-Modified: 2021-03
+Modified: 2026-10
 
 Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
@@ -18,6 +18,7 @@ from typing import Callable
 from threading import Lock, Condition, Thread, enumerate, active_count, current_thread
 from monitor.events.registry import Registry as events
 from monitor.ui.static.settings import UISettings as uis
+from monitor.metrics.registry import MetricsRegistry as metrics
 
 
 class ThreadManager:
@@ -26,12 +27,16 @@ class ThreadManager:
     MEM_THRESH = 70
     process = psutil.Process(os.getpid())
     # singleton thread locks
-    api_lock = Lock()
     arduino_lock = Lock()
     mqtt_lock = Lock()
     # condition variables
     gst_bus_condition = Condition()
     _logger = logging.getLogger(__name__)
+    # process gauges sampled by the monitor loop
+    rss = metrics.gauge('process.rss')
+    memory_percent = metrics.gauge('process.memory_percent')
+    cpu_percent = metrics.gauge('process.cpu_percent')
+    threads = metrics.gauge('process.threads')
 
     def __init__(self): ...
 
@@ -58,14 +63,19 @@ class ThreadManager:
         Main monitoring loop
         """
         while True:
-            if self.process.memory_percent(memtype="rss") > self.MEM_THRESH:
+            memory_percent = self.process.memory_percent(memtype="rss")
+            if memory_percent > self.MEM_THRESH:
                 events.system_status.trigger(uis.STATUS_ALERT)
                 self._logger.critical("RSS memory reached threshold. Triggering warning")
-            self._logger.info("Process RSS Memory Footprint: %s MB",
-                              round(self.process.memory_info().rss / 1e6, 2))
-            self._logger.info("Process RSS Memory Usage: %s", round(
-                self.process.memory_percent(memtype="rss"), 2))
-            self._logger.info("Process CPU Usage: %s", self.process.cpu_percent(interval=None))
+            rss = self.process.memory_info().rss
+            cpu_percent = self.process.cpu_percent(interval=None)
+            self.rss.set(rss)
+            self.memory_percent.set(memory_percent)
+            self.cpu_percent.set(cpu_percent)
+            self.threads.set(active_count())
+            self._logger.debug("Process RSS Memory Footprint: %s MB", round(rss / 1e6, 2))
+            self._logger.debug("Process RSS Memory Usage: %s", round(memory_percent, 2))
+            self._logger.debug("Process CPU Usage: %s", cpu_percent)
             # current = tracemalloc.take_snapshot()
             # top_stats = current.statistics('lineno')
             # self._logger.debug("Top 10 differences:")
@@ -83,7 +93,7 @@ class ThreadManager:
         """
         Semaphore lock a function
 
-        :param lock: threading lock (stored in this class)
+        :param lock: threading lock or semaphore
         :type lock: threading.Lock
         :return: decorator
         :rtype: Callable
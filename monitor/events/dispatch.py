@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Event Dispatcher
+================
+Modified: 2026-10
+
+Executes event callbacks off the triggering thread. Callbacks are either queued onto a shared pool of
+event worker threads or marshalled onto the UI thread, which drains its queue once per frame. Both
+queues are ordered by (priority, trigger sequence) so a priority 0 callback queued by a later trigger
+still runs ahead of pending priority 1 callbacks.
+
+Callbacks which depend on the completion of earlier triggers (api requests which need the jwt and
+the replayed request cache before them) are queued onto a single serial worker instead, which runs
+them one at a time in trigger order without occupying the shared pool.
+
+Dependencies:
+-------------
+```
+import os
+import time
+import logging
+import itertools
+from queue import Empty, PriorityQueue, Queue
+from threading import Lock, Thread, get_ident
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from monitor.metrics.registry import MetricsRegistry as metrics
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import os
+import time
+import logging
+import itertools
+from queue import Empty, PriorityQueue, Queue
+from threading import Lock, Thread, get_ident
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from monitor.metrics.registry import MetricsRegistry as metrics
+
+_FAILURES = metrics.counter('events.failures')
+
+# (priority, sequence, event name, callback, args, kwargs)
+_Job = Tuple[int, int, str, Callable[..., Any], tuple, Dict[str, Any]]
+
+
+class Dispatcher:
+
+    # dispatch modes
+    INLINE = 'inline'
+    WORKER = 'worker'
+    SERIAL = 'serial'
+    UI = 'ui'
+    MODES = (INLINE, WORKER, SERIAL, UI)
+    # number of event worker threads
+    WORKERS = int(os.environ.get('MONITOR_EVENT_WORKERS', default=2))
+    # seconds of each ui frame spent on queued callbacks
+    UI_BUDGET = float(os.environ.get('MONITOR_EVENT_UI_BUDGET', default=0.004))
+
+    _logger = logging.getLogger(__name__)
+    _lock = Lock()
+    _sequence = itertools.count()
+    _worker_queue: 'PriorityQueue[_Job]' = PriorityQueue()
+    _ui_queue: 'PriorityQueue[_Job]' = PriorityQueue()
+    # serial jobs run strictly in trigger order
+    _serial_queue: 'Queue[_Job]' = Queue()
+    _workers: List[Thread] = []
+    _serial: Optional[Thread] = None
+    _ui_thread: Optional[int] = None
+
+    @classmethod
+    def dispatch(cls, mode: str, priority: int, name: str, callback: Callable[..., Any], *args, **kwargs) -> None:
+        """
+        Execute an event callback in the requested dispatch mode. UI callbacks run inline when triggered
+        from the UI thread or while no UI thread is attached (headless operation).
+
+        :param mode: dispatch mode
+        :type mode: str
+        :param priority: callback priority (lower runs first)
+        :type priority: int
+        :param name: event name for logging
+        :type name: str
+        :param callback: event callback
+        :type callback: Callable[..., Any]
+        """
+        if mode == cls.WORKER:
+            cls._start_workers()
+            cls._worker_queue.put((priority, next(cls._sequence), name, callback, args, kwargs))
+        elif mode == cls.SERIAL:
+            cls._start_serial()
+            cls._serial_queue.put((priority, next(cls._sequence), name, callback, args, kwargs))
+        elif mode == cls.UI and cls._ui_thread is not None and cls._ui_thread != get_ident():
+            cls._ui_queue.put((priority, next(cls._sequence), name, callback, args, kwargs))
+        else:
+            cls.execute(name, callback, *args, **kwargs)
+
+    @classmethod
+    def execute(cls, name: str, callback: Callable[..., Any], *args, **kwargs) -> bool:
+        """
+        Execute a callback on the current thread, logging and swallowing any exception it raises
+
+        :param name: event name for logging
+        :type name: str
+        :param callback: event callback
+        :type callback: Callable[..., Any]
+        :return: true if the callback completed without an exception
+        :rtype: bool
+        """
+        try:
+            callback(*args, **kwargs)
+        except BaseException as exc:
+            _FAILURES.inc()
+            cls._logger.exception("%s callback encountered an exception during execution:\n%s", name, exc)
+            return False
+        cls._logger.debug("%s: %s execution successful", name, callback)
+        return True
+
+    @classmethod
+    def attach_ui(cls) -> None:
+        """
+        Mark the calling thread as the UI thread. UI callbacks triggered from other threads are queued
+        until the next call to drain.
+        """
+        cls._ui_thread = get_ident()
+        cls._logger.info("UI thread attached to event dispatcher")
+
+    @classmethod
+    def detach_ui(cls) -> None:
+        """
+        Release the UI thread, running any queued UI callbacks on the caller
+        """
+        cls._ui_thread = None
+        cls.drain(budget=float('inf'))
+
+    @classmethod
+    def drain(cls, budget: float = UI_BUDGET) -> int:
+        """
+        Run queued UI callbacks in priority order until the queue is empty or the time budget is spent.
+        At least one callback is run per call so the queue always makes progress.
+
+        :param budget: time budget in seconds, defaults to UI_BUDGET
+        :type budget: float, optional
+        :return: number of callbacks run
+        :rtype: int
+        """
+        deadline = time.monotonic() + budget
+        count = 0
+        while True:
+            try:
+                _, _, name, callback, args, kwargs = cls._ui_queue.get_nowait()
+            except Empty:
+                break
+            cls.execute(name, callback, *args, **kwargs)
+            count += 1
+            if time.monotonic() >= deadline: break
+        return count
+
+    @classmethod
+    def pending(cls) -> Tuple[int, int]:
+        """
+        Get the number of queued worker and UI callbacks
+
+        :return: worker and ui queue depth
+        :rtype: Tuple[int, int]
+        """
+        return cls._worker_queue.qsize(), cls._ui_queue.qsize()
+
+    @classmethod
+    def join(cls, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the worker and serial queues to be fully processed
+
+        :param timeout: seconds to wait, defaults to no timeout
+        :type timeout: Optional[float], optional
+        :return: true if every queued worker and serial callback completed
+        :rtype: bool
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for queue in (cls._worker_queue, cls._serial_queue):
+            with queue.all_tasks_done:
+                while queue.unfinished_tasks:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0: return False
+                    queue.all_tasks_done.wait(remaining)
+        return True
+
+    @classmethod
+    def _start_workers(cls) -> None:
+        """
+        Start the event worker pool on first use
+        """
+        if cls._workers: return
+        with cls._lock:
+            if cls._workers: return
+            workers = [
+                Thread(name=f'event-worker-{i}', target=cls._work, daemon=True)
+                for i in range(max(1, cls.WORKERS))
+            ]
+            for worker in workers: worker.start()
+            cls._workers = workers
+        cls._logger.info("Started %s event workers", len(workers))
+
+    @classmethod
+    def _start_serial(cls) -> None:
+        """
+        Start the serial worker on first use
+        """
+        if cls._serial is not None: return
+        with cls._lock:
+            if cls._serial is not None: return
+            cls._serial = Thread(name='event-serial', target=cls._work, args=(cls._serial_queue,), daemon=True)
+            cls._serial.start()
+        cls._logger.info("Started serial event worker")
+
+    @classmethod
+    def _work(cls, queue: Optional['Queue[_Job]'] = None) -> None:
+        """
+        Event worker loop
+
+        :param queue: job queue, defaults to the worker pool queue
+        :type queue: Optional[Queue[_Job]], optional
+        """
+        if queue is None: queue = cls._worker_queue
+        while True:
+            _, _, name, callback, args, kwargs = queue.get()
+            try:
+                cls.execute(name, callback, *args, **kwargs)
+            finally:
+                queue.task_done()
+
+
+metrics.gauge('events.worker_queue', fn=lambda: Dispatcher.pending()[0])
+metrics.gauge('events.ui_queue', fn=lambda: Dispatcher.pending()[1])
+metrics.gauge('events.serial_queue', fn=lambda: Dispatcher._serial_queue.qsize())
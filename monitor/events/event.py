@@ -3,44 +3,65 @@
 """
 Event
 =====
-Modified: 2021-05
+Modified: 2026-10
 
 Dependencies:
 -------------
 ```
-from typing import Callable, Optional, Tuple, TypeVar, Generic, List
+import logging
+from bisect import bisect_right
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, TypeVar, Generic, List
+from monitor.events.dispatch import Dispatcher
 ```
 Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
 import logging
-
-from typing import Callable, Optional, Tuple, TypeVar, Generic, List
+from bisect import bisect_right
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, TypeVar, Generic, List
+from monitor.events.dispatch import Dispatcher
 
 _T = TypeVar('_T', bound=Callable[..., None])
 
 
 class Event(Generic[_T]):
+
+    # callback dispatch modes
+    INLINE = Dispatcher.INLINE      # run on the triggering thread
+    WORKER = Dispatcher.WORKER      # queue onto the event worker pool
+    SERIAL = Dispatcher.SERIAL      # queue onto the serial worker (trigger order)
+    UI = Dispatcher.UI              # marshal onto the ui thread
+
     def __init__(self, name: str) -> None:
         """
         name = [
-            (callback<T>, priority<int>, conditional<Callable[..., bool]>),
-            (callback<T>, priority<int>, conditional<Callable[..., bool]>),
-            (callback<T>, priority<int>, conditional<Callable[..., bool]>),
+            (callback<T>, priority<int>, conditional<Callable[..., bool]>, mode<str>),
+            (callback<T>, priority<int>, conditional<Callable[..., bool]>, mode<str>),
+            (callback<T>, priority<int>, conditional<Callable[..., bool]>, mode<str>),
             ...
         ]
         """
         self._logger = logging.getLogger(__name__)
         self.name = name
-        # Create an empty list with items of type T
-        self.registry: List[Tuple[_T, int, Optional[Callable[..., bool]]]] = []
+        # Create an empty list with items of type T. The registry is replaced (never mutated) on
+        # registration so triggers on other threads iterate a consistent snapshot.
+        self.registry: List[Tuple[_T, int, Optional[Callable[..., bool]], str]] = []
+        # priority of each registry entry for bisected insertion
+        self._priorities: List[int] = []
+        self._lock = Lock()
+        # number of triggers and of callbacks masked by an unsatisfied condition
+        self.fired = 0
+        self.masked = 0
         self._logger.info("Event: %s initialized.", self)
 
     def __str__(self) -> str:
         return self.name + ": " + str(self.registry)
 
-    def register(self, callback: _T, priority: int = 1, condition: Optional[Callable[..., bool]] = None) -> None:
+    def register(self, callback: _T, priority: int = 1, condition: Optional[Callable[..., bool]] = None,
+                 mode: str = INLINE) -> None:
         """
         Register a callback function to this event with a priority level and an optional conditional
         function to determine execution action.
@@ -48,32 +69,68 @@ class Event(Generic[_T]):
         :param callback: <T> function with T parameter and return type schema
         :param priority: <int> 1 | 0 representing the priority level of execution
         :param conditional: <Callable | None> 
+        :param mode: <str> INLINE | WORKER | SERIAL | UI dispatch mode
+        :raises ValueError: if the dispatch mode is unknown
+        """
+        if mode not in Dispatcher.MODES:
+            raise ValueError("Unknown dispatch mode: {}".format(mode))
+        with self._lock:
+            # insert after callbacks of equal priority to keep registration order within a priority
+            index = bisect_right(self._priorities, priority)
+            self._priorities.insert(index, priority)
+            self.registry = self.registry[:index] + [(callback, priority, condition, mode)] + self.registry[index:]
+        self._logger.info("Event: %s registered a %s callback @ priority: %s", self.name, mode, priority)
+
+    def register_group(self, callbacks: Iterable[_T], condition: Callable[..., bool], priority: int = 1,
+                       mode: str = INLINE) -> None:
+        """
+        Register callbacks sharing a single condition. A condition is evaluated at most once per trigger
+        no matter how many callbacks it guards.
+
+        :param callbacks: <Iterable[T]> callbacks registered in order
+        :param condition: <Callable> shared conditional
+        :param priority: <int> 1 | 0 representing the priority level of execution
+        :param mode: <str> INLINE | WORKER | SERIAL | UI dispatch mode
+        """
+        for callback in callbacks:
+            self.register(callback, priority, condition, mode)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the event counters
+
+        :return: registered callbacks, trigger count and masked callback count
+        :rtype: Dict[str, int]
         """
-        # append callback, priority and condition to event registry
-        self.registry.append((callback, priority, condition))
-        # sort events by priority level
-        self.registry.sort(key=lambda t: t[1])
-        self._logger.info("Event: %s registered a callback @ priority: %s", self.name, priority)
+        return {'callbacks': len(self.registry), 'fired': self.fired, 'masked': self.masked}
 
     def trigger(self, *args, **kwargs) -> None:
         """
-        Trigger event callbacks with args conditional is true or unset. Note: in python 3.10 with the
-        introduction of typing.ParamSpec we should be able to provide typing and intellisense support
+        Trigger event callbacks with args conditional is true or unset. Conditions are evaluated on the
+        triggering thread in priority order; inline callbacks run immediately while worker and ui
+        callbacks are queued and this method returns without waiting for them. Note: in python 3.10 with
+        the introduction of typing.ParamSpec we should be able to provide typing and intellisense support
         for this method.
         """
         self._logger.debug("Executing %s", self.name)
-        if len(self.registry) == 0:
+        registry = self.registry
+        if len(registry) == 0:
             self._logger.warning("No function in registry %s", self.name)
-        for event in self.registry:
+        # condition results of this trigger keyed by condition identity
+        results: Dict[Any, bool] = {}
+        masked = 0
+        for event in registry:
             # unpack the event tuple
-            callback, _, conditional = event
-            if conditional is None or conditional(*args, **kwargs):
-                try:
-                    callback(*args, **kwargs)
-                except BaseException as exc:
-                    self._logger.exception(
-                        "Callback encountered an exception during execution:\n%s", exc)
+            callback, priority, conditional, mode = event
+            if conditional is not None:
+                satisfied = results.get(conditional)
+                if satisfied is None:
+                    satisfied = results[conditional] = bool(conditional(*args, **kwargs))
+                if not satisfied:
+                    masked += 1
                     continue
-                self._logger.info("%s execution successful", callback)
-            else:
-                self._logger.info("Masked callback trigger due to unsatisfied conditional")
+            Dispatcher.dispatch(mode, priority, self.name, callback, *args, **kwargs)
+        with self._lock:
+            self.fired += 1
+            self.masked += masked
+        if masked: self._logger.debug("Masked %s callback triggers due to unsatisfied conditionals", masked)
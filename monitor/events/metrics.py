@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline Metrics
+================
+Modified: 2026-10
+
+Collects per stage timings of the registered pipelines (PREVIEW, THUMBNAIL, AVATAR, REGISTRATION and
+CAPTURE) so a slow capture cycle can be attributed to acquisition, encoding or upload. Pipeline and
+event statistics are exported through metrics registry collectors (see MetricsExporter); the stage
+table can also be written to the log on demand.
+
+Dependancies
+------------
+```
+import logging
+from typing import Any, Dict, List, Optional
+from tabulate import tabulate
+from monitor.events.event import Event
+from monitor.events.pipeline import Pipeline
+from monitor.events.registry import Registry
+from monitor.metrics.registry import MetricsRegistry as metrics
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import logging
+from typing import Any, Dict, List, Optional
+from tabulate import tabulate
+from monitor.events.event import Event
+from monitor.events.pipeline import Pipeline
+from monitor.events.registry import Registry
+from monitor.metrics.registry import MetricsRegistry as metrics
+
+
+class PipelineMetrics:
+
+    def __init__(self, pipelines: Optional[List[Pipeline]] = None) -> None:
+        """
+        :param pipelines: pipelines to report, defaults to every pipeline in the event registry
+        :type pipelines: Optional[List[Pipeline]], optional
+        """
+        self._logger = logging.getLogger(__name__)
+        if pipelines is None:
+            pipelines = [value for value in vars(Registry).values() if isinstance(value, Pipeline)]
+        self.pipelines = pipelines
+
+    def __str__(self) -> str:
+        rows = [
+            (
+                row['pipeline'], row['index'], row['stage'], row['runs'], row['failures'], row['dropped'],
+                row['mean'] * 1e3, row['wait'] * 1e3, row['slowest'] * 1e3, row['error'] or ''
+            ) for row in self.dump()
+        ]
+        return "\n" + str(tabulate(
+            rows, headers=[
+                'Pipeline', 'Stage', 'Callback', 'Runs', 'Failures', 'Dropped', 'Mean (ms)', 'Wait (ms)',
+                'Max (ms)', 'Last Error'
+            ], floatfmt=".1f"
+        ))
+
+    def dump(self) -> List[Dict[str, Any]]:
+        """
+        Get the statistics of every stage of every pipeline. Times are in seconds; mean and wait are
+        averaged over the stage runs.
+
+        :return: stage statistics
+        :rtype: List[Dict[str, Any]]
+        """
+        rows = []
+        for pipeline in self.pipelines:
+            for index, stats in enumerate(pipeline.stats()):
+                runs = stats['runs']
+                rows.append({
+                    'pipeline': pipeline.name,
+                    'index': index,
+                    'stage': stats['stage'],
+                    'queued': stats['queued'],
+                    'runs': runs,
+                    'failures': stats['failures'],
+                    'dropped': stats['dropped'],
+                    'mean': stats['elapsed'] / runs if runs else 0.0,
+                    'wait': stats['waited'] / runs if runs else 0.0,
+                    'last': stats['last'],
+                    'slowest': stats['slowest'],
+                    'error': stats['error']
+                })
+        return rows
+
+    def log(self, level: int = logging.INFO) -> None:
+        """
+        Write the stage statistics table to the log
+        """
+        self._logger.log(level, "Pipeline metrics:%s", self)
+
+
+metrics.collector('pipelines', lambda: PipelineMetrics().dump())
+metrics.collector('events', lambda: {
+    event.name: event.stats() for event in vars(Registry).values() if isinstance(event, Event)
+})
@@ -3,29 +3,143 @@
 """
 Pipeline
 ========
-Modified: 2021-05
+Modified: 2026-10
+
+Staged pipeline executor. Each stage owns a bounded input queue and a set of worker threads; the
+return value of a stage is queued as the arguments of the next stage so consecutive runs overlap
+(e.g. a capture can be acquired and encoded while the previous image set is still uploading). When a
+stage queue is full the pipeline policy either blocks the producer (backpressure) or drops the oldest
+queued run of the same request (runs are keyed by their begin arguments; without a queued run of the
+same key the oldest queued run is dropped). A drop oldest producer never waits.
 
 Dependencies:
 -------------
 ```
-from typing import Callable, Optional, Tuple, TypeVar, Generic, List
+import time
+import logging
+from collections import deque
+from threading import Condition, Lock, Thread
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple, Union
+from monitor.exceptions.event import NoListenersError, PipelineError
+from monitor.metrics.registry import Histogram, MetricsRegistry as metrics
 ```
 Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
+import time
 import logging
-from typing import Any, Callable, Tuple, List
+from collections import deque
+from threading import Condition, Lock, Thread
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple, Union
 from monitor.exceptions.event import NoListenersError, PipelineError
+from monitor.metrics.registry import Histogram, MetricsRegistry as metrics
+
+# (stage args, stage kwargs, enqueue time, request key)
+_Run = Tuple[Optional[tuple], Dict[str, Any], float, Hashable]
+
+
+class _StageQueue:
+    """
+    Bounded FIFO of pipeline runs waiting for a stage
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._items: Deque[_Run] = deque()
+        self._condition = Condition()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, run: _Run, block: bool) -> Optional[_Run]:
+        """
+        Queue a run. When the queue is full the producer either waits for space or the oldest run with
+        the same key is evicted, falling back to the oldest queued run so the producer never waits.
+
+        :return: the evicted run if one was dropped
+        :rtype: Optional[_Run]
+        """
+        dropped = None
+        with self._condition:
+            if not block and len(self._items) >= self.capacity:
+                dropped = next((item for item in self._items if item[3] == run[3]), self._items[0])
+                self._items.remove(dropped)
+            while len(self._items) >= self.capacity:
+                self._condition.wait()
+            self._items.append(run)
+            self._condition.notify_all()
+        return dropped
+
+    def get(self) -> _Run:
+        with self._condition:
+            while not self._items:
+                self._condition.wait()
+            run = self._items.popleft()
+            self._condition.notify_all()
+        return run
+
+
+class _Stage:
+    """
+    A pipeline stage: callback, input queue, workers and timing counters
+    """
+
+    def __init__(self, callback: Callable[..., Any], capacity: int, workers: int, histogram: Histogram) -> None:
+        self.callback = callback
+        self.histogram = histogram
+        self.queue = _StageQueue(capacity)
+        self.workers = workers
+        self.threads: List[Thread] = []
+        self.runs = 0
+        self.failures = 0
+        self.dropped = 0
+        self.elapsed = 0.0
+        self.waited = 0.0
+        self.last = 0.0
+        self.slowest = 0.0
+        self.error: Optional[str] = None
 
 
 class Pipeline:
-    def __init__(self, name: str, length: int) -> None:
+
+    # queue full policies
+    BLOCK = 'block'
+    DROP_OLDEST = 'drop-oldest'
+
+    def __init__(self, name: str, length: int, capacity: int = 1, policy: str = BLOCK,
+                 workers: Union[int, Tuple[int, ...]] = 1, key: Optional[Callable[..., Hashable]] = None) -> None:
+        """
+        :param name: pipeline name
+        :type name: str
+        :param length: required number of stages
+        :type length: int
+        :param capacity: runs queued at each stage, defaults to 1
+        :type capacity: int, optional
+        :param policy: BLOCK | DROP_OLDEST queue full policy, defaults to BLOCK
+        :type policy: str, optional
+        :param workers: worker threads for every stage or per stage, defaults to 1
+        :type workers: Union[int, Tuple[int, ...]], optional
+        :param key: maps the begin arguments to the request a run belongs to; DROP_OLDEST evicts queued
+            runs of the same request first, defaults to None (every run is the same request)
+        :type key: Optional[Callable[..., Hashable]], optional
+        """
         self._logger = logging.getLogger(__name__)
+        if policy not in (self.BLOCK, self.DROP_OLDEST):
+            raise ValueError("Unknown pipeline policy: {}".format(policy))
         self.name = name
         self.length = length
+        self.capacity = max(1, capacity)
+        self.policy = policy
+        self.workers = workers
+        self.key = key
         # Create an empty list with items of type T
         self.registry: List[Callable[..., Any]] = []
+        self._stages: List[_Stage] = []
+        self._lock = Lock()
+        # runs begun but not yet completed, failed or dropped
+        self._active = 0
+        self._idle = Condition(self._lock)
         self._logger.info("Created pipeline %s", self.name)
 
     def __str__(self) -> str:
@@ -35,39 +149,159 @@ class Pipeline:
         """
         Add a function to a stage in the pipeline at specified index. The return type of the function must
         match the paramspec of the proceeding function and its paramspec must match the return type of the
-        preceeding function.
+        preceeding function. Stages are frozen once the pipeline has begun.
 
         :param callback: pipeline callback
         :type callback: Callable[...,Any]
         :param index: function execution location
         :type index: int
+        :raises PipelineError: if the pipeline has already begun
         """
-        self.registry.insert(index, callback)
+        with self._lock:
+            if self._stages:
+                raise PipelineError("Pipeline {} cannot be staged after it has begun".format(self.name))
+            self.registry.insert(index, callback)
         self._logger.info(
             "Pipeline: {} staged a callback: {} @ index: {}".format(self.name, callback, index))
 
     def begin(self, *pargs, **pkwargs) -> None:
         """
-        Begin pipeline execution with required arguments for the first function in the pipeline.
+        Begin pipeline execution with required arguments for the first function in the pipeline. The run
+        is queued at the first stage and this method returns once it is queued; with the BLOCK policy the
+        caller waits while the first stage queue is full.
+
+        :raises NoListenersError: if no stages are registered
+        :raises PipelineError: if fewer stages than the pipeline length are registered
         """
         self._logger.info("Beginning %s pipeline", self.name)
         if len(self.registry) == 0:
             raise NoListenersError
         elif len(self.registry) < self.length:
             raise PipelineError
-        # iterate through registry callbacks
-        for index, stage in enumerate(self.registry):
+        self._start()
+        with self._lock:
+            self._active += 1
+        key = self.key(*pargs, **pkwargs) if self.key is not None else None
+        self._put(0, (pargs, pkwargs, time.monotonic(), key))
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for every begun run to complete, fail or be dropped
+
+        :param timeout: seconds to wait, defaults to no timeout
+        :type timeout: Optional[float], optional
+        :return: true if the pipeline is idle
+        :rtype: bool
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._active == 0, timeout)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Get per stage counters and timings in seconds. Stages report zeroes until the pipeline has begun.
+
+        :return: stage statistics in stage order
+        :rtype: List[Dict[str, Any]]
+        """
+        with self._lock:
+            if not self._stages:
+                return [
+                    {
+                        'stage': getattr(callback, '__qualname__', str(callback)), 'queued': 0, 'runs': 0,
+                        'failures': 0, 'dropped': 0, 'elapsed': 0.0, 'waited': 0.0, 'last': 0.0,
+                        'slowest': 0.0, 'error': None
+                    } for callback in self.registry
+                ]
+            return [
+                {
+                    'stage': getattr(stage.callback, '__qualname__', str(stage.callback)),
+                    'queued': len(stage.queue),
+                    'runs': stage.runs,
+                    'failures': stage.failures,
+                    'dropped': stage.dropped,
+                    'elapsed': stage.elapsed,
+                    'waited': stage.waited,
+                    'last': stage.last,
+                    'slowest': stage.slowest,
+                    'error': stage.error
+                } for stage in self._stages
+            ]
+
+    def _start(self) -> None:
+        """
+        Freeze the staged callbacks and start the stage workers on first use
+        """
+        if self._stages: return
+        with self._lock:
+            if self._stages: return
+            workers = self.workers
+            stages = []
+            for index, callback in enumerate(self.registry):
+                count = workers if isinstance(workers, int) else workers[min(index, len(workers) - 1)]
+                histogram = metrics.histogram(f'pipeline.{self.name.lower()}.{index}')
+                stages.append(_Stage(callback, self.capacity, max(1, count), histogram))
+            for index, stage in enumerate(stages):
+                for n in range(stage.workers):
+                    thread = Thread(
+                        name=f'{self.name.lower()}-{index}-{n}', target=self._work, args=(stages, index), daemon=True)
+                    thread.start()
+                    stage.threads.append(thread)
+            self._stages = stages
+
+    def _put(self, index: int, run: _Run) -> None:
+        stage = self._stages[index]
+        dropped = stage.queue.put(run, block=self.policy == self.BLOCK)
+        if dropped is not None:
+            self._logger.warning("Pipeline %s dropped a queued run at stage %s", self.name, index)
+            with self._lock:
+                stage.dropped += 1
+            self._finish()
+
+    def _finish(self) -> None:
+        with self._idle:
+            self._active -= 1
+            if not self._active: self._idle.notify_all()
+
+    def _work(self, stages: List[_Stage], index: int) -> None:
+        """
+        Stage worker loop
+        """
+        stage = stages[index]
+        while True:
+            pargs, pkwargs, queued, key = stage.queue.get()
+            start = time.monotonic()
+            error = None
             try:
-                if pargs is None: ret = stage()
+                if pargs is None: ret = stage.callback()
                 # NOTE: accept kwargs for first pipeline for clarity -> until Paramspec arrives in python 3.10
-                elif index == 0: ret = stage(*pargs, **pkwargs)
-                else: ret = stage(*pargs)
+                elif index == 0: ret = stage.callback(*pargs, **pkwargs)
+                else: ret = stage.callback(*pargs)
             except BaseException as exc:
-                # stop pipeline on any unhandled exception
-                self._logger.exception(
-                    "Pipeline halted due to exception encountered during execution:\n{}".format(exc))
-                return
+                error = exc
+            end = time.monotonic()
+            stage.histogram.observe(end - start)
+            with self._lock:
+                stage.runs += 1
+                stage.last = end - start
+                stage.elapsed += end - start
+                stage.waited += start - queued
+                stage.slowest = max(stage.slowest, end - start)
+                if error is not None:
+                    stage.failures += 1
+                    stage.error = repr(error)
+            if error is not None:
+                # stop this run on any unhandled exception
+                self._logger.error(
+                    "Pipeline %s halted at stage %s after %.3f s due to exception encountered during execution:\n%s",
+                    self.name, index, end - start, error, exc_info=error)
+                self._finish()
+                continue
+            self._logger.debug("Pipeline stage %s | %s successful in %.3f s (queued %.3f s)",
+                               stage.callback, index, end - start, start - queued)
+            if index + 1 == len(stages):
+                self._finish()
+                continue
             # construct args from ret
             if ret is None or isinstance(ret, Tuple): pargs = ret
             else: pargs = (ret,)
-            self._logger.info("Pipeline stage %s | %s successful", stage, index)
+            self._put(index + 1, (pargs, {}, time.monotonic(), key))
@@ -3,7 +3,7 @@
 """
 Event Types
 ===========
-Modified: 2021-04
+Modified: 2026-10
 
 Namespace to store the system event types
 
@@ -34,6 +34,7 @@ class Registry:
     system_reboot = Event[Callable[[], None]]('SYSTEM_REBOOT')
     system_shutdown = Event[Callable[[], None]]('SYSTEM_SHUTDOWN')
     mode_switch = Event[Callable[[bool],None]]('MODE_SWITCH')
+    toggle_profiler = Event[Callable[[], None]]('TOGGLE_PROFILER')
     renew_jwt = Event[Callable[[], None]]('RENEW_JWT')
     cache_thumbnail = Event[Callable[[bytes], None]]('CACHE_THUMBNAIL')
     update_progress = Event[Callable[[int], None]]('UDPATE_PROGRESS')
@@ -55,9 +56,10 @@ class Registry:
     op_mode = Event[Callable[[str, Union[float, int]], None]]('OP_MODE')
     fan_duty = Event[Callable[[str, Union[float, int]], None]]('FAN_DUTY')
     co2_calibration = Event[Callable[[], None]]('CO2_CALIBRATION')
-    # pipelines
-    preview_pipeline = Pipeline("PREVIEW", 2)
-    thumbnail_pipeline = Pipeline("THUMBNAIL", 2)
-    avatar_pipeline = Pipeline("AVATAR", 3)
+    # pipelines (previews and refreshes supersede queued requests; captures are never dropped)
+    # a preview supersedes a queued preview of the same channel first, otherwise the oldest queued preview
+    preview_pipeline = Pipeline("PREVIEW", 2, policy=Pipeline.DROP_OLDEST, key=lambda gfp=False: gfp)
+    thumbnail_pipeline = Pipeline("THUMBNAIL", 2, policy=Pipeline.DROP_OLDEST)
+    avatar_pipeline = Pipeline("AVATAR", 3, policy=Pipeline.DROP_OLDEST)
     registration_pipeline = Pipeline("REGISTRATION", 3)
-    capture_pipeline = Pipeline("CAPTURE", 3)
+    capture_pipeline = Pipeline("CAPTURE", 3, capacity=2, policy=Pipeline.BLOCK)
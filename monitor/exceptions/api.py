@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+API Exceptions
+==============
+Modified: 2026-10
+
+Transport exceptions of the asyncio api client. They mirror requests.exceptions (RequestException,
+Timeout and HTTPError) so the async request methods map them to the same outgoing exceptions as
+the blocking api handler.
+
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+
+
+class RequestError(Exception):
+    def __init__(self, msg: str = "The api request could not be completed") -> None:
+        self.message = msg
+
+
+class RequestTimeout(RequestError):
+    def __init__(self, msg: str = "The api request timed out") -> None:
+        self.message = msg
+
+
+class HTTPStatusError(RequestError):
+    def __init__(self, status: int, msg: str = "The api responded with an error status") -> None:
+        self.status = status
+        self.message = msg
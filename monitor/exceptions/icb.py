@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+ICB Exceptions
+==============
+Modified: 2026-10
+
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+
+
+class SensorframeError(Exception):
+    def __init__(self, msg: str = "The ICB sent a malformed sensorframe") -> None:
+        self.message = msg
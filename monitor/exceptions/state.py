@@ -13,3 +13,8 @@ Proprietary and confidential
 class StateError(Exception):
     def __init__(self, msg: str = "The system state gave an unexpected result") -> None:
         self.message = msg
+
+
+class FrozenStateError(StateError):
+    def __init__(self, msg: str = "Committed state snapshots are immutable") -> None:
+        self.message = msg
@@ -3,16 +3,17 @@
 """
 Capture
 =======
-Modified: 2020-10
+Modified: 2026-10
 
 The purpose of this class is to encapsulate the large image capture data inside an object that can be represented with a
 minimal __repr__. In addition it houses the capture conversions required for posting to our api.
+Encoded images are returned as a view of the buffer they were encoded into so they reach the upload
+request body without further copies.
 
 Dependencies:
 -------------
 ```
 import os
-import sys
 import logging
 from typing import List
 import numpy as np
@@ -24,7 +25,6 @@ Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
 import os
-import sys
 import logging
 from typing import List
 import numpy as np
@@ -45,7 +45,7 @@ class Capture:
     def get_raw(self, index: int):
         return self.captures[index]
 
-    def get_processed(self, index: int) -> bytes:
+    def get_processed(self, index: int) -> memoryview:
         if index != 4:
             # processing dpc images
             converted_capture = self.captures[index]
@@ -59,7 +59,7 @@ class Capture:
             converted_capture = self.captures[index].astype(np.uint8)
         self._logger.debug("Capture Size: %s", np.shape(converted_capture))
         to_return = Capture.nparray_to_png(converted_capture)
-        self._logger.debug("File size: %s", sys.getsizeof(to_return) / 1024. / 1024.)
+        self._logger.debug("File size: %s", to_return.nbytes / 1024. / 1024.)
         return to_return
 
     def background_normalize(self, capture: np.ndarray, bg_fname: str) -> np.ndarray:
@@ -86,15 +86,17 @@ class Capture:
         return img[starty:starty + int(cropy), startx:startx + int(cropx), :]
 
     @staticmethod
-    def nparray_to_png(nparray):
+    def nparray_to_png(nparray) -> memoryview:
         """
         nparray has to be of shape (w, h,1)
+
+        :return: view of the encoded png; it keeps the encoding buffer alive instead of copying it
+        :rtype: memoryview
         """
         # need to swap width and height #(1920, 2560,1)
         old_shape = np.shape(nparray)
         nparray = np.reshape(nparray, (old_shape[0], old_shape[1]))
-        with BytesIO() as bytestream:
-            image = Image.fromarray(nparray)
-            image.save(bytestream, format='png', lossless=True)
-            image_bytes = bytestream.getvalue()
-        return image_bytes
+        bytestream = BytesIO()
+        image = Image.fromarray(nparray)
+        image.save(bytestream, format='png', lossless=True)
+        return bytestream.getbuffer()
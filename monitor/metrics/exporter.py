@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Metrics Exporter
+================
+Modified: 2026-10
+
+Periodically snapshots the metrics registry and exports it as json lines to a size rotated file under
+MONITOR_LOGS and, when an AMQP client is available, on the telemetry route.
+
+Dependancies
+------------
+```
+import os
+import json
+import logging
+from logging.handlers import RotatingFileHandler
+from threading import Event, Thread
+from typing import Any, Dict, Optional
+from monitor.metrics.registry import MetricsRegistry as metrics
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import os
+import json
+import logging
+from logging.handlers import RotatingFileHandler
+from threading import Event, Thread
+from typing import Any, Dict, Optional
+from monitor.metrics.registry import MetricsRegistry as metrics
+
+
+class MetricsExporter:
+
+    # seconds between exports
+    INTERVAL = float(os.environ.get('MONITOR_METRICS_INTERVAL', default=60))
+    # export file rotation
+    MAX_BYTES = 1000000
+    BACKUPS = 3
+
+    def __init__(self, path: Optional[str] = None, client: Any = None) -> None:
+        """
+        :param path: json lines export file, defaults to MONITOR_LOGS/metrics.jsonl
+        :type path: Optional[str], optional
+        :param client: amqp client used to publish snapshots, defaults to None (not published)
+        :type client: Optional[AMQPClient], optional
+        """
+        self._logger = logging.getLogger(__name__)
+        if path is None:
+            path = os.environ.get('MONITOR_LOGS', default='/etc/iris/logs') + '/metrics.jsonl'
+        self.path = path
+        self.client = client
+        self._handler: Optional[RotatingFileHandler] = None
+        self._stop = Event()
+
+    def export(self) -> Dict[str, Any]:
+        """
+        Take a snapshot and export it to the file and amqp. Export failures are logged and do not
+        prevent the other export.
+
+        :return: exported snapshot
+        :rtype: Dict[str, Any]
+        """
+        snapshot = metrics.snapshot()
+        snapshot['type'] = 'metrics'
+        try:
+            self._write(snapshot)
+        except (OSError, TypeError, ValueError) as exc:
+            self._logger.warning("Metrics file export failed: %s", exc)
+        if self.client is not None:
+            try:
+                self.client.publish(snapshot)
+            except Exception as exc:
+                self._logger.warning("Metrics amqp export failed: %s", exc)
+        return snapshot
+
+    def _write(self, snapshot: Dict[str, Any]) -> None:
+        if self._handler is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._handler = RotatingFileHandler(self.path, maxBytes=self.MAX_BYTES, backupCount=self.BACKUPS)
+        line = json.dumps(snapshot, separators=(',', ':'), default=str)
+        self._handler.emit(logging.makeLogRecord({'msg': line, 'levelno': logging.INFO}))
+
+    def close(self) -> None:
+        """
+        Close the export file
+        """
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+
+    def start(self, interval: float = INTERVAL) -> Thread:
+        """
+        Export periodically from a daemon thread
+
+        :param interval: seconds between exports, defaults to INTERVAL
+        :type interval: float, optional
+        :return: exporter thread
+        :rtype: Thread
+        """
+        self._stop.clear()
+        exporter = Thread(name='metrics', target=self._run, args=(interval,), daemon=True)
+        exporter.start()
+        self._logger.info("Exporting metrics every %s s to %s", interval, self.path)
+        return exporter
+
+    def stop(self) -> None:
+        """
+        Stop the periodic exporter
+        """
+        self._stop.set()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.export()
+        self.close()
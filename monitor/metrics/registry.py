@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Metrics Registry
+================
+Modified: 2026-10
+
+Lightweight in-process metrics: monotonic counters, gauges and fixed bucket histograms. Metrics are
+created once (typically at module or class scope) and updated on hot paths with a single
+uncontended lock acquisition; no allocation happens per update. A snapshot copies every metric under
+its own lock so each reported value (e.g. histogram buckets, count and sum) is self consistent.
+
+Dependancies
+------------
+```
+import time
+import logging
+from bisect import bisect_left
+from threading import Lock
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import time
+import logging
+from bisect import bisect_left
+from threading import Lock
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class Counter:
+    """
+    Monotonically increasing count
+    """
+    __slots__ = ('name', 'value', '_lock')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.value = 0
+        self._lock = Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> int:
+        return self.value
+
+
+class Gauge:
+    """
+    Point in time value. A gauge created with a function samples it at snapshot time instead (e.g. queue
+    depths) so nothing is recorded on the hot path.
+    """
+    __slots__ = ('name', 'value', 'fn', '_lock')
+
+    def __init__(self, name: str, fn: Optional[Callable[[], float]] = None) -> None:
+        self.name = name
+        self.value = 0.0
+        self.fn = fn
+        self._lock = Lock()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def snapshot(self) -> float:
+        if self.fn is None: return self.value
+        try:
+            return self.fn()
+        except Exception:
+            return float('nan')
+
+
+class Histogram:
+    """
+    Distribution of observations over fixed upper bounds. Bucket counts are not cumulative; the
+    trailing bucket counts observations above the largest bound.
+    """
+    __slots__ = ('name', 'bounds', 'counts', 'count', 'total', 'max', '_lock')
+
+    # default bounds for latencies in seconds
+    LATENCY: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, name: str, bounds: Tuple[float, ...] = LATENCY) -> None:
+        self.name = name
+        self.bounds = tuple(sorted(bounds))
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max: self.max = value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """
+        Observe the wall time of the managed block in seconds (including blocks that raise)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile as the upper bound of the bucket containing it
+
+        :param q: quantile in [0, 1]
+        :type q: float
+        :return: bucket upper bound (the observed max for the overflow bucket)
+        :rtype: float
+        """
+        with self._lock:
+            counts, count, high = list(self.counts), self.count, self.max
+        if not count: return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket in enumerate(counts):
+            seen += bucket
+            if seen >= rank and bucket:
+                return self.bounds[index] if index < len(self.bounds) else high
+        return high
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts, count, total, high = list(self.counts), self.count, self.total, self.max
+        return {
+            'bounds': list(self.bounds),
+            'counts': counts,
+            'count': count,
+            'sum': total,
+            'max': high
+        }
+
+
+class MetricsRegistry:
+    """
+    Process wide metrics namespace. Metrics are get-or-create by name so modules can declare the
+    metrics they update independently.
+    """
+    _logger = logging.getLogger(__name__)
+    _lock = Lock()
+    _counters: Dict[str, Counter] = {}
+    _gauges: Dict[str, Gauge] = {}
+    _histograms: Dict[str, Histogram] = {}
+    _collectors: Dict[str, Callable[[], Any]] = {}
+
+    @classmethod
+    def counter(cls, name: str) -> Counter:
+        """
+        Get or create a counter
+
+        :param name: dotted metric name
+        :type name: str
+        :return: counter
+        :rtype: Counter
+        """
+        metric = cls._counters.get(name)
+        if metric is None:
+            with cls._lock:
+                metric = cls._counters.setdefault(name, Counter(name))
+        return metric
+
+    @classmethod
+    def gauge(cls, name: str, fn: Optional[Callable[[], float]] = None) -> Gauge:
+        """
+        Get or create a gauge
+
+        :param name: dotted metric name
+        :type name: str
+        :param fn: sampling function evaluated at snapshot time, defaults to None
+        :type fn: Optional[Callable[[], float]], optional
+        :return: gauge
+        :rtype: Gauge
+        """
+        metric = cls._gauges.get(name)
+        if metric is None:
+            with cls._lock:
+                metric = cls._gauges.setdefault(name, Gauge(name, fn))
+        return metric
+
+    @classmethod
+    def histogram(cls, name: str, bounds: Tuple[float, ...] = Histogram.LATENCY) -> Histogram:
+        """
+        Get or create a histogram. The bounds of an existing histogram are kept.
+
+        :param name: dotted metric name
+        :type name: str
+        :param bounds: bucket upper bounds, defaults to latency bounds in seconds
+        :type bounds: Tuple[float, ...], optional
+        :return: histogram
+        :rtype: Histogram
+        """
+        metric = cls._histograms.get(name)
+        if metric is None:
+            with cls._lock:
+                metric = cls._histograms.setdefault(name, Histogram(name, bounds))
+        return metric
+
+    @classmethod
+    def collector(cls, name: str, fn: Callable[[], Any]) -> None:
+        """
+        Register a function whose json serializable result is included in every snapshot. Used for
+        subsystems which already keep their own statistics.
+
+        :param name: snapshot key
+        :type name: str
+        :param fn: collector
+        :type fn: Callable[[], Any]
+        """
+        with cls._lock:
+            cls._collectors[name] = fn
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Any]:
+        """
+        Copy the current value of every metric and run the collectors
+
+        :return: metrics keyed by type and name
+        :rtype: Dict[str, Any]
+        """
+        with cls._lock:
+            counters = list(cls._counters.values())
+            gauges = list(cls._gauges.values())
+            histograms = list(cls._histograms.values())
+            collectors = list(cls._collectors.items())
+        collected: Dict[str, Any] = {}
+        for name, fn in collectors:
+            try:
+                collected[name] = fn()
+            except Exception as exc:
+                cls._logger.warning("Metrics collector %s failed: %s", name, exc)
+        return {
+            'timestamp': time.time(),
+            'counters': {metric.name: metric.snapshot() for metric in counters},
+            'gauges': {metric.name: metric.snapshot() for metric in gauges},
+            'histograms': {metric.name: metric.snapshot() for metric in histograms},
+            'collectors': collected
+        }
+
+    @classmethod
+    def names(cls) -> List[str]:
+        """
+        Get the names of every registered metric
+
+        :return: metric names
+        :rtype: List[str]
+        """
+        with cls._lock:
+            return sorted([*cls._counters, *cls._gauges, *cls._histograms])
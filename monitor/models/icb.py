@@ -12,12 +12,16 @@ Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
 
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Set, Tuple
 from datetime import datetime, timezone
 from uuid import uuid4
 from monitor.logs.formatter import pformat
 from monitor.models.state import StateModel
 
+# sentinel for readings which have not been set
+_UNSET = object()
+
+
 class ICB(StateModel):
     """
     This model is initialized to a default state but populated after sensorframe state is modified
@@ -33,30 +37,37 @@ class ICB(StateModel):
     CP_DEFAULT: float = 5.0                                         # Default co2 setpoint
     FP_DEFAULT: int = 20                                            # Default fan speed duty
     HP_DEFAULT: int = 10                                            # Default heater duty
+    # sensorframe readings are stored in slots with a single bitmask tracking which have been set
+    __slots__ = ('_mask', '_tc', '_rh', '_oc', '_cc', '_tp', '_to', '_cp', '_op', '_hp', '_fp', '_fc', '_ctr',
+                 '_tm', '_cm', '_om', '_iv', '_ct', '_timestamp')
+    FIELDS: Tuple[str, ...] = tuple(name[1:] for name in __slots__[1:])
+    # initialization bits
+    TC_SET = 1 << 0
+    RH_SET = 1 << 1
+    OC_SET = 1 << 2
+    CC_SET = 1 << 3
+    TP_SET = 1 << 4
+    TO_SET = 1 << 5
+    CP_SET = 1 << 6
+    OP_SET = 1 << 7
+    HP_SET = 1 << 8
+    FP_SET = 1 << 9
+    FC_SET = 1 << 10
+    CTR_SET = 1 << 11
+    TM_SET = 1 << 12
+    CM_SET = 1 << 13
+    OM_SET = 1 << 14
+    IV_SET = 1 << 15
+    CT_SET = 1 << 16
+    TIMESTAMP_SET = 1 << 17
+    INITIALIZED = (1 << 18) - 1
 
     def __init__(self) -> None:
         super().__init__(
             _id='',
             filename='icb.json'
         )
-        self._tc_set = False
-        self._rh_set = False
-        self._oc_set = False
-        self._cc_set = False
-        self._tp_set = False
-        self._to_set = False
-        self._cp_set = False
-        self._op_set = False
-        self._hp_set = False
-        self._fp_set = False
-        self._fc_set = False
-        self._ctr_set = False
-        self._tm_set = False
-        self._cm_set = False
-        self._om_set = False
-        self._iv_set = False
-        self._ct_set = False
-        self._timestamp_set = False
+        self._mask = 0
 
     def __repr__(self) -> str:
         return "ICB: {}".format(pformat(self.serialize()))
@@ -97,6 +108,31 @@ class ICB(StateModel):
         for k, v in kwargs.items():
             setattr(self, k, v)
 
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'ICB':
+        # all readings are immutable scalars so a slot-wise shallow copy is a deep copy
+        clone = ICB.__new__(ICB)
+        clone.__dict__.update(self.__dict__)
+        for name in self.__slots__:
+            value = getattr(self, name, _UNSET)
+            if value is not _UNSET: object.__setattr__(clone, name, value)
+        return clone
+
+    def diff(self, other: StateModel) -> Set[str]:
+        """
+        Get the names of the readings whose values differ between this model and another
+
+        :param other: icb model to compare against
+        :type other: StateModel
+        :return: changed field names
+        :rtype: Set[str]
+        """
+        changed = super().diff(other)
+        if other is self: return changed
+        for name in self.FIELDS:
+            if getattr(self, '_' + name, None) != getattr(other, '_' + name, None):
+                changed.add(name)
+        return changed
+
     @property
     def initialized(self) -> bool:
         """
@@ -105,28 +141,7 @@ class ICB(StateModel):
         :return: sensorframe init status
         :rtype: bool
         """
-        return all(
-            [
-                self._tc_set,
-                self._rh_set,
-                self._oc_set,
-                self._cc_set,
-                self._tp_set,
-                self._to_set,
-                self._cp_set,
-                self._op_set,
-                self._hp_set,
-                self._fp_set,
-                self._fc_set,
-                self._ctr_set,
-                self._tm_set,
-                self._cm_set,
-                self._om_set,
-                self._iv_set,
-                self._ct_set,
-                self._timestamp_set,
-            ]
-        )
+        return self._mask == self.INITIALIZED
 
     @property
     def tc(self) -> float:
@@ -136,7 +151,7 @@ class ICB(StateModel):
         :return: temperature in °C
         :rtype: float
         """
-        return self.__tc
+        return self._tc
 
     @tc.setter
     def tc(self, value: float) -> None:
@@ -149,8 +164,8 @@ class ICB(StateModel):
         candidate = round(value, self.STORAGE_RESOLUTION)
         # range validation
         if self.OPERATING_TEMPERATURE[0] <= candidate <= self.OPERATING_TEMPERATURE[1]:
-            self.__tc = candidate
-            self._tc_set = True
+            self._tc = candidate
+            self._mask |= self.TC_SET
 
     @property
     def rh(self) -> float:
@@ -160,7 +175,7 @@ class ICB(StateModel):
         :return: current relative humidity concentration in %
         :rtype: float
         """
-        return self.__rh
+        return self._rh
 
     @rh.setter
     def rh(self, value: float) -> None:
@@ -173,8 +188,8 @@ class ICB(StateModel):
         candidate = round(value, self.STORAGE_RESOLUTION)
         # range validation
         if 0.0 <= candidate <= 100.0:
-            self.__rh = candidate
-            self._rh_set = True
+            self._rh = candidate
+            self._mask |= self.RH_SET
 
     @property
     def oc(self) -> float:
@@ -184,7 +199,7 @@ class ICB(StateModel):
         :return: current o2 concentration in %
         :rtype: float
         """
-        return self.__oc
+        return self._oc
 
     @oc.setter
     def oc(self, value: float) -> None:
@@ -197,8 +212,8 @@ class ICB(StateModel):
         candidate = round(value, self.STORAGE_RESOLUTION)
         # range validation
         if 0.0 <= candidate <= 100.0:
-            self.__oc = candidate
-            self._oc_set = True
+            self._oc = candidate
+            self._mask |= self.OC_SET
 
     @property
     def cc(self) -> float:
@@ -208,7 +223,7 @@ class ICB(StateModel):
         :return: co2 concentration in %
         :rtype: float
         """
-        return self.__cc
+        return self._cc
 
     @cc.setter
     def cc(self, value: float) -> None:
@@ -221,8 +236,8 @@ class ICB(StateModel):
         candidate = round(value, self.STORAGE_RESOLUTION)
         # range validation
         if 0.0 <= candidate <= 100.0:
-            self.__cc = candidate
-            self._cc_set = True
+            self._cc = candidate
+            self._mask |= self.CC_SET
 
     @property
     def tp(self) -> float:
@@ -232,7 +247,7 @@ class ICB(StateModel):
         :return: temperature setpoint in °C
         :rtype: float
         """
-        return self.__tp
+        return self._tp
 
     @tp.setter
     def tp(self, value: float) -> None:
@@ -245,8 +260,8 @@ class ICB(StateModel):
         candidate = round(value, self.STORAGE_RESOLUTION)
         # range validation
         if self.TP_RANGE[0] <= candidate <= self.TP_RANGE[1]:
-            self.__tp = candidate
-            self._tp_set = True
+            self._tp = candidate
+            self._mask |= self.TP_SET
 
     @property
     def to(self) -> float:
@@ -256,7 +271,7 @@ class ICB(StateModel):
         :return: temperature offset in °C
         :rtype: float
         """
-        return self.__to
+        return self._to
 
     @to.setter
     def to(self, value: float) -> None:
@@ -267,8 +282,8 @@ class ICB(StateModel):
         :type value: float
         """
         candidate = round(value, self.STORAGE_RESOLUTION)
-        self.__to = candidate
-        self._to_set = True
+        self._to = candidate
+        self._mask |= self.TO_SET
 
     @property
     def cp(self) -> float:
@@ -278,7 +293,7 @@ class ICB(StateModel):
         :return: CO2 concentration setpoint as %
         :rtype: float
         """
-        return self.__cp
+        return self._cp
 
     @cp.setter
     def cp(self, value: float) -> None:
@@ -291,8 +306,8 @@ class ICB(StateModel):
         candidate = round(value, self.STORAGE_RESOLUTION)
         # range validation
         if self.CP_RANGE[0] <= candidate <= self.CP_RANGE[1]:
-            self.__cp = candidate
-            self._cp_set = True
+            self._cp = candidate
+            self._mask |= self.CP_SET
 
     @property
     def op(self) -> float:
@@ -302,7 +317,7 @@ class ICB(StateModel):
         :return: O2 concentration setpoint as %
         :rtype: float
         """
-        return self.__op
+        return self._op
 
     @op.setter
     def op(self, value: float) -> None:
@@ -315,8 +330,8 @@ class ICB(StateModel):
         candidate = round(value, self.STORAGE_RESOLUTION)
         # range validation
         if self.OP_RANGE[0] <= candidate <= self.OP_RANGE[1]:
-            self.__op = candidate
-            self._op_set = True
+            self._op = candidate
+            self._mask |= self.OP_SET
 
     @property
     def hp(self) -> int:
@@ -326,7 +341,7 @@ class ICB(StateModel):
         :return: heater duty cycle in percent
         :rtype: int
         """
-        return self.__hp
+        return self._hp
 
     @hp.setter
     def hp(self, hp: int) -> None:
@@ -337,8 +352,8 @@ class ICB(StateModel):
         :type hp: int
         """
         if 0 <= hp <= 100:
-            self.__hp = hp
-            self._hp_set = True
+            self._hp = hp
+            self._mask |= self.HP_SET
 
     @property
     def fp(self) -> int:
@@ -348,7 +363,7 @@ class ICB(StateModel):
         :return: fan duty cycle in percent
         :rtype: int
         """
-        return self.__fp
+        return self._fp
 
     @fp.setter
     def fp(self, fp: int) -> None:
@@ -359,8 +374,8 @@ class ICB(StateModel):
         :type fp: int
         """
         if 0 <= fp <= 100:
-            self.__fp = fp
-            self._fp_set = True
+            self._fp = fp
+            self._mask |= self.FP_SET
 
     @property
     def fc(self) -> int:
@@ -370,7 +385,7 @@ class ICB(StateModel):
         :return: current fan speed in rpm
         :rtype: float
         """
-        return self.__fc
+        return self._fc
 
     @fc.setter
     def fc(self, fc: int) -> None:
@@ -381,8 +396,8 @@ class ICB(StateModel):
         :type fc: int
         """
         if 0 <= fc:
-            self.__fc = fc
-            self._fc_set = True
+            self._fc = fc
+            self._mask |= self.FC_SET
 
     @property
     def ctr(self) -> float:
@@ -392,7 +407,7 @@ class ICB(StateModel):
         :return: COZIR temperature reading in °C
         :rtype: float
         """
-        return self.__ctr
+        return self._ctr
 
     @ctr.setter
     def ctr(self, ctr: float) -> None:
@@ -404,8 +419,8 @@ class ICB(StateModel):
         """
         candidate = round(ctr, 1)
         if self.OPERATING_TEMPERATURE[0] <= candidate <= self.OPERATING_TEMPERATURE[1]:
-            self.__ctr = ctr
-            self._ctr_set = True
+            self._ctr = ctr
+            self._mask |= self.CTR_SET
 
     @property
     def tm(self) -> int:
@@ -415,7 +430,7 @@ class ICB(StateModel):
         :return: temperature controller mode (0 -> off 1 -> read-only 2 -> active)
         :rtype: int
         """
-        return self.__tm
+        return self._tm
 
     @tm.setter
     def tm(self, tm: int) -> None:
@@ -426,8 +441,8 @@ class ICB(StateModel):
         :type tm: int
         """
         if tm in [0, 1, 2]:
-            self.__tm = tm
-            self._tm_set = True
+            self._tm = tm
+            self._mask |= self.TM_SET
 
     @property
     def cm(self) -> int:
@@ -437,7 +452,7 @@ class ICB(StateModel):
         :return: CO2 controller mode (0 -> off 1 -> read-only 2 -> active)
         :rtype: int
         """
-        return self.__cm
+        return self._cm
 
     @cm.setter
     def cm(self, cm: int) -> None:
@@ -448,8 +463,8 @@ class ICB(StateModel):
         :type cm: int
         """
         if cm in [0, 1, 2]:
-            self.__cm = cm
-            self._cm_set = True
+            self._cm = cm
+            self._mask |= self.CM_SET
 
     @property
     def om(self) -> int:
@@ -459,7 +474,7 @@ class ICB(StateModel):
         :return: o2 controller mode
         :rtype: int
         """
-        return self.__om
+        return self._om
 
     @om.setter
     def om(self, om: int) -> None:
@@ -470,8 +485,8 @@ class ICB(StateModel):
         :type om: int
         """
         if om in [0, 1, 2]:
-            self.__om = om
-            self._om_set = True
+            self._om = om
+            self._mask |= self.OM_SET
 
     @property
     def iv(self) -> str:
@@ -481,7 +496,7 @@ class ICB(StateModel):
         :return: icb git sha
         :rtype: str
         """
-        return self.__iv
+        return self._iv
 
     @iv.setter
     def iv(self, version: str) -> None:
@@ -491,8 +506,8 @@ class ICB(StateModel):
         :param version: icb git sha
         :type version: str
         """
-        self.__iv = version
-        self._iv_set = True
+        self._iv = version
+        self._mask |= self.IV_SET
 
     @property
     def timestamp(self) -> str:
@@ -502,7 +517,7 @@ class ICB(StateModel):
         :return: timestamp of previous sensorframe reading in iso format
         :rtype: str
         """
-        return self.__timestamp
+        return self._timestamp
 
     @timestamp.setter
     def timestamp(self, timestamp: str) -> None:
@@ -512,15 +527,15 @@ class ICB(StateModel):
         :param timestamp: timestamp of sensorframe reading in iso format
         :type timestamp: str
         """
-        self.__timestamp = timestamp
-        self._timestamp_set = True
+        self._timestamp = timestamp
+        self._mask |= self.TIMESTAMP_SET
 
     @property
     def ct(self) -> str:
         """
         Get last co2 sensor calibration time as ISO timestamp
         """
-        return self.__ct
+        return self._ct
 
     @ct.setter
     def ct(self, ct: str) -> None:
@@ -530,8 +545,8 @@ class ICB(StateModel):
         :param ct: calibration time in utc iso format
         :type ct: str
         """
-        self.__ct = ct
-        self._ct_set = True
+        self._ct = ct
+        self._mask |= self.CT_SET
 
     def int_to_float(self, val: int) -> float:
         """
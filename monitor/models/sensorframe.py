@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Sensorframe Parser
+==================
+Modified: 2026-10
+
+Streaming parser for ICB sensorframe lines of the form `173~1bfa167e$&IV|3407285&TM|2&TP|3660&...\r`.
+Frames are scanned in place over the serial read buffer (bytes, bytearray or memoryview) and written
+straight into the ICB model slots in a single pass with setpoint scaling and range validation
+applied as each field is read.
+
+Dependancies
+------------
+```
+import os
+import re
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from monitor.models.icb import ICB
+from monitor.exceptions.icb import SensorframeError
+from monitor.exceptions.state import FrozenStateError
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import os
+import re
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from monitor.models.icb import ICB
+from monitor.exceptions.icb import SensorframeError
+from monitor.exceptions.state import FrozenStateError
+
+Buffer = Union[bytes, bytearray, memoryview]
+# (slot, init bit, conversion, validation range)
+FieldSpec = Tuple[Any, int, Callable[[bytes], Any], Optional[Tuple[float, float]]]
+
+# a single &KEY|value field, scanned in place over the frame buffer
+_FIELD = re.compile(rb'&([A-Z0-9]+)\|([^&]*)')
+_CR = ord('\r')
+_LF = ord('\n')
+_SCALE = 10 ** ICB.CONVERSION_RESOLUTION
+_MASK = ICB._mask
+_TIMESTAMP = ICB._timestamp
+
+
+def _scaled(raw: bytes) -> float:
+    return round(int(raw) / _SCALE, ICB.STORAGE_RESOLUTION)
+
+
+def _rounded(raw: bytes) -> float:
+    return round(float(raw), ICB.STORAGE_RESOLUTION)
+
+
+def _text(raw: bytes) -> str:
+    return raw.decode()
+
+
+@lru_cache(maxsize=4)
+def _calibration(raw: bytes) -> str:
+    # calibration time only changes on co2 calibration so conversions are cached
+    return ICB.calibration_time_to_iso(int(raw))
+
+
+def _field(slot: str, bit: int, convert: Callable[[bytes], Any],
+           bounds: Optional[Tuple[float, float]] = None) -> FieldSpec:
+    # slot member descriptors write the storage directly, bypassing the per-key property setters
+    return getattr(ICB, slot), bit, convert, bounds
+
+
+class SensorframeParser:
+
+    # frame prefix identifying the control board
+    PREFIX = os.environ.get('MONITOR_ICB_PREFIX', default='173~1bfa167e$').encode()
+    MAX_BUFFER = 4096           # unterminated bytes retained before the stream is resynchronized
+    # sensorframe key -> (slot, init bit, conversion, validation range); unlisted keys are ignored
+    FIELDS: Dict[bytes, FieldSpec] = {
+        b'TC': _field('_tc', ICB.TC_SET, _scaled, ICB.OPERATING_TEMPERATURE),
+        b'RH': _field('_rh', ICB.RH_SET, _rounded, (0.0, 100.0)),
+        b'OC': _field('_oc', ICB.OC_SET, _scaled, (0.0, 100.0)),
+        b'CC': _field('_cc', ICB.CC_SET, _scaled, (0.0, 100.0)),
+        b'TP': _field('_tp', ICB.TP_SET, _scaled, ICB.TP_RANGE),
+        b'TO': _field('_to', ICB.TO_SET, _rounded),
+        b'CP': _field('_cp', ICB.CP_SET, _scaled, ICB.CP_RANGE),
+        b'OP': _field('_op', ICB.OP_SET, _scaled, ICB.OP_RANGE),
+        b'HP': _field('_hp', ICB.HP_SET, int, (0, 100)),
+        b'FP': _field('_fp', ICB.FP_SET, int, (0, 100)),
+        b'FC': _field('_fc', ICB.FC_SET, int, (0, float('inf'))),
+        b'CTR': _field('_ctr', ICB.CTR_SET, float, ICB.OPERATING_TEMPERATURE),
+        b'TM': _field('_tm', ICB.TM_SET, int, (0, 2)),
+        b'CM': _field('_cm', ICB.CM_SET, int, (0, 2)),
+        b'OM': _field('_om', ICB.OM_SET, int, (0, 2)),
+        b'IV': _field('_iv', ICB.IV_SET, _text),
+        b'CT': _field('_ct', ICB.CT_SET, _calibration),
+    }
+
+    def __init__(self, prefix: bytes = PREFIX) -> None:
+        self._logger = logging.getLogger(__name__)
+        self.prefix = prefix
+        self.rejected = 0
+        self._buffer = bytearray()
+        self._template = ICB()
+
+    def feed(self, data: Buffer) -> List[ICB]:
+        """
+        Append bytes read from the serial port and parse every completed frame. Malformed frames
+        are dropped and counted.
+
+        :param data: bytes read from the serial port
+        :type data: Buffer
+        :return: icb models for each valid frame completed by this read
+        :rtype: List[ICB]
+        """
+        buffer = self._buffer
+        buffer += data
+        frames: List[ICB] = []
+        start = 0
+        end = buffer.find(b'\r')
+        while end != -1:
+            try:
+                frames.append(self._parse(buffer, start, end, self._template.edit()))
+            except SensorframeError as exc:
+                self.rejected += 1
+                self._logger.warning("Rejected sensorframe: %s", exc.message)
+            start = end + 1
+            # tolerate \r\n terminated lines
+            if start < len(buffer) and buffer[start] == _LF: start += 1
+            end = buffer.find(b'\r', start)
+        if start: del buffer[:start]
+        if len(buffer) > self.MAX_BUFFER:
+            self._logger.warning("Discarding %s unterminated sensorframe bytes", len(buffer))
+            self.rejected += 1
+            buffer.clear()
+        return frames
+
+    def parse(self, frame: Buffer, icb: Optional[ICB] = None) -> ICB:
+        """
+        Parse a single terminated sensorframe line
+
+        :param frame: sensorframe line including its prefix and \\r terminator
+        :type frame: Buffer
+        :param icb: editable icb model to populate, defaults to a new model
+        :type icb: Optional[ICB]
+        :raises SensorframeError: if the frame is malformed
+        :raises FrozenStateError: if the target model is a committed snapshot
+        :return: populated icb model
+        :rtype: ICB
+        """
+        if icb is None: icb = self._template.edit()
+        elif icb.frozen: raise FrozenStateError
+        end = len(frame) - 1
+        if end >= 0 and frame[end] == _LF: end -= 1
+        if end < 0 or frame[end] != _CR:
+            raise SensorframeError("Sensorframe is not terminated")
+        return self._parse(frame, 0, end, icb)
+
+    def _parse(self, buf: Buffer, start: int, end: int, icb: ICB) -> ICB:
+        """
+        Parse the frame in buf[start:end] (excluding the terminator) into the icb model. Frames with a
+        foreign prefix are rejected before any field is read and field errors abort immediately. Values
+        are collected first and only written to the model once the whole frame is valid.
+
+        :raises SensorframeError: if the frame is malformed
+        """
+        pos = start + len(self.prefix)
+        if pos > end or buf[start:pos] != self.prefix:
+            raise SensorframeError("Sensorframe prefix mismatch")
+        fields = self.FIELDS
+        values: List[Tuple[Any, Any]] = []
+        mask = 0
+        for match in _FIELD.finditer(buf, pos, end):
+            if match.start() != pos:
+                raise SensorframeError("Unexpected bytes at offset {}".format(pos - start))
+            pos = match.end()
+            spec = fields.get(match.group(1))
+            if spec is None: continue
+            slot, bit, convert, bounds = spec
+            try:
+                value = convert(match.group(2))
+            except ValueError:
+                raise SensorframeError("Invalid {} value at offset {}".format(
+                    match.group(1).decode(), match.start(2) - start)) from None
+            # out of range readings are dropped as in the model setters
+            if bounds is None or bounds[0] <= value <= bounds[1]:
+                values.append((slot, value))
+                mask |= bit
+        if pos != end:
+            raise SensorframeError("Unexpected bytes at offset {}".format(pos - start))
+        for slot, value in values:
+            slot.__set__(icb, value)
+        _TIMESTAMP.__set__(icb, ICB.generate_timestamp())
+        _MASK.__set__(icb, icb._mask | mask | ICB.TIMESTAMP_SET)
+        return icb
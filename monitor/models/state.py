@@ -13,29 +13,104 @@ Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
 import os
+import copy
 import json
 import logging
 from json import JSONDecodeError
-from typing import Any, Dict, Union
+from typing import Any, Dict, Set, TypeVar, Union
 from abc import ABC, abstractmethod
 
+from monitor.exceptions.state import FrozenStateError
+
 _PKey = Union[int, str]
+# generic state model type
+_M = TypeVar('_M', bound='StateModel')
+# instance attributes which are not part of the model state
+_UNTRACKED = frozenset(('_logger', '_frozen', 'cache_path'))
+# sentinel for attributes which have not been set
+_MISSING = object()
 
 class StateModel(ABC):
 
+    # shared by all instances so construction and copies skip logger lookups
+    _logger = logging.getLogger(__name__)
+    # cache filenames and lazily resolved cache paths per model class
+    _filenames: Dict[type, str] = {}
+    _paths: Dict[type, str] = {}
+    # cache directories known to exist
+    _directories: Set[str] = set()
+
     def __init__(self, _id:_PKey, filename:str) -> None:
-        self._logger = logging.getLogger(__name__)
         self.id = _id
-        cache_base_path = os.environ.get('MONITOR_CACHE', default='/etc/iris/cache')
-        os.makedirs(cache_base_path, mode=0o777, exist_ok=True)
-        self.cache_path = f'{cache_base_path}/{filename}'
-        self._logger.info("Created state model with cache path: %s", self.cache_path)
+        # no filesystem or environment access: the cache path is resolved at first use
+        if type(self) not in StateModel._filenames: StateModel._filenames[type(self)] = filename
 
     def __eq__(self, o:object) -> bool:
         if hasattr(o, 'id') and hasattr(self, 'id'):
             return o.id == self.id  # type: ignore
         return False
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        # committed snapshots are shared between readers and must never be modified in place
+        if self.__dict__.get('_frozen', False):
+            raise FrozenStateError(f"Cannot set {name} on a committed {type(self).__name__} snapshot")
+        super().__setattr__(name, value)
+
+    @property
+    def frozen(self) -> bool:
+        """
+        Get state model frozen flag. Frozen models are committed snapshots shared by all readers.
+
+        :return: frozen flag
+        :rtype: bool
+        """
+        return self.__dict__.get('_frozen', False)
+
+    def snapshot(self: _M) -> _M:
+        """
+        Get an immutable snapshot of this state model. Frozen models are returned as is.
+
+        :return: frozen state model
+        :rtype: _M
+        """
+        if self.frozen: return self
+        snapshot = copy.deepcopy(self)
+        snapshot.__dict__['_frozen'] = True
+        return snapshot
+
+    def edit(self: _M) -> _M:
+        """
+        Get a mutable copy of this state model for staging changes ahead of a commit
+
+        :return: mutable state model
+        :rtype: _M
+        """
+        clone = copy.deepcopy(self)
+        clone.__dict__['_frozen'] = False
+        return clone
+
+    def diff(self, other: 'StateModel') -> Set[str]:
+        """
+        Get the names of the fields whose values differ between this model and another. Private
+        property attributes are reported by their property name (e.g. `_ICB__tc` -> `tc`).
+
+        :param other: state model to compare against
+        :type other: StateModel
+        :return: changed field names
+        :rtype: Set[str]
+        """
+        if other is self: return set()
+        mine, theirs = self.__dict__, other.__dict__
+        changed: Set[str] = set()
+        for key in mine.keys() | theirs.keys():
+            if key in _UNTRACKED: continue
+            if mine.get(key, _MISSING) != theirs.get(key, _MISSING):
+                # strip name mangling prefix (_<Class>__<name>)
+                if key.startswith('_') and '__' in key[1:]:
+                    key = key[1:].split('__', 1)[1]
+                changed.add(key)
+        return changed
+
     @property
     def id(self) -> _PKey:
         """
@@ -56,19 +131,69 @@ class StateModel(ABC):
         """
         self.__id = _id
 
+    @property
+    def cache_path(self) -> str:
+        """
+        Get the cache file path of this model. The path is resolved once per model class unless
+        overridden on the instance.
+
+        :return: cache file path
+        :rtype: str
+        """
+        path = self.__dict__.get('cache_path')
+        if path is not None: return path
+        path = StateModel._paths.get(type(self))
+        if path is None:
+            cache_base_path = os.environ.get('MONITOR_CACHE', default='/etc/iris/cache')
+            path = StateModel._paths[type(self)] = f'{cache_base_path}/{StateModel._filenames[type(self)]}'
+        return path
+
+    @cache_path.setter
+    def cache_path(self, path: str) -> None:
+        """
+        Override the cache file path of this model
+
+        :param path: cache file path
+        :type path: str
+        """
+        self.__dict__['cache_path'] = path
+
     @abstractmethod
     def serialize(self) -> Dict[str, Any]: ...
 
     @abstractmethod
     def deserialize(self, **kwargs) -> None: ...
 
-    def cache(self) -> None:
+    def cache(self, fsync: bool = False) -> None:
         """
-        Serialize contents and save to cache as a json file
+        Serialize contents and save to cache as a json file. The file is written to a temporary file
+        and atomically replaced so an interrupted write never truncates the cached model.
+
+        :param fsync: flush the file and its directory entry to disk, defaults to False
+        :type fsync: bool, optional
         """
-        with open(self.cache_path, 'w+') as json_file:
-            cached_payload = self.serialize()
-            json.dump(cached_payload, json_file)
+        cached_payload = self.serialize()
+        directory = os.path.dirname(self.cache_path)
+        if directory not in StateModel._directories:
+            os.makedirs(directory or '.', mode=0o777, exist_ok=True)
+            StateModel._directories.add(directory)
+        tmp_path = self.cache_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as json_file:
+                json.dump(cached_payload, json_file)
+                if fsync:
+                    json_file.flush()
+                    os.fsync(json_file.fileno())
+            os.replace(tmp_path, self.cache_path)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+        if fsync:
+            fd = os.open(directory or '.', os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
         self._logger.info("Cached state model: %s", self)
 
     def load(self) -> None:
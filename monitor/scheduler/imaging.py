@@ -38,6 +38,7 @@ class ImagingScheduler(Scheduler):
                 _property=PropertyCondition[Experiment](
                     trigger=lambda old_experiment, new_experiment:
                         old_experiment.id != new_experiment.id and new_experiment.stop_at is None,
+                    fields=('id',),
                     callback=self._schedule,
                     callback_on_init=True
                 )
@@ -48,6 +49,7 @@ class ImagingScheduler(Scheduler):
                 _property=PropertyCondition[Experiment](
                     trigger=lambda old_experiment, new_experiment:
                         old_experiment.id == new_experiment.id and new_experiment.stop_at is not None,
+                    fields=('stop_at',),
                     callback=self.cleanup,
                 )
             )
@@ -41,6 +41,7 @@ class SetpointScheduler(Scheduler):
         with StateManager() as state:
             # All protocol changes should be scheduled / re-scheduled
             state.subscribe(Protocol, self._schedule)
+            # experiment activity depends on the wall clock so this trigger declares no fields
             state.subscribe_property(
                 _type=Experiment,
                 _property=PropertyCondition[Experiment](
@@ -104,17 +105,18 @@ class SetpointScheduler(Scheduler):
         self._logger.debug(self)
         self._logger.info("Triggering setpoint conditions: TP: %s, OP: %s, CP: %s", tp, op, cp)
         with StateManager() as state:    
-            icb = state.icb
-            while not icb.initialized:
+            while not state.icb.initialized:
                 self._logger.info("ICB state not initialized. Waiting for icb initialization ...")
                 time.sleep(1)
-                icb = state.icb
-            # apply the new setpoint state to the system
-            icb.cp = cp
-            icb.op = op
-            icb.tp = tp
-            result = state.commit(icb)
-        if not result:
+            # apply the new setpoint state to the system (restaged if a sensor frame is committed meanwhile)
+            for _ in range(state.TRANSACTION_ATTEMPTS):
+                with state.transaction() as txn:
+                    icb = txn.icb
+                    icb.cp = cp
+                    icb.op = op
+                    icb.tp = tp
+                if not txn.stale: break
+        if not txn.committed:
             self._logger.critical("Setpoint change for scheduled protocol events not accepted")
             events.system_status.trigger(status=UISettings.STATUS_ALERT)
 
@@ -14,12 +14,15 @@ Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
+from functools import wraps
 from monitor.ui.static.settings import UISettings as uis
 from typing import Callable
 from monitor.events.registry import Registry as events
 
 
 def cache(proxy: Callable[..., None]):
+    # the undecorated request is exposed as __wrapped__ so persisted requests can be resolved by name
+    @wraps(proxy)
     def wrapper(self, *args, **kwargs) -> None:
         try:
             proxy(self, *args, **kwargs)
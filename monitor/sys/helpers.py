@@ -47,6 +47,7 @@ from pathlib import Path
 from typing import Optional
 from monitor.models.device import Device
 from monitor.models.protocol import Protocol
+from monitor.environment.persistence import CommitJournal, SnapshotStore
 from monitor.models.experiment import Experiment
 from monitor.models.imaging_profile import ImagingProfile
 
@@ -170,7 +171,8 @@ def clear_cache() -> None:
     Clear state model cache
     """
     cache_base_path = os.environ.get('MONITOR_CACHE', default='/etc/iris/cache')
-    for filename in [Device.FILENAME, Experiment.FILENAME, ImagingProfile.FILENAME, Protocol.FILENAME]:
+    for filename in [Device.FILENAME, Experiment.FILENAME, ImagingProfile.FILENAME, Protocol.FILENAME,
+                     SnapshotStore.FILENAME, CommitJournal.FILENAME]:
         fp = f'{cache_base_path}/{filename}'
         try:
             os.remove(fp)
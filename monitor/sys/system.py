@@ -2,7 +2,7 @@
 """
 System Loader Functions
 =======================
-Modified: 2021-11
+Modified: 2026-10
 
 Dependancies
 ------------
@@ -17,10 +17,13 @@ from monitor.sys import decorators
 from monitor.cloud.mqtt import MQTT
 import monitor.imaging.constants as IC
 from monitor.amqp.client import AMQPClient
+from monitor.events.metrics import PipelineMetrics
+from monitor.metrics.exporter import MetricsExporter
 from monitor.scheduler.imaging import ImagingScheduler
 from monitor.events.registry import Registry as events
 from monitor.scheduler.setpoint import SetpointScheduler
 from monitor.environment.state_manager import StateManager
+from monitor.environment.archive import TelemetryArchive
 from monitor.ui.static.settings import UISettings as uis
 from monitor.environment.thread_manager import ThreadManager as tm
 ```
@@ -38,10 +41,13 @@ from monitor.sys import decorators
 from monitor.cloud.mqtt import MQTT
 import monitor.imaging.constants as IC
 from monitor.amqp.client import AMQPClient
+from monitor.events.metrics import PipelineMetrics
+from monitor.metrics.exporter import MetricsExporter
 from monitor.scheduler.imaging import ImagingScheduler
 from monitor.events.registry import Registry as events
 from monitor.scheduler.setpoint import SetpointScheduler
 from monitor.environment.state_manager import StateManager
+from monitor.environment.archive import TelemetryArchive
 from monitor.ui.static.settings import UISettings as uis
 from monitor.environment.thread_manager import ThreadManager as tm
 
@@ -61,11 +67,22 @@ def main():
         # RMQ Event config
         host = os.environ['RABBITMQ_ADDR'].split(':')[0]
         port = int(os.environ['RABBITMQ_ADDR'].split(':')[1])
-        AMQPClient(host, port)
+        amqp = AMQPClient(host, port)
+        # pipeline and event statistics are included in the metrics snapshots
+        MetricsExporter(client=amqp).start()
         # default irrelevant here since the init checks that ID is exported
         _mqtt = MQTT(device_id=os.environ.get('ID', ''))
         SetpointScheduler()
         ImagingScheduler()
+        archive = TelemetryArchive()
+        archive.start()
+        # persist pending cache writes and telemetry aggregates before the ui powers off or reboots the system
+        events.system_reboot.register(StateManager.writer.flush, priority=0)
+        events.system_shutdown.register(StateManager.writer.flush, priority=0)
+        events.system_reboot.register(archive.flush, priority=0)
+        events.system_shutdown.register(archive.flush, priority=0)
+        events.system_reboot.register(PipelineMetrics().log)
+        events.system_shutdown.register(PipelineMetrics().log)
         # load runtime models from cache into state manager
         with StateManager() as state:
             state._load_runtime_models()
@@ -282,7 +299,7 @@ def calibrate_dpc():
             # get current settings as runtime obj
             # apply change and digest
             with StateManager() as state:
-                imaging_profile = state.imaging_profile
+                imaging_profile = state.imaging_profile.edit()
                 imaging_profile.dpc_exposure = exposure_us
                 result = state.commit(imaging_profile, cache=False)
                 _logger.debug("Exposure change result: %s", result)
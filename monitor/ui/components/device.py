@@ -18,6 +18,7 @@ from monitor.models.device import Device
 from monitor.models.experiment import Experiment
 from monitor.ui.components.loading_wheel import LoadingWheel
 from monitor.environment.state_manager import StateManager
+from monitor.events.event import Event
 from monitor.events.registry import Registry as events
 from monitor.ui.static.settings import UISettings as uis
 ```
@@ -32,6 +33,7 @@ from pathlib import Path
 
 from monitor.ui.components.widget import Widget
 from monitor.ui.components.text_box import TextBox
+from monitor.events.event import Event
 from monitor.events.registry import Registry as events
 from monitor.ui.static.settings import UISettings as uis
 from monitor.environment.state_manager import StateManager
@@ -60,8 +62,8 @@ class DeviceWidget(Widget):
         self._logger = logging.getLogger(__name__)
         self.icons = Icons()
         # register events
-        events.cloud_sync.register(self.update_sync_status)
-        events.system_status.register(callback=self.update_system_status)
+        events.cloud_sync.register(self.update_sync_status, mode=Event.UI)
+        events.system_status.register(callback=self.update_system_status, mode=Event.UI)
         # stage pipeline events
         events.avatar_pipeline.stage(self.load_avatar_image, 1)
         events.avatar_pipeline.stage(self.update_avatar, 2)
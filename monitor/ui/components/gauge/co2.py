@@ -19,6 +19,7 @@ Proprietary and confidential
 from typing import Optional, Tuple
 from monitor.models.icb import ICB
 from monitor.ui.components.gauge.gauge import Gauge
+from monitor.events.event import Event
 from monitor.events.registry import Registry as events
 from monitor.environment.state_manager import PropertyCondition, StateManager
 
@@ -27,12 +28,13 @@ class CO2Gauge(Gauge):
     def __init__(self, width: int, height: int):
         super().__init__(name='CO₂', width=width, height=height)
         # register to setpoint load state
-        events.co2_loader.register(self.set_load_state)
+        events.co2_loader.register(self.set_load_state, mode=Event.UI)
         with StateManager() as state:
             state.subscribe_property(
                 _type=ICB,
                 _property=PropertyCondition[ICB](
                     trigger=lambda old_icb, new_icb: old_icb.cp != new_icb.cp or old_icb.cm != new_icb.cm,
+                    fields=('cp', 'cm'),
                     callback=self.reset_loaders,
                     callback_on_init=True
                 )
@@ -25,7 +25,9 @@ import logging
 import pygame  # type: ignore
 from pygame import gfxdraw  # type:ignore
 from typing import Optional, Tuple
+from monitor.models.icb import ICB
 from monitor.ui.components.widget import Widget
+from monitor.environment.state_manager import StateManager
 
 from monitor.ui.static.settings import UISettings as uis
 from monitor.ui.components.loading_wheel import LoadingWheel
@@ -56,6 +58,9 @@ class Gauge(Widget):
         )
         self.load_state: bool = False
         self.load_set: bool = False
+        # icb sequence number the gauge state was last evaluated at
+        self._seq = -1
+        self._state: Tuple[bool, Optional[str], Optional[str]] = (True, None, None)
         self.surf = pygame.Surface((self.width, self.height))  # type:ignore
         self.font_path = uis.FONT_PATH
         self.redraw()
@@ -127,7 +132,13 @@ class Gauge(Widget):
         self._render_text(sp_str, y_offset, font_size, gauge_text_color)
 
     def redraw(self):
-        disabled, setpoint, value = self.get_state()
+        # only re-evaluate the gauge state when a new icb snapshot has been committed
+        with StateManager() as state:
+            seq = state.sequence(ICB)
+        if seq != self._seq:
+            self._seq = seq
+            self._state = self.get_state()
+        disabled, setpoint, value = self._state
         if value is None:
             self.gauge_loader.start()
         else:
@@ -19,6 +19,7 @@ Proprietary and confidential
 from typing import Optional, Tuple
 from monitor.models.icb import ICB
 from monitor.ui.components.gauge.gauge import Gauge
+from monitor.events.event import Event
 from monitor.events.registry import Registry as events
 from monitor.environment.state_manager import PropertyCondition, StateManager
 
@@ -31,11 +32,12 @@ class TempGauge(Gauge):
                 _type=ICB,
                 _property=PropertyCondition[ICB](
                     trigger=lambda old_icb, new_icb: old_icb.tp != new_icb.tp or old_icb.tm != new_icb.tm,
+                    fields=('tp', 'tm'),
                     callback=self.reset_loaders,
                     callback_on_init=True
                 )
             )
-        events.temp_loader.register(self.set_load_state)
+        events.temp_loader.register(self.set_load_state, mode=Event.UI)
 
     async def reset_loaders(self, _: ICB) -> None:
         """
@@ -12,6 +12,7 @@ import numpy as np
 from typing import Optional
 
 from monitor.ui.components.widget import Widget
+from monitor.events.event import Event
 from monitor.events.registry import Registry as events
 from monitor.ui.static.settings import UISettings as uis
 ```
@@ -25,6 +26,7 @@ import numpy as np
 from typing import Optional
 
 from monitor.ui.components.widget import Widget
+from monitor.events.event import Event
 from monitor.events.registry import Registry as events
 from monitor.ui.static.settings import UISettings as uis
 
@@ -53,7 +55,7 @@ class ProgressBar(Widget):
         )
         self.percent_complete = 0.0
         self.redraw()
-        events.update_progress.register(self.update)
+        events.update_progress.register(self.update, mode=Event.UI)
 
     def update(self, percent_complete: int):
         self.percent_complete = percent_complete
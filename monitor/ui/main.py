@@ -3,7 +3,7 @@
 """
 User Interface Controller
 =========================
-Modified: 2021-07
+Modified: 2026-10
 
 Dependencies:
 -------------
@@ -14,7 +14,10 @@ import pygame
 
 from monitor.sys import kernel
 from monitor.sys.rotary_knob import RotaryKnob
+from monitor.events.event import Event
+from monitor.events.dispatch import Dispatcher
 from monitor.events.registry import Registry as events
+from monitor.ui.profiler import FrameProfiler
 from monitor.ui.views.canvas import Canvas
 from monitor.ui.views.loading import Loading
 from monitor.ui.menu.main import MainMenu
@@ -38,7 +41,10 @@ import pygame  # type: ignore
 from pygame import KEYDOWN, K_RETURN, K_RIGHT, K_LEFT  # type: ignore
 
 from monitor.sys import kernel
+from monitor.events.event import Event
+from monitor.events.dispatch import Dispatcher
 from monitor.events.registry import Registry as events
+from monitor.ui.profiler import FrameProfiler
 from monitor.ui.views.canvas import Canvas
 from monitor.ui.views.loading import Loading
 from monitor.ui.menu.main import MainMenu
@@ -54,6 +60,9 @@ from monitor.ui.components.experiment import ExperimentWidget
 from monitor.ui.views.registration import Registration
 from monitor.ui.static.settings import UISettings as uis
 from monitor.environment.state_manager import PropertyCondition, StateManager
+from monitor.metrics.registry import MetricsRegistry as metrics
+
+_FRAME_TIME = metrics.histogram('ui.frame', bounds=(0.008, 0.0167, 0.025, 0.0334, 0.05, 0.1, 0.25, 1.0))
 
 
 class UserInterfaceController:
@@ -76,6 +85,10 @@ class UserInterfaceController:
         self.monitor_mode = True
         
         self.screen, self.surface_height, self.surface_width, self.clock = self._init_pygame_menu()
+        # frame time profiler (overlay toggled from the service menu)
+        self.profiler = FrameProfiler(uis.FPS)
+        self._profiler_font = None
+        metrics.collector('ui.profile', self.profiler.summary)
         # create our canvas'
         
         self.dashboard = Canvas(self.surface_height, self.surface_width)
@@ -122,15 +135,17 @@ class UserInterfaceController:
                 _type=Device,
                 _property=PropertyCondition[Device](
                     trigger=lambda old_device, new_device: not old_device.registered and new_device.registered,
+                    fields=('lab_id',),
                     callback=self.disable_registration_screen,
                     callback_on_init=False
                 )
             )
-        events.splash_load.register(self.set_splash_screen)
-        events.start_load.register(self.set_load_screen)
+        events.splash_load.register(self.set_splash_screen, mode=Event.UI)
+        events.start_load.register(self.set_load_screen, mode=Event.UI)
         events.system_reboot.register(self.set_reboot_flag)
         events.system_shutdown.register(self.set_shutdown_flag)
-        events.mode_switch.register(self.set_monitor_mode)
+        events.mode_switch.register(self.set_monitor_mode, mode=Event.UI)
+        events.toggle_profiler.register(self.profiler.toggle, mode=Event.UI)
         self._logger.info("Instantiation successful.")
 
     def _init_pygame_menu(self) -> tuple:
@@ -287,7 +302,13 @@ class UserInterfaceController:
         """
         # turn off menu
         self.dashboard_menu.main.disable()
+        # ui event callbacks triggered from other threads are queued and run between frames
+        Dispatcher.attach_ui()
+        profiler = self.profiler
         while True:
+            profiler.begin()
+            Dispatcher.drain()
+            profiler.lap('dispatch')
             if self.shutdown_flag:
                 self.shutdown()
                 self.shutdown_flag = False
@@ -299,6 +320,7 @@ class UserInterfaceController:
                 self._logger.debug(self.load)
                 # Application events
                 events = pygame.event.get()
+                profiler.lap('event.get')
                 for event in events:
                     if event.type == KEYDOWN:  # type: ignore
                         # type: ignore
@@ -309,16 +331,16 @@ class UserInterfaceController:
                             self.load_exit = False
                 # loading screens take prescedence over all other menus
                 if self.load:
-                    self.loading.redraw(self.screen)
+                    self.loading.redraw(self.screen, profiler)
                 else:
                     self._service_menu.main.enable()
                     # self.dashboard.redraw(self.screen)
                     self._service_menu.main.mainloop(events)
-                self.clock.tick(uis.FPS)
-                pygame.display.flip()
+                    profiler.lap('menu.mainloop')
             else:
                 # Application events
                 events = pygame.event.get()
+                profiler.lap('event.get')
                 for event in events:
                     if event.type == KEYDOWN:  # type: ignore
                         if event.key in [K_RETURN, K_RIGHT, K_LEFT]:  # type: ignore
@@ -330,14 +352,32 @@ class UserInterfaceController:
                             self.load_exit = False
                 # loading screens take prescedence over all other menus
                 if self.load:
-                    self.loading.redraw(self.screen)
+                    self.loading.redraw(self.screen, profiler)
                 elif self.show_registration:
-                    self.registration.redraw(self.screen)
+                    self.registration.redraw(self.screen, profiler)
                 else:
-                    self.dashboard.redraw(self.screen)
+                    self.dashboard.redraw(self.screen, profiler)
                     self.dashboard_menu.main.mainloop(events)
-                self.clock.tick(uis.FPS)
-                pygame.display.flip()
+                    profiler.lap('menu.mainloop')
+            if profiler.overlay:
+                self._draw_profiler_overlay()
+                profiler.lap('overlay')
+            pygame.display.flip()
+            profiler.lap('display.flip')
+            profiler.end()
+            _FRAME_TIME.observe(self.clock.tick(uis.FPS) / 1000)
+
+    def _draw_profiler_overlay(self) -> None:
+        """
+        Draw the frame profiler summary and worst laps over the top of the screen
+        """
+        if self._profiler_font is None:
+            self._profiler_font = pygame.font.Font(uis.FONT_PATH, 14)
+        y_offset = 2
+        for line in self.profiler.lines():
+            text = self._profiler_font.render(line, True, uis.TEXT_COLOR, uis.INCUVERS_BLACK)
+            self.screen.blit(text, (2, y_offset))
+            y_offset += text.get_height()
 
     def knob_push(self):
         """
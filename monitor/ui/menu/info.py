@@ -112,7 +112,7 @@ class InfoMenu:
 
     def refresh_register(self):
         self._logger.info("Device not registered, starting registration pipeline.")
-        # disable menu first to show registration screen then begin synchrnous pipeline
+        # disable menu first to show registration screen then queue the registration pipeline
         self.main.disable()
         events.registration_pipeline.begin()
 
@@ -35,6 +35,7 @@ class CO2Menu(SensorMenu[float]):
                 _type=ICB,
                 _property=PropertyCondition[ICB](
                     trigger=lambda old_icb, new_icb: old_icb.cp != new_icb.cp or old_icb.cm != new_icb.cm,
+                    fields=('cp', 'cm'),
                     callback=self.update,
                     callback_on_init=True
                 )
@@ -63,7 +64,7 @@ class CO2Menu(SensorMenu[float]):
         :type setpoint: float
         """
         with StateManager() as state:
-            icb = state.icb
+            icb = state.icb.edit()
             icb.cm = mode
             icb.cp = setpoint
             state.commit(icb)
@@ -29,6 +29,7 @@ class FanMenu(SensorMenu[int]):
                 _type=ICB,
                 _property=PropertyCondition[ICB](
                     trigger=lambda old_icb, new_icb: old_icb.fp != new_icb.fp,
+                    fields=('fp',),
                     callback=self.update,
                     callback_on_init=True
                 )
@@ -55,7 +56,7 @@ class FanMenu(SensorMenu[int]):
         :type setpoint: int
         """
         with StateManager() as state:
-            icb = state.icb
+            icb = state.icb.edit()
             icb.fp = setpoint
             state.commit(icb)
 
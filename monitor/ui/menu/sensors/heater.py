@@ -29,6 +29,7 @@ class HeaterMenu(SensorMenu[int]):
                 _type=ICB,
                 _property=PropertyCondition[ICB](
                     trigger=lambda old_icb, new_icb: old_icb.hp != new_icb.hp,
+                    fields=('hp',),
                     callback=self.update,
                     callback_on_init=True
                 )
@@ -55,7 +56,7 @@ class HeaterMenu(SensorMenu[int]):
         :type duty: int
         """
         with StateManager() as state:
-            icb = state.icb
+            icb = state.icb.edit()
             icb.hp = duty
             state.commit(icb)
 
@@ -35,6 +35,7 @@ class O2Menu(SensorMenu[float]):
                 _type=ICB,
                 _property=PropertyCondition[ICB](
                     trigger=lambda old_icb, new_icb: old_icb.op != new_icb.op or old_icb.om != new_icb.om,
+                    fields=('op', 'om'),
                     callback=self.update,
                     callback_on_init=True
                 )
@@ -62,7 +63,7 @@ class O2Menu(SensorMenu[float]):
         :type setpoint: float
         """
         with StateManager() as state:
-            icb = state.icb
+            icb = state.icb.edit()
             icb.om = mode
             icb.op = setpoint
             state.commit(icb)
@@ -34,6 +34,7 @@ class TempMenu(SensorMenu[float]):
                 _type=ICB,
                 _property=PropertyCondition[ICB](
                     trigger=lambda old_icb, new_icb: old_icb.tp != new_icb.tp or old_icb.tm != new_icb.tm,
+                    fields=('tp', 'tm'),
                     callback=self.update,
                     callback_on_init=True
                 )
@@ -61,7 +62,7 @@ class TempMenu(SensorMenu[float]):
         :type setpoint: float
         """
         with StateManager() as state:
-            icb = state.icb
+            icb = state.icb.edit()
             icb.tm = mode
             icb.tp = setpoint
             state.commit(icb)
@@ -3,7 +3,7 @@
 """
 Service Menu
 ============
-Modified: 2021-05
+Modified: 2026-10
 
 Dependancies
 ------------
@@ -192,6 +192,8 @@ class ServiceMenu:
         self.update_snap_option = self.main.add_option(
             self.update_snap.get_title(), self.update_snap.menu)
         self.menu_options_to_disable.append(self.update_snap_option)
+        # show or hide the ui frame profiler overlay
+        self.main.add_option('Frame Profiler', events.toggle_profiler.trigger)
         # don't make the exit option disabled-able!
         # Add menu option for navigating to main menu
         self.main.add_option(self.main_menu.get_title(), self.main_menu.menu)
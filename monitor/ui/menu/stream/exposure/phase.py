@@ -51,6 +51,7 @@ class PhaseExposureMenu(ExposureMenu):
                 _type=ImagingProfile,
                 _property=PropertyCondition[ImagingProfile](
                     trigger=lambda old_ip, new_ip: old_ip.dpc_exposure != new_ip.dpc_exposure,
+                    fields=('dpc_exposure',),
                     callback=self.update_profile,
                     callback_on_init=True
                 )
@@ -59,6 +60,7 @@ class PhaseExposureMenu(ExposureMenu):
                 _type=Experiment,
                 _property=PropertyCondition[Experiment](
                     trigger=lambda old_exp, new_exp: old_exp.id != new_exp.id,
+                    fields=('id',),
                     callback=self._cancel
                 )
             )
@@ -77,7 +79,7 @@ class PhaseExposureMenu(ExposureMenu):
             self.preview.pause()
         # generate runtime ip and update
         with StateManager() as state:
-            imaging_profile = state.imaging_profile
+            imaging_profile = state.imaging_profile.edit()
             imaging_profile.dpc_exposure = IC.dpc_grade_to_exposure(value)
             # commit to state without caching
             state.commit(imaging_profile, cache=False)
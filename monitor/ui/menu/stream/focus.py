@@ -45,6 +45,7 @@ class FocusMenu:
                 _type=Experiment,
                 _property=PropertyCondition[Experiment](
                     trigger=lambda old_exp, new_exp: old_exp.id != new_exp.id,
+                    fields=('id',),
                     callback=self._cancel
                 )
             )
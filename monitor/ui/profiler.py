@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Frame Profiler
+==============
+Modified: 2026-10
+
+Optional frame time profiler for the UI loop. Each frame is split into laps (event polling, the redraw
+of each canvas widget, the menu mainloop and the display flip) and a rolling window of lap and frame
+times is kept so the worst offenders against the frame budget can be reported to the log or drawn as
+an overlay. When disabled a lap costs a single attribute check. The windows are copied under a lock
+for reporting since the metrics exporter reads them from its own thread.
+
+Dependancies
+------------
+```
+import os
+import time
+import logging
+from bisect import bisect_left
+from threading import Lock
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+from tabulate import tabulate
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import os
+import time
+import logging
+from bisect import bisect_left
+from threading import Lock
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+from tabulate import tabulate
+
+
+def _percentile(samples: List[float], percent: float) -> float:
+    # nearest rank over presorted samples
+    if not samples: return 0.0
+    rank = max(0, min(len(samples) - 1, round(percent / 100 * len(samples)) - 1))
+    return samples[rank]
+
+
+class FrameProfiler:
+
+    # enable profiling at boot
+    ENABLED = os.environ.get('MONITOR_UI_PROFILE', default='0').lower() in ('1', 'true', 'yes')
+    WINDOW = 600                # frames retained (10 s @ 60 FPS)
+    # frame time histogram upper bounds in seconds
+    BUCKETS: Tuple[float, ...] = (0.004, 0.008, 0.0167, 0.025, 0.0334, 0.05, 0.1)
+
+    def __init__(self, fps: int, enabled: bool = ENABLED, window: int = WINDOW) -> None:
+        """
+        :param fps: target frames per second
+        :type fps: int
+        :param enabled: record frames, defaults to ENABLED
+        :type enabled: bool, optional
+        :param window: frames retained, defaults to WINDOW
+        :type window: int, optional
+        """
+        self._logger = logging.getLogger(__name__)
+        self.budget = 1 / fps
+        self.enabled = enabled
+        self.overlay = False
+        self.window = window
+        self.frames: Deque[float] = deque(maxlen=window)
+        self.laps: Dict[str, Deque[float]] = {}
+        self.over_budget = 0
+        self._start = 0.0
+        self._mark = 0.0
+        self._lock = Lock()
+
+    def toggle(self) -> None:
+        """
+        Toggle the on-screen overlay. Profiling is enabled while the overlay is shown and the collected
+        report is logged when it is hidden.
+        """
+        self.overlay = not self.overlay
+        if self.overlay:
+            self.enabled = True
+        else:
+            self._logger.info("UI frame profile:%s", self)
+            self.enabled = self.ENABLED
+        self._logger.info("Frame profiler overlay %s", 'enabled' if self.overlay else 'disabled')
+
+    def begin(self) -> None:
+        """
+        Mark the start of a frame
+        """
+        if not self.enabled: return
+        self._start = self._mark = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        """
+        Record the time since the previous lap (or the frame start) under a name
+
+        :param name: lap name
+        :type name: str
+        """
+        if not self.enabled: return
+        now = time.perf_counter()
+        with self._lock:
+            samples = self.laps.get(name)
+            if samples is None:
+                samples = self.laps[name] = deque(maxlen=self.window)
+            samples.append(now - self._mark)
+        self._mark = now
+
+    def end(self) -> None:
+        """
+        Mark the end of a frame (excluding the frame rate limiter sleep)
+        """
+        if not self.enabled or not self._start: return
+        elapsed = time.perf_counter() - self._start
+        with self._lock:
+            self.frames.append(elapsed)
+        if elapsed > self.budget: self.over_budget += 1
+        self._start = 0.0
+
+    def _frames(self) -> List[float]:
+        with self._lock:
+            return list(self.frames)
+
+    def _laps(self) -> Dict[str, List[float]]:
+        with self._lock:
+            return {name: list(samples) for name, samples in self.laps.items()}
+
+    def histogram(self) -> List[Tuple[float, int]]:
+        """
+        Get the frame time distribution over the window
+
+        :return: (bucket upper bound in seconds, frames) pairs; the last bound is inf
+        :rtype: List[Tuple[float, int]]
+        """
+        counts = [0] * (len(self.BUCKETS) + 1)
+        for frame in self._frames():
+            counts[bisect_left(self.BUCKETS, frame)] += 1
+        return list(zip(self.BUCKETS + (float('inf'),), counts))
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Get frame time statistics over the window in seconds
+
+        :return: frame count, mean, p50, p99 and max frame time and the achievable frame rate
+        :rtype: Dict[str, float]
+        """
+        frames = sorted(self._frames())
+        mean = sum(frames) / len(frames) if frames else 0.0
+        return {
+            'frames': len(frames),
+            'mean': mean,
+            'p50': _percentile(frames, 50),
+            'p99': _percentile(frames, 99),
+            'max': frames[-1] if frames else 0.0,
+            'fps': min(1 / self.budget, 1 / mean) if mean else 0.0
+        }
+
+    def worst(self, n: int = 5) -> List[Dict[str, Any]]:
+        """
+        Get the laps with the highest p99 time over the window
+
+        :param n: number of laps, defaults to 5
+        :type n: int, optional
+        :return: lap statistics in seconds, slowest first
+        :rtype: List[Dict[str, Any]]
+        """
+        rows = []
+        for name, samples in self._laps().items():
+            ordered = sorted(samples)
+            if not ordered: continue
+            rows.append({
+                'lap': name,
+                'mean': sum(ordered) / len(ordered),
+                'p99': _percentile(ordered, 99),
+                'max': ordered[-1],
+                # share of the frame budget consumed on average
+                'budget': sum(ordered) / len(ordered) / self.budget
+            })
+        return sorted(rows, key=lambda row: row['p99'], reverse=True)[:n]
+
+    def lines(self, n: int = 3) -> List[str]:
+        """
+        Get the overlay text
+
+        :param n: number of worst laps shown, defaults to 3
+        :type n: int, optional
+        :return: overlay lines
+        :rtype: List[str]
+        """
+        summary = self.summary()
+        lines = [
+            "{:.1f} FPS | p50 {:.1f} ms | p99 {:.1f} ms | over budget {}".format(
+                summary['fps'], summary['p50'] * 1e3, summary['p99'] * 1e3, self.over_budget)
+        ]
+        for row in self.worst(n):
+            lines.append("{}: p99 {:.1f} ms ({:.0%})".format(row['lap'], row['p99'] * 1e3, row['budget']))
+        return lines
+
+    def reset(self) -> None:
+        """
+        Drop all recorded frames
+        """
+        with self._lock:
+            self.frames.clear()
+            self.laps.clear()
+        self.over_budget = 0
+
+    def __str__(self) -> str:
+        summary = self.summary()
+        laps = tabulate(
+            [(row['lap'], row['mean'] * 1e3, row['p99'] * 1e3, row['max'] * 1e3, row['budget'] * 100)
+             for row in self.worst(len(self.laps))],
+            headers=['Lap', 'Mean (ms)', 'p99 (ms)', 'Max (ms)', 'Budget (%)'], floatfmt=".2f"
+        )
+        frames = tabulate(
+            [("<= {:.1f}".format(bound * 1e3), count) for bound, count in self.histogram()],
+            headers=['Frame (ms)', 'Frames']
+        )
+        header = "{} frames | {:.1f} FPS | p50 {:.2f} ms | p99 {:.2f} ms | max {:.2f} ms | over budget {}".format(
+            summary['frames'], summary['fps'], summary['p50'] * 1e3, summary['p99'] * 1e3, summary['max'] * 1e3,
+            self.over_budget
+        )
+        return "\n{}\n{}\n{}".format(header, laps, frames)
@@ -3,7 +3,7 @@
 """
 Canvas
 ======
-Modified: 2020-10
+Modified: 2026-10
 
 This module hosts a list of widget objects for a specific display context. This helps with linking
 widgets that need to be displayed in the same window.
@@ -11,11 +11,16 @@ widgets that need to be displayed in the same window.
 Dependencies:
 -------------
 ```
+from typing import Optional
+from monitor.ui.profiler import FrameProfiler
 ```
 Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
+from typing import Optional
+from monitor.ui.profiler import FrameProfiler
+
 
 class Canvas:
 
@@ -27,10 +32,13 @@ class Canvas:
         self.height = surface_height
         self.widgets = []
         self.coords = []
+        # frame profiler lap names
+        self.laps = []
 
     def add_info_widget(self, widget, y_offset):
         self.widgets.append(widget)
         self.coords.append((0, y_offset))
+        self.laps.append('redraw.' + type(widget).__name__)
 
     def add_gauge_widget(self, widget, loc_idx):
         # x,y grid index based on loc_idx = 0,1,2,3
@@ -39,8 +47,10 @@ class Canvas:
         j = loc_idx // 2
         self.widgets.append(widget)
         self.coords.append((widget.width*i, y_offset+widget.height*j))
+        self.laps.append('redraw.' + type(widget).__name__)
 
-    def redraw(self, main_surface):
+    def redraw(self, main_surface, profiler: Optional[FrameProfiler] = None):
         for idx in range(len(self.widgets)):
             self.widgets[idx].redraw()
             main_surface.blit(self.widgets[idx].get_surface(), self.coords[idx])
+            if profiler is not None: profiler.lap(self.laps[idx])
@@ -14,6 +14,7 @@ from monitor.ui.components.widget import Widget
 from monitor.ui.components.text_box import TextBox
 from monitor.ui.components.progress_bar import ProgressBar
 from monitor.ui.components.loading_wheel import LoadingWheel
+from monitor.events.event import Event
 from monitor.events.registry import Registry as events
 from monitor.ui.static.settings import UISettings as uis
 ```
@@ -28,6 +29,7 @@ from monitor.ui.components.widget import Widget
 from monitor.ui.components.text_box import TextBox
 from monitor.ui.components.progress_bar import ProgressBar
 from monitor.ui.components.loading_wheel import LoadingWheel
+from monitor.events.event import Event
 from monitor.events.registry import Registry as events
 from monitor.ui.static.settings import UISettings as uis
 
@@ -74,12 +76,12 @@ class Loading(Widget):
         )
         self.pv = ProgressBar(375, 25, text="")
         events.system_status.register(self.set_message, condition=lambda *argv,
-                                      **kwargs: False if kwargs.get('msg') is None else True)
+                                      **kwargs: False if kwargs.get('msg') is None else True, mode=Event.UI)
         events.start_load.register(self.reset_state,
-            condition=lambda *argv: argv[0])
+            condition=lambda *argv: argv[0], mode=Event.UI)
         events.update_progress.register(
-            self.set_pv, condition=lambda *argv: True if argv[0] == 0 else False)
-        events.new_benchmark_img.register(self.set_benchmark_image)
+            self.set_pv, condition=lambda *argv: True if argv[0] == 0 else False, mode=Event.UI)
+        events.new_benchmark_img.register(self.set_benchmark_image, mode=Event.UI)
         self.redraw()
 
     def reset_state(self, _: bool):
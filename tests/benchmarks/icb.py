@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+ICB Model Benchmarks
+====================
+Modified: 2026-10
+
+Microbenchmarks for ICB model construction, snapshot copies and initialization checks.
+Run with `python -m tests.benchmarks.icb`.
+
+Dependancies
+------------
+```
+import copy
+import timeit
+from tabulate import tabulate
+from monitor.models.icb import ICB
+from tests.resources import icb as resources
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import copy
+import timeit
+from tabulate import tabulate
+from monitor.models.icb import ICB
+from tests.resources import icb as resources
+
+NUMBER = 10000
+
+
+def main() -> None:
+    icb = ICB()
+    for key, value in resources.ICB_MODEL.items():
+        setattr(icb, key, value)
+    cases = [
+        ('construct', lambda: ICB()),
+        ('deepcopy', lambda: copy.deepcopy(icb)),
+        ('initialized', lambda: icb.initialized),
+        ('diff', lambda: icb.diff(icb.edit())),
+    ]
+    rows = []
+    for name, case in cases:
+        elapsed = min(timeit.repeat(case, number=NUMBER, repeat=5))
+        rows.append((name, elapsed / NUMBER * 1e6))
+    print(tabulate(rows, headers=['Case', 'Time (us)'], floatfmt=".3f"))
+
+
+if __name__ == '__main__':
+    main()
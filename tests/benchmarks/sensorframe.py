@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Sensorframe Parser Benchmarks
+=============================
+Modified: 2026-10
+
+Compares the streaming sensorframe parser against decoding frames through an intermediate dict
+and per-key property setters. Run with `python -m tests.benchmarks.sensorframe`.
+
+Dependancies
+------------
+```
+import timeit
+import logging
+from typing import Dict
+from tabulate import tabulate
+from monitor.models.icb import ICB
+from monitor.models.sensorframe import SensorframeParser
+from monitor.exceptions.icb import SensorframeError
+from tests.resources import icb
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import timeit
+import logging
+from typing import Dict
+from tabulate import tabulate
+from monitor.models.icb import ICB
+from monitor.models.sensorframe import SensorframeParser
+from monitor.exceptions.icb import SensorframeError
+from tests.resources import icb
+
+NUMBER = 5000
+SCALED = ('TC', 'TP', 'CC', 'CP', 'OC', 'OP')
+
+
+def dict_parse(line: bytes, model: ICB) -> ICB:
+    """
+    Reference path: decode, split into a key/value dict then set each known property
+    """
+    frame: Dict[str, str] = {}
+    for field in line.decode().strip().split('$', 1)[1].split('&'):
+        if '|' in field:
+            key, value = field.split('|', 1)
+            frame[key] = value
+    for key, value in frame.items():
+        if not hasattr(ICB, key.lower()):
+            continue
+        if key == 'IV':
+            model.iv = value
+        elif key == 'CT':
+            model.ct = ICB.calibration_time_to_iso(int(value))
+        elif key in SCALED:
+            setattr(model, key.lower(), model.int_to_float(int(value)))
+        else:
+            setattr(model, key.lower(), float(value) if '.' in value else int(value))
+    model.timestamp = ICB.generate_timestamp()
+    return model
+
+
+def reject(parser: SensorframeParser, template: ICB) -> None:
+    """
+    Parse the malformed reference frame
+    """
+    try:
+        parser.parse(icb.ICB_READLINE_MALFORMED, template.edit())
+    except SensorframeError:
+        pass
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    parser = SensorframeParser()
+    template = ICB()
+    stream = icb.ICB_READLINE * 10
+    cases = [
+        ('dict + setattr', lambda: dict_parse(icb.ICB_READLINE, template.edit())),
+        ('parse', lambda: parser.parse(icb.ICB_READLINE, template.edit())),
+        ('parse (memoryview)', lambda: parser.parse(memoryview(icb.ICB_READLINE), template.edit())),
+        ('reject malformed', lambda: reject(parser, template)),
+        ('feed (10 frames) / frame', lambda: parser.feed(stream)),
+    ]
+    rows = []
+    for name, case in cases:
+        elapsed = min(timeit.repeat(case, number=NUMBER, repeat=5))
+        per_call = elapsed / NUMBER * 1e6
+        rows.append((name, per_call / 10 if name.startswith('feed') else per_call))
+    print(tabulate(rows, headers=['Case', 'Time (us)'], floatfmt=".3f"))
+
+
+if __name__ == '__main__':
+    main()
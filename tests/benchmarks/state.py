@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+State Model Benchmarks
+======================
+Modified: 2026-10
+
+Microbenchmarks for runtime model construction and snapshot copies.
+Run with `python -m tests.benchmarks.state`.
+
+Dependancies
+------------
+```
+import copy
+import timeit
+import logging
+from tabulate import tabulate
+from monitor.models.icb import ICB
+from monitor.models.device import Device
+from monitor.models.protocol import Protocol
+from monitor.models.experiment import Experiment
+from monitor.models.imaging_profile import ImagingProfile
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import copy
+import timeit
+import logging
+from tabulate import tabulate
+from monitor.models.icb import ICB
+from monitor.models.device import Device
+from monitor.models.protocol import Protocol
+from monitor.models.experiment import Experiment
+from monitor.models.imaging_profile import ImagingProfile
+
+NUMBER = 5000
+
+
+def main() -> None:
+    # measure the model work rather than log record formatting
+    logging.disable(logging.INFO)
+    rows = []
+    for model_type in (ICB, Device, Protocol, Experiment, ImagingProfile):
+        model = model_type()
+        construct = min(timeit.repeat(model_type, number=NUMBER, repeat=5)) / NUMBER
+        deepcopy = min(timeit.repeat(lambda: copy.deepcopy(model), number=NUMBER, repeat=5)) / NUMBER
+        rows.append((model_type.__name__, construct * 1e6, deepcopy * 1e6))
+    print(tabulate(rows, headers=['Model', 'Construct (us)', 'Deepcopy (us)'], floatfmt=".3f"))
+
+
+if __name__ == '__main__':
+    main()
@@ -80,3 +80,25 @@ ICB_SENSORFRAME_2_CONV = {
     'OP': 17.8,
     'OC': 17.8,
 }
+
+# fully initialized icb model attributes
+ICB_MODEL = {
+    'tc': 36.6,
+    'rh': 0.0,
+    'oc': 17.8,
+    'cc': 5.3,
+    'tp': 37.0,
+    'to': 0.5,
+    'cp': 5.0,
+    'op': 17.8,
+    'hp': 100,
+    'fp': 40,
+    'fc': 4088,
+    'ctr': 0.0,
+    'tm': 2,
+    'cm': 2,
+    'om': 2,
+    'iv': '3407285',
+    'ct': '2021-05-01T00:00:00+00:00',
+    'timestamp': '2021-05-01T00:00:00+00:00'
+}
@@ -2,7 +2,7 @@
 """
 Unittest for ApiHandler
 =======================
-Date: 2021-04
+Date: 2026-10
 
 Dependencies:
 -------------
@@ -13,6 +13,7 @@ from json.decoder import JSONDecodeError
 from monitor.tests import resources
 from unittest.mock import Mock, patch
 from monitor.cloud.api_handler import ApiHandler
+from monitor.api.multipart import MultipartStream
 ```
 Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
@@ -20,14 +21,17 @@ Proprietary and confidential
 """
 
 # flake8: noqa
+import os
 import json
 import logging
 import requests
 import unittest
+import threading
 from unittest.mock import MagicMock, Mock, patch
 patch('retry.retry', lambda *x, **y: lambda f: f).start()  # noqa
 from json.decoder import JSONDecodeError
 from monitor.api.api_handler import ApiHandler
+from monitor.api.multipart import MultipartStream
 from monitor.environment.thread_manager import ThreadManager
 from monitor.environment.state_manager import StateManager
 from monitor.models.device import Device
@@ -96,11 +100,22 @@ class TestApiHandler(unittest.TestCase):
         # write dummy jwt to test authenticated calls
         self.api_handler._post_request(
             self.false_path, backend.SAMPLE_JWT, backend.SAMPLE_POST_PAYLOAD, bytes(10))
+        body = post.call_args.kwargs['data']
+        self.assertIsInstance(body, MultipartStream)
+        header['Content-Type'] = body.content_type
         post.assert_called_once_with(self.api_handler.url + self.false_path,
-                                     data={"data": json.dumps(backend.SAMPLE_POST_PAYLOAD)},
-                                     files={"media": bytes(10)},
+                                     data=body,
                                      timeout=self.api_handler.POST_TIMEOUT,
                                      headers=header)
+        # the streamed body matches the body requests builds for a file upload
+        fields = {"data": json.dumps(backend.SAMPLE_POST_PAYLOAD)}
+        expected = requests.Request('POST', 'http://test', data=fields, files={"media": bytes(10)}).prepare()
+        stream = MultipartStream(fields, {"media": bytes(10)},
+                                 boundary=expected.headers['Content-Type'].split('boundary=')[1])
+        self.assertEqual(len(stream), len(expected.body))
+        self.assertEqual(b''.join(iter(lambda: bytes(stream.read(7)), b'')), expected.body)
+        stream.seek(-12, os.SEEK_END)
+        self.assertEqual(bytes(stream.read()), expected.body[-12:])
 
     @patch.object(ApiHandler, '_post_request', autospec=True)
     @patch.object(ApiHandler, 'refresh_jwt', autospec=True)
@@ -662,9 +677,20 @@ class TestApiHandler(unittest.TestCase):
         :type mock: MagicMock
         """
         # test success
-        self.assertTrue(self.api_handler.refresh_jwt())
+        self.assertTrue(self.api_handler.refresh_jwt('expired'))
+        # concurrent rejections of the same jwt share the jwt request
+        threads = [threading.Thread(target=self.api_handler.refresh_jwt, args=('expired',)) for _ in range(8)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertEqual(mock.call_count, 1)
+        # a different jwt or a stale refresh requests a new jwt
+        self.assertTrue(self.api_handler.refresh_jwt('renewed'))
+        self.assertEqual(mock.call_count, 2)
+        with patch.object(ApiHandler, 'JWT_COALESCE', 0):
+            self.assertTrue(self.api_handler.refresh_jwt('renewed'))
+        self.assertEqual(mock.call_count, 3)
         # test connection error handle
         for exc in [TimeoutError, KeyError]:
             with self.subTest("Testing Exception: {}".format(exc)):
                 mock.side_effect = exc
-                self.assertFalse(self.api_handler.refresh_jwt())
+                self.assertFalse(self.api_handler.refresh_jwt('rejected'))
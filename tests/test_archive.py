@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Unittests for Telemetry Archive
+===============================
+Date: 2026-10
+
+Dependencies:
+-------------
+```
+import os
+import logging
+import unittest
+import tempfile
+import numpy as np
+from monitor.models.icb import ICB
+from monitor.environment.archive import TelemetryArchive
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import os
+import logging
+import unittest
+import tempfile
+import numpy as np
+from monitor.models.icb import ICB
+from monitor.environment.archive import TelemetryArchive
+
+# bucket aligned epoch (multiple of one day)
+EPOCH = 1620000000.0 - 1620000000.0 % (24 * 60 * 60)
+
+
+def frame(tc: float) -> ICB:
+    icb = ICB()
+    icb.tc = tc
+    return icb
+
+
+class TestTelemetryArchive(unittest.TestCase):
+
+    def setUp(self) -> None:
+        logging.disable()
+        self._dir = tempfile.TemporaryDirectory()
+        self.archive = TelemetryArchive(path=self._dir.name)
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_raw(self):
+        """
+        Test frames are downsampled to the raw sampling interval
+        """
+        for i in range(20):
+            self.archive.record(frame(30.0 + i / 10), timestamp=EPOCH + i)
+        records = self.archive.read(TelemetryArchive.RAW)
+        np.testing.assert_array_equal(records['time'], EPOCH + np.arange(0, 20, 5))
+        self.assertAlmostEqual(float(records['values'][1, 0]), 30.5, places=5)
+        self.assertTrue(np.isnan(records['values'][0, 1]))
+        self.assertEqual(len(self.archive.read(TelemetryArchive.RAW, start=EPOCH + 5, end=EPOCH + 15)), 2)
+
+    def test_aggregates(self):
+        """
+        Test minute and long tier aggregates are flushed when their bucket rolls over
+        """
+        for i in range(0, 16 * 60, 10):
+            self.archive.record(frame(30.0 + (i % 60) / 10), 'exp', timestamp=EPOCH + i)
+        minutes = self.archive.read(TelemetryArchive.MINUTE)
+        self.assertEqual(len(minutes), 15)
+        self.assertEqual(minutes['count'][0], 6)
+        self.assertAlmostEqual(float(minutes['mean'][0, 0]), 32.5, places=5)
+        self.assertAlmostEqual(float(minutes['min'][0, 0]), 30.0, places=5)
+        self.assertAlmostEqual(float(minutes['max'][0, 0]), 35.0, places=5)
+        self.assertTrue(np.isnan(minutes['mean'][0, 1]))
+        long = self.archive.read(TelemetryArchive.LONG, experiment_id='exp')
+        self.assertEqual(len(long), 1)
+        self.assertEqual(long['count'][0], 90)
+        self.assertEqual(self.archive.segments(TelemetryArchive.LONG), ['exp'])
+        # an experiment change closes the long bucket
+        self.archive.record(frame(30.0), timestamp=EPOCH + 16 * 60 + 10)
+        self.archive.record(frame(30.0), timestamp=EPOCH + 16 * 60 + 20)
+        self.assertEqual(len(self.archive.read(TelemetryArchive.LONG, experiment_id='exp')), 2)
+
+    def test_retention(self):
+        """
+        Test expired raw segments are pruned and torn trailing records are ignored
+        """
+        self.archive.record(frame(30.0), timestamp=EPOCH)
+        self.archive.record(frame(30.0), timestamp=EPOCH + TelemetryArchive.RAW_SEGMENT)
+        self.assertEqual(len(self.archive.segments(TelemetryArchive.RAW)), 2)
+        self.archive.record(frame(30.0), timestamp=EPOCH + TelemetryArchive.RAW_RETENTION + TelemetryArchive.RAW_SEGMENT)
+        self.assertEqual(self.archive.segments(TelemetryArchive.RAW), [
+            str(int(EPOCH + TelemetryArchive.RAW_SEGMENT)),
+            str(int(EPOCH + TelemetryArchive.RAW_RETENTION + TelemetryArchive.RAW_SEGMENT))
+        ])
+        segment = self.archive.segments(TelemetryArchive.RAW)[-1]
+        with open(os.path.join(self._dir.name, TelemetryArchive.RAW, segment + '.bin'), 'ab') as fp:
+            fp.write(b'\x00' * 7)
+        self.assertEqual(len(self.archive.open(TelemetryArchive.RAW, segment)), 1)
+        # the torn record is truncated before the next append so later records stay aligned
+        later = EPOCH + TelemetryArchive.RAW_RETENTION + TelemetryArchive.RAW_SEGMENT + TelemetryArchive.RAW_INTERVAL
+        self.archive.record(frame(31.0), timestamp=later)
+        records = self.archive.open(TelemetryArchive.RAW, segment)
+        self.assertEqual(records['time'][-1], later)
+        self.assertAlmostEqual(float(records['values'][-1, 0]), 31.0, places=5)
+
+    def test_flush(self):
+        """
+        Test the open aggregates are written on flush
+        """
+        self.archive.record(frame(30.0), 'exp', timestamp=EPOCH)
+        self.archive.record(frame(32.0), 'exp', timestamp=EPOCH + 10)
+        self.assertEqual(len(self.archive.read(TelemetryArchive.MINUTE)), 0)
+        self.archive.flush()
+        minutes = self.archive.read(TelemetryArchive.MINUTE)
+        self.assertEqual(minutes['count'].tolist(), [2])
+        self.assertAlmostEqual(float(minutes['mean'][0, 0]), 31.0, places=5)
+        self.assertEqual(self.archive.read(TelemetryArchive.LONG, experiment_id='exp')['count'].tolist(), [2])
+        # nothing is left to flush
+        self.archive.flush()
+        self.assertEqual(len(self.archive.read(TelemetryArchive.MINUTE)), 1)
+
+    def test_long_retention(self):
+        """
+        Test long segments of inactive experiments are pruned once they expire
+        """
+        retention = TelemetryArchive.LONG_RETENTION
+        interval = TelemetryArchive.LONG_INTERVAL
+        for i, experiment in enumerate(('-1', 'old', 'running')):
+            self.archive.record(frame(30.0), experiment, timestamp=EPOCH + i * interval)
+        self.assertEqual(self.archive.segments(TelemetryArchive.LONG), ['-1', 'old'])
+        # the daily prune drops expired inactive segments but keeps the running experiment
+        later = EPOCH + retention + 10 * interval
+        self.archive.record(frame(30.0), 'running', timestamp=later)
+        self.archive.record(frame(30.0), 'running', timestamp=later + interval)
+        self.assertEqual(self.archive.segments(TelemetryArchive.LONG), ['running'])
+        self.assertEqual(len(self.archive.read(TelemetryArchive.LONG, experiment_id='running')), 2)
+        # the no experiment segment is reused so only its expired records are trimmed
+        for i in range(3):
+            self.archive.record(frame(30.0), '-1', timestamp=later + (2 + i) * interval)
+        self.archive._prune_long('-1', later + 3 * interval)
+        self.assertEqual(self.archive.segments(TelemetryArchive.LONG), ['-1'])
+        np.testing.assert_array_equal(self.archive.read(TelemetryArchive.LONG, experiment_id='-1')['time'],
+                                      [later + 3 * interval])
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest for AsyncApiHandler
+============================
+Date: 2026-10
+
+Dependencies:
+-------------
+```
+import json
+import time
+import asyncio
+import logging
+import unittest
+import warnings
+import threading
+from unittest.mock import AsyncMock, Mock, patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from monitor.models.device import Device
+from monitor.api.async_handler import AsyncApiHandler
+from monitor.environment.state_manager import StateManager
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import json
+import time
+import asyncio
+import logging
+import unittest
+import warnings
+import threading
+from unittest.mock import AsyncMock, Mock, patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from monitor.models.device import Device
+from monitor.api.async_handler import AsyncApiHandler
+from monitor.environment.state_manager import StateManager
+
+VALID_JWT = 'valid'
+
+
+class _StubApi(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    device: Mock
+    connections: set
+    closed: set
+    uploads: list
+    jwt_requests: list
+
+    def log_message(self, *args) -> None: ...
+
+    def finish(self) -> None:
+        super().finish()
+        self.closed.add(self.client_address)
+
+    def reply(self, status: int, payload: object = None, content: bytes = None, chunked: bool = False) -> None:
+        body = json.dumps(payload).encode() if content is None else content
+        self.send_response(status)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for i in range(0, len(body), 4):
+                chunk = body[i:i + 4]
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+        else:
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self.connections.add(self.client_address)
+        if self.path == '/v1/devices/1/get_device_jwt':
+            self.jwt_requests.append(self.path)
+            # the new jwt is delivered to the device state out of band (mqtt)
+            self.device.jwt = VALID_JWT
+            return self.reply(200, {'message': 'dispatched'})
+        if self.path == '/images/1':
+            return self.reply(200, content=b'\x89PNG image', chunked=True)
+        if self.path == '/v1/protocols/99':
+            time.sleep(0.5)
+        if self.headers.get('Authorization') != VALID_JWT:
+            return self.reply(401, {'message': 'unauthorized'})
+        if self.path == '/v1/experiments/1/images/thumbnail':
+            return self.reply(200, {'phase_path': 'http://{}:{}/images/1'.format(*self.server.server_address)})
+        if self.path.startswith('/v1/protocols/'):
+            return self.reply(200, {'id': int(self.path.split('/')[-1])})
+        if self.path == '/v1/devices/1':
+            return self.reply(200, {'id': 1, 'name': 'iris'})
+        self.reply(404, {'message': 'not found'})
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if self.path == '/v1/experiments/7/images':
+            # the post is processed but the connection drops before the response
+            self.uploads.append((self.headers['Content-Type'], body))
+            self.close_connection = True
+            return
+        if self.path == '/v1/experiments/99/images':
+            time.sleep(0.5)
+        if self.headers.get('Authorization') != VALID_JWT:
+            return self.reply(401, {'message': 'unauthorized'})
+        self.uploads.append((self.headers['Content-Type'], body))
+        self.reply(200, {'image_id': 5})
+
+
+class TestAsyncApiHandler(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable()
+        self.device = Mock(spec=Device)
+        self.device.id = 1
+        self.device.jwt = VALID_JWT
+        self.device.jwt_payload = {'csrf': 'token'}
+        stub = type('StubApi', (_StubApi,), {'device': self.device, 'connections': set(), 'closed': set(), 'uploads': [], 'jwt_requests': []})
+        self.stub = stub
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), stub)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.handler = AsyncApiHandler('http://{}:{}'.format(host, port), '/v1')
+        self.state = patch.object(StateManager, '__enter__', return_value=Mock(device=self.device))
+        self.state.start()
+
+    def tearDown(self):
+        self.state.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        logging.disable(logging.NOTSET)
+
+    def run_async(self, coroutine):
+        async def run():
+            try:
+                return await coroutine
+            finally:
+                await self.handler.close()
+        return asyncio.run(run())
+
+    def test_get(self):
+        """
+        Test json and image requests including a chunked response
+        """
+        self.assertEqual(self.run_async(self.handler.get_protocol(3)), {'id': 3})
+        self.assertEqual(self.run_async(self.handler.get_exp_thumbnail(1)), b'\x89PNG image')
+
+    def test_concurrent_requests(self):
+        """
+        Test concurrent requests share a bounded set of kept alive connections on one loop
+        """
+        async def fetch():
+            protocols = await asyncio.gather(*(self.handler.get_protocol(i) for i in range(20)))
+            return protocols, [len(idle) for idle in self.handler._pool._idle.values()]
+        protocols, idle = self.run_async(fetch())
+        self.assertEqual([protocol['id'] for protocol in protocols], list(range(20)))
+        self.assertLessEqual(self.handler._pool.opened, AsyncApiHandler.MAX_CONNECTIONS)
+        self.assertEqual(len(self.stub.connections), self.handler._pool.opened)
+        self.assertEqual(idle, [AsyncApiHandler.IDLE_CONNECTIONS])
+        # only a bounded number of connections per host are kept alive
+        self.handler._pool.idle = 1
+        _, idle = self.run_async(fetch())
+        self.assertEqual(idle, [1])
+
+    def test_loop_change(self):
+        """
+        Test the idle connections of a closed loop are closed when the handler moves to a new loop
+        """
+        self.assertEqual(asyncio.run(self.handler.get_protocol(1)), {'id': 1})
+        first = set(self.stub.connections)
+        # hold the transports so they are not released by garbage collection
+        idle = [writer for connections in self.handler._pool._idle.values() for _, writer in connections]
+        self.assertEqual(self.run_async(self.handler.get_protocol(2)), {'id': 2})
+        self.assertEqual(self.handler._pool.opened, 2)
+        deadline = time.monotonic() + 5
+        while not first <= self.stub.closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertLessEqual(first, self.stub.closed)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', ResourceWarning)
+            del idle
+
+    def test_post_img(self):
+        """
+        Test multipart image posts
+        """
+        image_id = self.run_async(self.handler.post_img({'type': 'DPC_0', 'image_id': None}, 1, b'\x00' * 1024))
+        self.assertEqual(image_id, 5)
+        content_type, body = self.stub.uploads[0]
+        self.assertTrue(content_type.startswith('multipart/form-data; boundary='))
+        self.assertIn(b'name="data"\r\n\r\n{"type": "DPC_0", "image_id": null}', body)
+        self.assertIn(b'filename="media"\r\n\r\n' + b'\x00' * 1024 + b'\r\n--', body)
+
+    def test_no_repost(self):
+        """
+        Test a post which failed after it was written on a kept alive connection is not resent
+        """
+        async def post():
+            await self.handler.get_protocol(1)
+            await self.handler.post_img({}, 7, b'')
+        with self.assertRaises(ConnectionError):
+            self.run_async(post())
+        self.assertEqual(len(self.stub.uploads), 1)
+
+    @patch('asyncio.sleep', new_callable=AsyncMock)
+    def test_jwt_refresh(self, sleep: AsyncMock):
+        """
+        Test a 401 refreshes the jwt and the request is retried with backoff
+        """
+        self.device.jwt = 'expired'
+        self.assertEqual(self.run_async(self.handler.get_device_info()), {'id': 1, 'name': 'iris'})
+        sleep.assert_awaited_once_with(2)
+        # the jwt refresh is requested but never delivered (the rejected jwt is refreshed again)
+        self.device.jwt = 'expired'
+        with patch.object(AsyncApiHandler, 'request_session_token', new_callable=AsyncMock) as request:
+            with self.assertRaises(ReferenceError):
+                self.run_async(self.handler.get_protocol(1))
+        request.assert_not_awaited()
+        # refresh failure
+        self.device.jwt = 'rejected'
+        with patch.object(AsyncApiHandler, 'request_session_token', new_callable=AsyncMock, side_effect=TimeoutError):
+            with self.assertRaises(ConnectionError):
+                self.run_async(self.handler.get_protocol(1))
+
+    @patch('asyncio.sleep', new_callable=AsyncMock)
+    def test_jwt_coalesce(self, sleep: AsyncMock):
+        """
+        Test concurrent 401s of the same jwt share one jwt request
+        """
+        self.device.jwt = 'expired'
+        async def fetch():
+            return await asyncio.gather(*(self.handler.get_protocol(i) for i in range(5)))
+        protocols = self.run_async(fetch())
+        self.assertEqual([protocol['id'] for protocol in protocols], list(range(5)))
+        self.assertEqual(len(self.stub.jwt_requests), 1)
+
+    @patch('asyncio.sleep', new_callable=AsyncMock)
+    def test_exceptions(self, sleep: AsyncMock):
+        """
+        Test transport failures are raised as the blocking handler exceptions
+        """
+        # timeouts
+        with patch.object(AsyncApiHandler, 'GET_TIMEOUT', 0.1):
+            with self.assertRaises(ConnectionError):
+                self.run_async(self.handler.get_protocol(99))
+        with patch.object(AsyncApiHandler, 'POST_TIMEOUT', 0.1):
+            with self.assertRaises(TimeoutError):
+                self.run_async(self.handler.post_img({}, 99, b''))
+        sleep.assert_awaited_once_with(2)
+        # unknown resource
+        with self.assertRaises(ConnectionError):
+            self.run_async(self.handler._get_resource('/missing', 'missing', refresh_failure=True))
+        # connection refused
+        self.server.shutdown()
+        self.server.server_close()
+        with self.assertRaises(ConnectionError):
+            self.run_async(self.handler.get_protocol(1))
+        with self.assertRaises(ConnectionError):
+            self.run_async(self.handler.post_img({}, 1, b''))
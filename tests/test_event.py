@@ -8,8 +8,10 @@ Dependencies:
 -------------
 ```
 import unittest
+import threading
 from unittest.mock import Mock
 from monitor.events.event import Event
+from monitor.events.dispatch import Dispatcher
 ```
 Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
@@ -18,8 +20,10 @@ Proprietary and confidential
 
 import logging
 import unittest
+import threading
 from unittest.mock import Mock
 from monitor.events.event import Event
+from monitor.events.dispatch import Dispatcher
 
 
 class TestEvents(unittest.TestCase):
@@ -29,6 +33,7 @@ class TestEvents(unittest.TestCase):
         self.event = Event("TEST_EVENT")
 
     def tearDown(self):
+        Dispatcher.detach_ui()
         del self.event
         logging.disable(logging.NOTSET)
 
@@ -77,3 +82,120 @@ class TestEvents(unittest.TestCase):
         callback.reset_mock()
         callback.side_effect = Exception
         self.event.trigger(*test_args)
+
+    def test_register_mode(self):
+        """
+        Test dispatch mode registration
+        """
+        def fn(_): return None
+        self.event.register(fn)
+        self.assertEqual(self.event.registry[0][3], Event.INLINE)
+        self.event.register(fn, mode=Event.WORKER)
+        self.assertEqual(self.event.registry[1][3], Event.WORKER)
+        with self.assertRaises(ValueError):
+            self.event.register(fn, mode='bogus')
+
+    def test_worker_dispatch(self):
+        """
+        Test worker callbacks run off the triggering thread without blocking the trigger
+        """
+        release = threading.Event()
+        threads = []
+        def slow(_):
+            release.wait(5)
+            threads.append(threading.current_thread().name)
+        self.event.register(slow, mode=Event.WORKER)
+        self.event.trigger(1)
+        # trigger returned while the callback is still blocked
+        self.assertEqual(threads, [])
+        release.set()
+        self.assertTrue(Dispatcher.join(timeout=5))
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('event-worker'))
+        # worker exceptions are contained
+        self.event.register(Mock(side_effect=Exception), mode=Event.WORKER)
+        self.event.trigger(1)
+        self.assertTrue(Dispatcher.join(timeout=5))
+
+    def test_serial_dispatch(self):
+        """
+        Test serial callbacks of separate events run one at a time in trigger order
+        """
+        first, second = Event('first'), Event('second')
+        release = threading.Event()
+        calls = []
+        def slow(value):
+            release.wait(5)
+            calls.append((value, threading.current_thread().name))
+        first.register(slow, mode=Event.SERIAL)
+        second.register(lambda value: calls.append((value, threading.current_thread().name)), mode=Event.SERIAL)
+        first.trigger('first')
+        second.trigger('second')
+        # the second callback waits behind the first even though it is queued on another event
+        self.assertEqual(calls, [])
+        release.set()
+        self.assertTrue(Dispatcher.join(timeout=5))
+        self.assertEqual(calls, [('first', 'event-serial'), ('second', 'event-serial')])
+
+    def test_ui_dispatch(self):
+        """
+        Test ui callbacks are marshalled onto the ui thread in priority order
+        """
+        calls = []
+        def low(value): calls.append(('low', value, threading.get_ident()))
+        def high(value): calls.append(('high', value, threading.get_ident()))
+        self.event.register(low, 1, mode=Event.UI)
+        # no ui thread attached: ui callbacks run inline
+        self.event.trigger(0)
+        self.assertEqual(calls, [('low', 0, threading.get_ident())])
+        calls.clear()
+        Dispatcher.attach_ui()
+        # triggered from another thread: queued until the ui thread drains
+        trigger = threading.Thread(target=self.event.trigger, args=(1,))
+        trigger.start()
+        trigger.join()
+        self.assertEqual(calls, [])
+        self.event.register(high, 0, mode=Event.UI)
+        trigger = threading.Thread(target=self.event.trigger, args=(2,))
+        trigger.start()
+        trigger.join()
+        self.assertEqual(Dispatcher.pending()[1], 3)
+        self.assertEqual(Dispatcher.drain(budget=float('inf')), 3)
+        # priority 0 callbacks from the later trigger run ahead of queued priority 1 callbacks
+        self.assertEqual([call[:2] for call in calls], [('high', 2), ('low', 1), ('low', 2)])
+        self.assertTrue(all(call[2] == threading.get_ident() for call in calls))
+        # triggered on the ui thread: inline
+        calls.clear()
+        self.event.trigger(3)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(Dispatcher.pending()[1], 0)
+
+    def test_register_order(self):
+        """
+        Test callbacks keep registration order within a priority
+        """
+        callbacks = [Mock(return_value=None) for _ in range(6)]
+        for i, callback in enumerate(callbacks):
+            self.event.register(callback, priority=i % 3)
+        self.assertEqual(
+            [entry[0] for entry in self.event.registry],
+            [callbacks[0], callbacks[3], callbacks[1], callbacks[4], callbacks[2], callbacks[5]]
+        )
+        self.assertEqual([entry[1] for entry in self.event.registry], [0, 0, 1, 1, 2, 2])
+
+    def test_shared_condition(self):
+        """
+        Test grouped callbacks evaluate their shared condition once per trigger and event counters
+        """
+        condition = Mock(return_value=False)
+        callbacks = [Mock(return_value=None) for _ in range(3)]
+        self.event.register_group(callbacks, condition)
+        self.event.register(Mock(return_value=None))
+        self.event.trigger(1)
+        condition.assert_called_once_with(1)
+        for callback in callbacks: callback.assert_not_called()
+        condition.return_value = True
+        self.event.trigger(2)
+        self.assertEqual(condition.call_count, 2)
+        for callback in callbacks: callback.assert_called_once_with(2)
+        self.assertEqual(self.event.stats(), {'callbacks': 4, 'fired': 2, 'masked': 3})
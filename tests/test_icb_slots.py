@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Unittests for ICB Slots
+=======================
+Date: 2026-10
+
+Dependencies:
+-------------
+```
+import copy
+import unittest
+from monitor.models.icb import ICB
+from tests.resources import icb as resources
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import copy
+import unittest
+from monitor.models.icb import ICB
+from tests.resources import icb as resources
+
+
+class TestICBSlots(unittest.TestCase):
+
+    def setUp(self):
+        """
+        """
+        self.icb = ICB()
+        for key, value in resources.ICB_MODEL.items():
+            setattr(self.icb, key, value)
+
+    def test_initialized(self):
+        """
+        Test the initialization bitmask tracks every sensorframe reading
+        """
+        icb = ICB()
+        self.assertFalse(icb.initialized)
+        self.assertFalse(hasattr(icb, '_tc_set'))
+        # out of range readings do not set their bit
+        icb.tc = 200.0
+        self.assertFalse(icb._mask & ICB.TC_SET)
+        icb.tc = 36.6
+        self.assertTrue(icb._mask & ICB.TC_SET)
+        self.assertTrue(self.icb.initialized)
+
+    def test_copy(self):
+        """
+        Test snapshot copies carry slot values and are independent of the source
+        """
+        clone = copy.deepcopy(self.icb)
+        self.assertTrue(clone.initialized)
+        self.assertEqual(clone.serialize(), self.icb.serialize())
+        clone.tc = 30.0
+        self.assertEqual(self.icb.tc, 36.6)
+        # unset readings remain unset on the copy
+        self.assertFalse(hasattr(copy.deepcopy(ICB()), '_tc'))
+
+    def test_diff(self):
+        """
+        Test diff compares slot values
+        """
+        edit = self.icb.edit()
+        self.assertEqual(self.icb.diff(edit), set())
+        edit.tp = 36.0
+        edit.fp = 50
+        self.assertEqual(self.icb.diff(edit), {'tp', 'fp'})
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Unittests for Metrics
+=====================
+Date: 2026-10
+
+Dependencies:
+-------------
+```
+import json
+import logging
+import tempfile
+import unittest
+import threading
+from unittest.mock import Mock
+from monitor.metrics.exporter import MetricsExporter
+from monitor.metrics.registry import Histogram, MetricsRegistry as metrics
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import json
+import logging
+import tempfile
+import unittest
+import threading
+from unittest.mock import Mock
+from monitor.metrics.exporter import MetricsExporter
+from monitor.metrics.registry import Histogram, MetricsRegistry as metrics
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable()
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_counter(self):
+        """
+        Test counters are shared by name and safe across threads
+        """
+        counter = metrics.counter('test.counter')
+        self.assertIs(metrics.counter('test.counter'), counter)
+        def work():
+            for _ in range(10000): counter.inc()
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertEqual(counter.snapshot(), 40000)
+        self.assertEqual(metrics.snapshot()['counters']['test.counter'], 40000)
+
+    def test_gauge(self):
+        """
+        Test set and sampled gauges
+        """
+        gauge = metrics.gauge('test.gauge')
+        gauge.set(3)
+        gauge.inc()
+        gauge.dec(2)
+        self.assertEqual(gauge.snapshot(), 2)
+        depth = [5]
+        metrics.gauge('test.sampled', fn=lambda: depth[0])
+        depth[0] = 7
+        self.assertEqual(metrics.snapshot()['gauges']['test.sampled'], 7)
+        metrics.gauge('test.broken', fn=lambda: 1 / 0)
+        self.assertNotEqual(metrics.snapshot()['gauges']['test.broken'], 0)
+
+    def test_histogram(self):
+        """
+        Test bucket assignment, quantiles and timing
+        """
+        histogram = Histogram('test', bounds=(1.0, 2.0, 4.0))
+        for value in (0.5, 1.0, 1.5, 3.0, 10.0):
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['counts'], [2, 1, 1, 1])
+        self.assertEqual(snapshot['count'], 5)
+        self.assertEqual(snapshot['sum'], 16.0)
+        self.assertEqual(snapshot['max'], 10.0)
+        self.assertEqual(histogram.quantile(0.4), 1.0)
+        self.assertEqual(histogram.quantile(0.5), 2.0)
+        self.assertEqual(histogram.quantile(1.0), 10.0)
+        self.assertEqual(Histogram('empty').quantile(0.5), 0.0)
+        timed = metrics.histogram('test.timed')
+        with self.assertRaises(ValueError):
+            with timed.time():
+                raise ValueError
+        self.assertEqual(timed.snapshot()['count'], 1)
+
+    def test_collector(self):
+        """
+        Test collectors are included in snapshots and failures are contained
+        """
+        metrics.collector('test.collector', lambda: {'value': 1})
+        metrics.collector('test.failing', Mock(side_effect=RuntimeError))
+        collected = metrics.snapshot()['collectors']
+        self.assertEqual(collected['test.collector'], {'value': 1})
+        self.assertNotIn('test.failing', collected)
+
+
+class TestMetricsExporter(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = Mock()
+        self.exporter = MetricsExporter(path=self.tmp.name + '/metrics.jsonl', client=self.client)
+
+    def tearDown(self):
+        self.exporter.close()
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_export(self):
+        """
+        Test snapshots are appended as json lines and published
+        """
+        metrics.counter('test.exported').inc()
+        self.exporter.export()
+        self.exporter.export()
+        with open(self.exporter.path) as fp:
+            lines = [json.loads(line) for line in fp]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]['type'], 'metrics')
+        self.assertEqual(lines[0]['counters']['test.exported'], 1)
+        self.assertEqual(self.client.publish.call_count, 2)
+        # amqp failures do not prevent the file export
+        self.client.publish.side_effect = OSError
+        self.exporter.export()
+        with open(self.exporter.path) as fp:
+            self.assertEqual(len(fp.readlines()), 3)
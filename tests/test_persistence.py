@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+Unittests for Cache Writer
+==========================
+Date: 2026-10
+
+Dependencies:
+-------------
+```
+import os
+import json
+import time
+import logging
+import unittest
+import tempfile
+import threading
+from unittest.mock import patch
+from typing import Any, Dict
+from monitor.models.device import Device
+from monitor.models.state import StateModel
+from monitor.environment.registry import StateRegistry as sr
+from monitor.environment.state_manager import StateManager
+from monitor.environment.persistence import CacheWriter, CommitJournal, SnapshotStore
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import os
+import json
+import time
+import logging
+import unittest
+import tempfile
+import threading
+from unittest.mock import patch
+from typing import Any, Dict
+from monitor.models.device import Device
+from monitor.models.state import StateModel
+from monitor.environment.registry import StateRegistry as sr
+from monitor.environment.state_manager import StateManager
+from monitor.environment.persistence import CacheWriter, CommitJournal, SnapshotStore
+
+
+class Model(StateModel):
+
+    def __init__(self, value: int = 0) -> None:
+        super().__init__(_id=1, filename='model.json')
+        self.value = value
+
+    def serialize(self) -> Dict[str, Any]:
+        return {'id': self.id, 'value': self.value}
+
+    def deserialize(self, **kwargs) -> None:
+        self.value = kwargs['value']
+
+
+class TestCacheWriter(unittest.TestCase):
+
+    def setUp(self) -> None:
+        logging.disable()
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'model.json')
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def snapshot(self, value: int) -> Model:
+        model = Model(value)
+        model.cache_path = self.path
+        return model.snapshot()
+
+    def test_cache_path(self):
+        """
+        Test models and copies are constructed without filesystem access and the cache directory is
+        created once at first cache
+        """
+        with patch('os.makedirs') as makedirs:
+            model = Model(1)
+            model.edit()
+            makedirs.assert_not_called()
+        self.assertEqual(model.cache_path, Model().cache_path)
+        model.cache_path = os.path.join(self._dir.name, 'nested', 'model.json')
+        with patch('os.makedirs', wraps=os.makedirs) as makedirs:
+            model.cache()
+            model.cache()
+            makedirs.assert_called_once()
+        self.assertTrue(os.path.isfile(model.cache_path))
+
+    def test_cache_atomic(self):
+        """
+        Test cache files are replaced atomically and an interrupted write keeps the previous file
+        """
+        self.snapshot(1).cache(fsync=True)
+        with patch('json.dump', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                self.snapshot(2).cache()
+        with open(self.path) as fp:
+            self.assertEqual(json.load(fp), {'id': 1, 'value': 1})
+        self.assertEqual(os.listdir(self._dir.name), ['model.json'])
+
+    def test_coalesce(self):
+        """
+        Test repeated commits of a model within the debounce window are written once
+        """
+        writer = CacheWriter(debounce=0.2, fsync=False, snapshot=False)
+        with patch.object(Model, 'cache', autospec=True) as cache:
+            for value in range(5):
+                writer.submit(self.snapshot(value))
+            self.assertTrue(writer.flush(timeout=5))
+            cache.assert_called_once()
+            self.assertEqual(cache.call_args[0][0].value, 4)
+
+    def test_stale_submit(self):
+        """
+        Test a snapshot submitted after a newer commit of the same model is not written
+        """
+        writer = CacheWriter(debounce=60, fsync=False, snapshot=False)
+        writer.submit(self.snapshot(2), seq=2)
+        writer.submit(self.snapshot(1), seq=1)
+        self.assertTrue(writer.flush(timeout=5))
+        writer.submit(self.snapshot(1), seq=1)
+        self.assertTrue(writer.flush(timeout=5))
+        with open(self.path) as fp:
+            self.assertEqual(json.load(fp)['value'], 2)
+
+    def test_flush(self):
+        """
+        Test pending snapshots reach disk on flush
+        """
+        writer = CacheWriter(debounce=60, fsync=False, snapshot=False)
+        writer.submit(self.snapshot(7))
+        self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(writer.flush(timeout=5))
+        with open(self.path) as fp:
+            self.assertEqual(json.load(fp)['value'], 7)
+        # flush without a writer thread writes on the calling thread
+        writer = CacheWriter(fsync=False, snapshot=False)
+        writer._pending[self.path] = self.snapshot(8)
+        self.assertTrue(writer.flush())
+        with open(self.path) as fp:
+            self.assertEqual(json.load(fp)['value'], 8)
+
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self) -> None:
+        logging.disable()
+        self._dir = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(path=os.path.join(self._dir.name, SnapshotStore.FILENAME))
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_save_load(self):
+        """
+        Test models round trip through the snapshot file keyed by cache filename
+        """
+        self.assertIsNone(self.store.load())
+        self.store.save([Model(3).snapshot()], fsync=True)
+        self.assertEqual(self.store.load(), {'model.json': {'id': 1, 'value': 3}})
+
+    def test_corrupt(self):
+        """
+        Test truncated, corrupted and foreign version snapshots are rejected
+        """
+        self.store.save([Model(3)])
+        with open(self.store.path, 'rb') as fp:
+            data = fp.read()
+        for corrupt in (data[:5], data[:-1] + bytes([data[-1] ^ 1]),
+                        SnapshotStore.HEADER.pack(SnapshotStore.MAGIC, 99, 0) + data[SnapshotStore.HEADER.size:]):
+            with open(self.store.path, 'wb') as fp:
+                fp.write(corrupt)
+            self.assertIsNone(self.store.load())
+
+    @patch('monitor.environment.state_manager.read_lab_id', return_value='lab')
+    @patch('monitor.environment.state_manager.write_lab_id')
+    def test_restore(self, *_):
+        """
+        Test boot restores runtime models from the snapshot and migrates json caches into it
+        """
+        saved = sr.device.snapshot, sr.protocol.snapshot, sr.experiment.snapshot, sr.imaging_profile.snapshot
+        writer = StateManager.writer
+        StateManager.writer = CacheWriter(fsync=False)
+        StateManager.writer.store = self.store
+        StateManager.writer.journal = CommitJournal(path=os.path.join(self._dir.name, CommitJournal.FILENAME))
+        try:
+            device = Device()
+            device.lab_id = 'lab'
+            self.store.save([device, saved[1], saved[2], saved[3]])
+            with patch.object(Device, 'load') as load:
+                with StateManager() as state:
+                    state._load_runtime_models()
+                    self.assertEqual(state.device.lab_id, 'lab')
+                load.assert_not_called()
+            # json fallback when the snapshot is unavailable, then migrated
+            os.remove(self.store.path)
+            with patch.object(Device, 'load') as load:
+                with StateManager() as state:
+                    state._load_runtime_models()
+                load.assert_called_once()
+            self.assertIsNotNone(self.store.load())
+            # journaled commits are replayed over the snapshot then compacted into it
+            device = Device()
+            device.lab_id = 'journaled'
+            StateManager.writer.journal.append(device)
+            with StateManager() as state:
+                state._load_runtime_models()
+                self.assertEqual(state.device.lab_id, 'journaled')
+            self.assertEqual(StateManager.writer.journal.size(), 0)
+            self.assertEqual(self.store.load()['device.json']['lab_id'], 'journaled')
+            # commits which skip the cache are not persisted into the store either
+            with StateManager() as state:
+                device = state.device.edit()
+                device.lab_id = 'transient'
+                state.commit(device, cache=False)
+                StateManager.writer.save_snapshot()
+            self.assertEqual(self.store.load()['device.json']['lab_id'], 'journaled')
+        finally:
+            StateManager.writer = writer
+            for slot, snapshot in zip((sr.device, sr.protocol, sr.experiment, sr.imaging_profile), saved):
+                slot.swap(snapshot)
+
+
+class TestCommitJournal(unittest.TestCase):
+
+    def setUp(self) -> None:
+        logging.disable()
+        self._dir = tempfile.TemporaryDirectory()
+        self.journal = CommitJournal(path=os.path.join(self._dir.name, CommitJournal.FILENAME))
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_replay(self):
+        """
+        Test journaled commits replay in order and torn trailing records are discarded
+        """
+        self.assertEqual(self.journal.replay(), [])
+        for value in range(3):
+            self.journal.append(Model(value), value + 1)
+        self.assertEqual(self.journal.replay(), [('model.json', v + 1, {'id': 1, 'value': v}) for v in range(3)])
+        with open(self.journal.path, 'ab') as fp:
+            fp.write(CommitJournal.RECORD.pack(100, 0) + b'{"file"')
+        self.assertEqual(len(self.journal.replay()), 3)
+
+    def test_compact(self):
+        """
+        Test compaction drops the snapshotted prefix and keeps later commits
+        """
+        self.journal.append(Model(1))
+        offset = self.journal.size()
+        self.journal.append(Model(2))
+        self.journal.compact(offset)
+        self.assertEqual(self.journal.replay(), [('model.json', None, {'id': 1, 'value': 2})])
+        # appends continue after compaction
+        self.journal.append(Model(3))
+        self.assertEqual(len(self.journal.replay()), 2)
+
+    def replayed(self, count: int, timeout: float = 5.0) -> list:
+        """
+        Wait for the writer thread to journal a number of records
+        """
+        deadline = time.monotonic() + timeout
+        records = self.journal.replay()
+        while len(records) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+            records = self.journal.replay()
+        return records
+
+    def test_submit(self):
+        """
+        Test submitted commits are journaled by the writer thread ahead of the debounced write and
+        compacted by the snapshot
+        """
+        writer = CacheWriter(debounce=60, fsync=False)
+        writer.store = SnapshotStore(path=os.path.join(self._dir.name, SnapshotStore.FILENAME))
+        writer.journal = self.journal
+        model = Model(5)
+        model.cache_path = os.path.join(self._dir.name, 'model.json')
+        journaled = []
+        append = self.journal.append
+        def record(*args):
+            journaled.append(threading.current_thread().name)
+            append(*args)
+        with patch.object(self.journal, 'append', side_effect=record):
+            writer.submit(model.snapshot(), seq=3)
+            self.assertEqual(self.replayed(1), [('model.json', 3, {'id': 1, 'value': 5})])
+        # the commit path never writes to the journal
+        self.assertEqual(journaled, ['cache-writer'])
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(self.journal.replay(), [])
+
+    @patch('monitor.environment.state_manager.read_lab_id', return_value='lab')
+    @patch('monitor.environment.state_manager.write_lab_id')
+    def test_commit_order(self, *_):
+        """
+        Test concurrent commits are journaled in slot sequence order
+        """
+        saved, writer = sr.device.snapshot, StateManager.writer
+        StateManager.writer = CacheWriter(debounce=60, fsync=False, snapshot=False)
+        StateManager.writer.journal = self.journal
+
+        def commit(name: str):
+            with StateManager() as state:
+                for i in range(20):
+                    device = state.device.edit()
+                    device.name = '{}-{}'.format(name, i)
+                    state.commit(device, source=True, wait=False)
+        try:
+            threads = [threading.Thread(target=commit, args=(str(n),)) for n in range(4)]
+            for thread in threads: thread.start()
+            for thread in threads: thread.join()
+            records = self.replayed(80)
+            self.assertEqual(len(records), 80)
+            seqs = [seq for _, seq, _ in records]
+            self.assertEqual(seqs, sorted(seqs))
+            self.assertEqual(records[-1][2]['name'], sr.device.snapshot.name)
+        finally:
+            with patch.object(Device, 'cache'):
+                StateManager.writer.flush(timeout=5)
+            StateManager.writer = writer
+            sr.device.swap(saved)
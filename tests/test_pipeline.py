@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Unittests for Pipeline
+======================
+Date: 2026-10
+
+Dependencies:
+-------------
+```
+import logging
+import unittest
+import threading
+from unittest.mock import Mock
+from monitor.events.pipeline import Pipeline
+from monitor.events.metrics import PipelineMetrics
+from monitor.metrics.registry import MetricsRegistry as metrics
+from monitor.exceptions.event import NoListenersError, PipelineError
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import logging
+import unittest
+import threading
+from unittest.mock import Mock
+from monitor.events.pipeline import Pipeline
+from monitor.events.metrics import PipelineMetrics
+from monitor.metrics.registry import MetricsRegistry as metrics
+from monitor.exceptions.event import NoListenersError, PipelineError
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable()
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_begin(self):
+        """
+        Test stage return values are passed down the pipeline
+        """
+        pipeline = Pipeline("TEST", 3)
+        with self.assertRaises(NoListenersError):
+            pipeline.begin()
+        sink = Mock(return_value=None)
+        pipeline.stage(sink, 0)
+        with self.assertRaises(PipelineError):
+            pipeline.begin()
+        pipeline.stage(lambda a, b: (a, b * 2), 0)
+        pipeline.stage(lambda value, scale=1: (value, value * scale), 0)
+        pipeline.begin(2, scale=3)
+        self.assertTrue(pipeline.join(timeout=5))
+        sink.assert_called_once_with(2, 12)
+        with self.assertRaises(PipelineError):
+            pipeline.stage(sink, 0)
+        self.assertEqual([stage['runs'] for stage in pipeline.stats()], [1, 1, 1])
+
+    def test_exception(self):
+        """
+        Test a failing stage halts only its own run
+        """
+        pipeline = Pipeline("TEST", 2)
+        sink = Mock(return_value=None)
+        def source(value):
+            if value < 0: raise ValueError
+            return value
+        pipeline.stage(source, 0)
+        pipeline.stage(sink, 1)
+        pipeline.begin(-1)
+        pipeline.begin(1)
+        self.assertTrue(pipeline.join(timeout=5))
+        sink.assert_called_once_with(1)
+
+    def test_overlap(self):
+        """
+        Test consecutive runs execute different stages concurrently
+        """
+        pipeline = Pipeline("TEST", 2, capacity=2)
+        uploading = threading.Event()
+        release = threading.Event()
+        captured = []
+        def capture(value):
+            captured.append(value)
+            return value
+        def upload(value):
+            uploading.set()
+            release.wait(5)
+        pipeline.stage(capture, 0)
+        pipeline.stage(upload, 1)
+        pipeline.begin(1)
+        self.assertTrue(uploading.wait(5))
+        # the second capture completes while the first upload is still blocked
+        pipeline.begin(2)
+        self.assertFalse(pipeline.join(timeout=0.2))
+        self.assertEqual(captured, [1, 2])
+        release.set()
+        self.assertTrue(pipeline.join(timeout=5))
+
+    def test_drop_oldest(self):
+        """
+        Test the drop oldest policy evicts superseded queued runs
+        """
+        pipeline = Pipeline("TEST", 1, policy=Pipeline.DROP_OLDEST)
+        started = threading.Event()
+        release = threading.Event()
+        seen = []
+        def stage(value):
+            seen.append(value)
+            started.set()
+            release.wait(5)
+        pipeline.stage(stage, 0)
+        pipeline.begin(1)
+        self.assertTrue(started.wait(5))
+        for value in (2, 3, 4):
+            pipeline.begin(value)
+        release.set()
+        self.assertTrue(pipeline.join(timeout=5))
+        self.assertEqual(seen, [1, 4])
+        self.assertEqual(pipeline.stats()[0]['dropped'], 2)
+
+    def test_drop_keyed(self):
+        """
+        Test the drop oldest policy evicts queued runs of the same request first and never blocks
+        """
+        pipeline = Pipeline("TEST", 1, capacity=2, policy=Pipeline.DROP_OLDEST, key=lambda value: value % 2)
+        started = threading.Event()
+        release = threading.Event()
+        seen = []
+        def stage(value):
+            seen.append(value)
+            started.set()
+            release.wait(5)
+        pipeline.stage(stage, 0)
+        pipeline.begin(1)
+        self.assertTrue(started.wait(5))
+        for value in (2, 3, 4, 5):
+            pipeline.begin(value)
+        release.set()
+        self.assertTrue(pipeline.join(timeout=5))
+        self.assertEqual(seen, [1, 4, 5])
+        self.assertEqual(pipeline.stats()[0]['dropped'], 2)
+        # without a queued run of the same request the oldest run is evicted instead of waiting
+        pipeline = Pipeline("TEST", 1, capacity=1, policy=Pipeline.DROP_OLDEST, key=lambda value: value % 2)
+        started.clear()
+        release.clear()
+        seen.clear()
+        pipeline.stage(stage, 0)
+        pipeline.begin(1)
+        self.assertTrue(started.wait(5))
+        pipeline.begin(2)
+        producer = threading.Thread(target=pipeline.begin, args=(3,))
+        producer.start()
+        producer.join(timeout=5)
+        self.assertFalse(producer.is_alive())
+        release.set()
+        self.assertTrue(pipeline.join(timeout=5))
+        self.assertEqual(seen, [1, 3])
+        self.assertEqual(pipeline.stats()[0]['dropped'], 1)
+
+    def test_block(self):
+        """
+        Test the block policy applies backpressure to the caller instead of dropping runs
+        """
+        pipeline = Pipeline("TEST", 1, policy=Pipeline.BLOCK)
+        started = threading.Event()
+        release = threading.Event()
+        seen = []
+        def stage(value):
+            seen.append(value)
+            started.set()
+            release.wait(5)
+        pipeline.stage(stage, 0)
+        pipeline.begin(1)
+        self.assertTrue(started.wait(5))
+        pipeline.begin(2)
+        producer = threading.Thread(target=pipeline.begin, args=(3,))
+        producer.start()
+        producer.join(timeout=0.2)
+        # the first stage queue is full so the producer is still waiting
+        self.assertTrue(producer.is_alive())
+        release.set()
+        producer.join(timeout=5)
+        self.assertTrue(pipeline.join(timeout=5))
+        self.assertEqual(seen, [1, 2, 3])
+        self.assertEqual(pipeline.stats()[0]['dropped'], 0)
+        with self.assertRaises(ValueError):
+            Pipeline("TEST", 1, policy='bogus')
+
+
+class TestPipelineMetrics(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable()
+        self.pipeline = Pipeline("TEST", 2)
+        def encode(value):
+            if value < 0: raise ValueError("negative frame")
+            return value
+        self.pipeline.stage(encode, 0)
+        self.pipeline.stage(Mock(return_value=None), 1)
+        self.metrics = PipelineMetrics([self.pipeline])
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_dump(self):
+        """
+        Test per stage runs, failures and last error
+        """
+        self.assertEqual([row['runs'] for row in self.metrics.dump()], [0, 0])
+        for value in (1, -1, 2):
+            self.pipeline.begin(value)
+        self.assertTrue(self.pipeline.join(timeout=5))
+        encode, upload = self.metrics.dump()
+        self.assertEqual((encode['pipeline'], encode['index'], encode['runs'], encode['failures']), ("TEST", 0, 3, 1))
+        self.assertIn('negative frame', encode['error'])
+        self.assertEqual((upload['runs'], upload['failures'], upload['error']), (2, 0, None))
+        self.assertGreaterEqual(encode['slowest'], encode['mean'])
+        self.assertIn('TEST', str(self.metrics))
+
+    def test_export(self):
+        """
+        Test registry pipelines are exported through the metrics registry snapshot
+        """
+        self.assertEqual(
+            {pipeline.name for pipeline in PipelineMetrics().pipelines},
+            {'PREVIEW', 'THUMBNAIL', 'AVATAR', 'REGISTRATION', 'CAPTURE'}
+        )
+        self.assertEqual(metrics.snapshot()['collectors']['pipelines'], PipelineMetrics().dump())
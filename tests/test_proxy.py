@@ -16,8 +16,10 @@ Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
 import copy
+import time
 import logging
 import unittest
+import threading
 from unittest.mock import MagicMock, Mock, call, patch
 
 from tests.resources import models
@@ -29,12 +31,13 @@ from monitor.events.pipeline import Pipeline
 from monitor.api.api_handler import ApiHandler
 from monitor.models.experiment import Experiment
 from monitor.environment.state_manager import StateManager
+from monitor.ui.static.settings import UISettings as uis
 
 
 class TestProxy(unittest.TestCase):
 
     @patch.object(Pipeline, 'stage', lambda self, func, i: None)
-    @patch.object(Event, 'register', lambda self, _: None)
+    @patch.object(Event, 'register', lambda self, _, **kwargs: None)
     @patch.object(ApiHandler, '__init__', lambda a,b,c: None)
     def setUp(self):
         logging.disable()
@@ -188,7 +191,7 @@ class TestProxy(unittest.TestCase):
     @patch.object(StateManager, '__enter__')
     def test_upload_images(self, state: MagicMock, post_img: MagicMock):
         """
-        Test recursive experiment image posting method
+        Test experiment image posting: DPC_0 first then the rest of the set in parallel
 
         :param post_img: [description]
         :type post_img: MagicMock
@@ -219,17 +222,69 @@ class TestProxy(unittest.TestCase):
         state.return_value.experiment.id = exp_id
         captures = Mock(spec=Capture)
         captures.captures = [1, 2, 3, 4, 5]
-        captures.get_processed.return_value = file_payload = Mock()
+        file_payload = Mock()
+        encoders = []
+        def encode(index: int) -> Mock:
+            encoders.append(threading.current_thread())
+            return file_payload
+        captures.get_processed.side_effect = encode
         self.proxy.upload_images(captures)
+        # images are encoded in order on the calling thread, only the posts are parallel
+        self.assertEqual(captures.get_processed.call_args_list, [call(index=i) for i in range(5)])
+        self.assertEqual(set(encoders), {threading.current_thread()})
+        self.assertEqual(post_img.call_args_list[0], call(first, exp_id, file_payload))
         post_img.assert_has_calls(
             [
-                call(first, exp_id, file_payload),
                 call(second, exp_id, file_payload),
                 call(third, exp_id, file_payload),
                 call(fourth, exp_id, file_payload),
                 call(fifth, exp_id, file_payload)
-            ]
+            ], any_order=True
         )
+        self.assertEqual(post_img.call_count, 5)
+        # an image is only encoded once an upload worker can take it
+        self.proxy._in_flight = threading.BoundedSemaphore(2)
+        lock = threading.Lock()
+        counts = {'encoded': 0, 'posted': 0}
+        held = []
+        def encode_held(index: int) -> Mock:
+            with lock:
+                counts['encoded'] += 1
+                held.append(counts['encoded'] - counts['posted'])
+            return file_payload
+        def post_held(*_) -> int:
+            time.sleep(0.05)
+            with lock: counts['posted'] += 1
+            return img_id
+        captures.get_processed.side_effect = encode_held
+        post_img.reset_mock()
+        post_img.side_effect = post_held
+        self.proxy.upload_images(captures)
+        self.assertEqual(post_img.call_count, 5)
+        self.assertEqual(max(held), 2)
+        post_img.side_effect = None
+        captures.get_processed.side_effect = None
+        captures.get_processed.return_value = file_payload
+        # only the failed images of the set are cached
+        post_img.reset_mock()
+        def post(payload: dict, *_) -> int:
+            if payload['type'] == 'DPC_2': raise ConnectionError
+            return img_id
+        post_img.side_effect = post
+        with patch.object(ProxyCache, 'cache') as cache, patch.object(Event, 'trigger') as trigger:
+            self.proxy.upload_images(captures)
+            cache.assert_called_once_with(
+                ApiProxy.upload_images.__wrapped__, self.proxy, captures, image_id=img_id, pending=[2]
+            )
+            trigger.assert_called_once_with(status=uis.STATUS_OK)
+        self.assertEqual(post_img.call_count, 5)
+        # failing to create the image pack caches the whole set
+        post_img.reset_mock()
+        post_img.side_effect = ConnectionError
+        with patch.object(ProxyCache, 'cache') as cache:
+            self.proxy.upload_images(captures)
+            cache.assert_called_once_with(ApiProxy.upload_images.__wrapped__, self.proxy, captures)
+        post_img.assert_called_once()
 
     @patch.object(ApiHandler, 'post_preview')
     def test_upload_preview(self, post_preview: MagicMock):
@@ -2,25 +2,61 @@
 """
 Unittest for Proxy Cache
 ========================
-Date: 2021-05
+Date: 2026-10
 
 Dependencies:
 -------------
 ```
+import os
+import logging
+import tempfile
 import unittest
-from unittest.mock import Mock
-from monitor.api.cache import ProxyCache
+import numpy as np
+from functools import partial
+from unittest.mock import Mock, patch
+from monitor.sys.decorators import cache
+from monitor.imaging.capture import Capture
+from monitor.api.cache import ProxyCache, SpilledCapture
+from monitor.metrics.registry import MetricsRegistry as metrics
 ```
 Copyright © 2021 Incuvers. All rights reserved.
 Unauthorized copying of this file, via any medium is strictly prohibited
 Proprietary and confidential
 """
-
+import os
+import logging
+import tempfile
 import unittest
-
+import numpy as np
 from functools import partial
-from unittest.mock import Mock
-from monitor.api.cache import ProxyCache
+from unittest.mock import Mock, patch
+from monitor.sys.decorators import cache
+from monitor.imaging.capture import Capture
+from monitor.api.cache import ProxyCache, SpilledCapture
+from monitor.metrics.registry import MetricsRegistry as metrics
+
+
+class _Proxy:
+
+    def __init__(self, path: str) -> None:
+        self._logger = logging.getLogger(__name__)
+        self.cache = ProxyCache(path)
+        self.online = False
+        self.uploads = []
+
+    @cache
+    def upload(self, capture: Capture, index: int = 0) -> None:
+        if not self.online: raise ConnectionError
+        self.uploads.append((capture, index))
+
+    @cache
+    def preview(self, capture: Capture) -> None:
+        if not self.online: raise ConnectionError
+        self.uploads.append((capture, None))
+
+    @cache
+    def fetch(self, resource_id: int) -> None:
+        if not self.online: raise TimeoutError
 
 
 class TestProxyCache(unittest.TestCase):
@@ -60,3 +96,90 @@ class TestProxyCache(unittest.TestCase):
                 self.proxy_cache.cache(fn, "test")
                 self.proxy_cache.execute()
                 self.assertNotEqual(self.proxy_cache._proxy_buffer.get(fn.__hash__()), None)
+
+
+class TestProxyCacheOutbox(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.proxy = _Proxy(self.tmp.name)
+        self.captures = [np.full((4, 4, 1), i, dtype=np.uint16) for i in range(4)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def payloads(self):
+        return sorted(name for name in os.listdir(self.tmp.name) if name.endswith('.npz'))
+
+    def test_persist_and_restore(self):
+        """ Test failed requests survive a restart and are replayed in FIFO order """
+        self.proxy.upload(Capture(self.captures, 50, False), index=1)
+        first = self.payloads()
+        self.assertEqual(len(first), 1)
+        # duplicate request types are replaced along with their payload files
+        self.proxy.upload(Capture(self.captures, 50, False), index=2)
+        self.assertEqual(len(self.payloads()), 1)
+        self.assertNotEqual(self.payloads(), first)
+        self.proxy.fetch(7)
+        # restart
+        restarted = _Proxy(self.tmp.name)
+        self.assertEqual(restarted.cache.restore(restarted), 2)
+        self.assertEqual(len(restarted.cache._proxy_buffer), 2)
+        # captures are restored spilled
+        self.assertIsInstance(list(restarted.cache._proxy_buffer.values())[0].args[1], SpilledCapture)
+        restarted.online = True
+        restarted.cache.execute()
+        capture, index = restarted.uploads[0]
+        self.assertEqual(index, 2)
+        self.assertEqual((capture.dpc_exposure, capture.gfp_capture), (50, False))
+        for restored, original in zip(capture.captures, self.captures):
+            np.testing.assert_array_equal(restored, original)
+        # replayed requests are removed from the outbox
+        self.assertEqual(len(restarted.cache._proxy_buffer), 0)
+        self.assertEqual(self.payloads(), [])
+        self.assertEqual(_Proxy(self.tmp.name).cache.restore(restarted), 0)
+
+    def test_outbox_bounds(self):
+        """ Test the outbox evicts the oldest requests and discards expired requests """
+        with patch.object(ProxyCache, 'MAX_ENTRIES', 1):
+            self.proxy.upload(Capture(self.captures, 50, False))
+            self.proxy.fetch(7)
+        self.assertEqual(list(self.proxy.cache._proxy_buffer.values())[0].args[1:], (7,))
+        self.assertEqual(self.payloads(), [])
+        self.proxy.upload(Capture(self.captures, 50, False))
+        restarted = _Proxy(self.tmp.name)
+        with patch.object(ProxyCache, 'MAX_AGE', -1):
+            self.assertEqual(restarted.cache.restore(restarted), 0)
+        self.assertEqual(self.payloads(), [])
+
+    def test_spill(self):
+        """ Test captures past the ram budget are spilled and reloaded for replay """
+        nbytes = sum(frame.nbytes for frame in self.captures)
+        with patch.object(ProxyCache, 'RAM_BUDGET', nbytes):
+            self.proxy.upload(Capture(self.captures, 50, False))
+            self.proxy.preview(Capture(self.captures, 50, True))
+            upload, preview = self.proxy.cache._proxy_buffer.values()
+            # the oldest capture is spilled
+            self.assertIsInstance(upload.args[1], SpilledCapture)
+            self.assertIsInstance(preview.args[1], Capture)
+            self.assertEqual(metrics.gauge('api.cache_resident').snapshot(), nbytes)
+            # failed replays reuse the payload files
+            self.proxy.cache.execute()
+            self.assertEqual(len(self.payloads()), 2)
+            self.assertIsInstance(list(self.proxy.cache._proxy_buffer.values())[0].args[1], SpilledCapture)
+            self.proxy.online = True
+            self.proxy.cache.execute()
+        self.assertEqual([index for _, index in self.proxy.uploads], [0, None])
+        for capture, _ in self.proxy.uploads:
+            for loaded, original in zip(capture.captures, self.captures):
+                np.testing.assert_array_equal(loaded, original)
+        self.assertEqual(self.payloads(), [])
+        self.assertEqual(len(self.proxy.cache._proxy_buffer), 0)
+
+    def test_memory_only(self):
+        """ Test requests which cannot be serialized are kept in memory only """
+        self.proxy.fetch(Mock())
+        self.assertEqual(len(self.proxy.cache._proxy_buffer), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, ProxyCache.MANIFEST)))
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Unittests for Sensorframe Parser
+================================
+Date: 2026-10
+
+Dependencies:
+-------------
+```
+import unittest
+from monitor.models.icb import ICB
+from monitor.models.sensorframe import SensorframeParser
+from monitor.exceptions.icb import SensorframeError
+from monitor.exceptions.state import FrozenStateError
+from tests.resources import icb as resources
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import unittest
+from monitor.models.icb import ICB
+from monitor.models.sensorframe import SensorframeParser
+from monitor.exceptions.icb import SensorframeError
+from monitor.exceptions.state import FrozenStateError
+from tests.resources import icb as resources
+
+
+class TestSensorframeParser(unittest.TestCase):
+
+    def setUp(self):
+        """
+        """
+        self.parser = SensorframeParser(prefix=b'173~1bfa167e$')
+
+    def test_parse(self):
+        """
+        Test a sensorframe line is parsed and scaled into an initialized model
+        """
+        for frame in (resources.ICB_READLINE, bytearray(resources.ICB_READLINE), memoryview(resources.ICB_READLINE)):
+            with self.subTest(frame=type(frame).__name__):
+                icb = self.parser.parse(frame)
+                self.assertTrue(icb.initialized)
+                for key, value in resources.ICB_SENSORFRAME_2_CONV.items():
+                    if key != 'CT':
+                        self.assertEqual(icb.serialize()[key], value)
+                self.assertEqual(icb.ct, ICB.calibration_time_to_iso(37531))
+
+    def test_parse_invalid(self):
+        """
+        Test malformed frames are rejected without populating the model
+        """
+        icb = ICB()
+        with self.assertRaises(SensorframeError):
+            self.parser.parse(resources.ICB_READLINE_MALFORMED, icb)
+        with self.assertRaises(SensorframeError):
+            self.parser.parse(resources.ICB_READLINE.replace(b'173~', b'174~'), icb)
+        with self.assertRaises(SensorframeError):
+            self.parser.parse(resources.ICB_READLINE[:-1], icb)
+        with self.assertRaises(SensorframeError):
+            self.parser.parse(resources.ICB_READLINE.replace(b'&TM|', b'&TM|2|'), icb)
+        # fields read before the failing field are not written either
+        self.assertFalse(hasattr(icb, 'iv'))
+        self.assertFalse(hasattr(icb, 'timestamp'))
+        self.assertEqual(icb._mask, 0)
+        with self.assertRaises(FrozenStateError):
+            self.parser.parse(resources.ICB_READLINE, ICB().snapshot())
+
+    def test_out_of_range(self):
+        """
+        Test out of range readings are dropped as in the model setters
+        """
+        icb = self.parser.parse(resources.ICB_READLINE.replace(b'&TP|3660', b'&TP|9000'))
+        self.assertFalse(hasattr(icb, 'tp'))
+        self.assertFalse(icb.initialized)
+
+    def test_feed(self):
+        """
+        Test frames split across serial reads are reassembled and malformed frames counted
+        """
+        stream = resources.ICB_READLINE + resources.ICB_READLINE_MALFORMED + resources.ICB_READLINE
+        self.assertEqual(self.parser.feed(stream[:100]), [])
+        frames = self.parser.feed(memoryview(stream)[100:200])
+        self.assertEqual(len(frames), 1)
+        frames = self.parser.feed(stream[200:])
+        self.assertEqual(len(frames), 1)
+        self.assertTrue(frames[0].initialized)
+        self.assertEqual(self.parser.rejected, 1)
+        self.assertEqual(self.parser.feed(b''), [])
@@ -15,6 +15,7 @@ Proprietary and confidential
 import asyncio
 import logging
 import unittest
+import threading
 from typing import Callable
 from unittest.mock import MagicMock, Mock, call, patch
 
@@ -24,8 +25,11 @@ from monitor.models.imaging_profile import ImagingProfile
 from monitor.models.protocol import Protocol
 from monitor.models.device import Device
 from monitor.environment.registry import CallbackRegistry as cr
+from monitor.environment.registry import StateRegistry as sr
+from monitor.environment.profiler import SubscriberProfiler
+from monitor.exceptions.state import FrozenStateError
 # mock class variable declarations before import
-from monitor.environment.state_manager import StateManager
+from monitor.environment.state_manager import PropertyCondition, StateManager
 from tests.resources import models, icb
 
 
@@ -311,3 +315,267 @@ class TestState(unittest.TestCase):
                 call(side_effect=Exception)
             ]
         )
+
+
+class TestStateSnapshot(unittest.TestCase):
+
+    def setUp(self) -> None:
+        logging.disable()
+        self._icb = sr.icb.snapshot
+
+    def tearDown(self) -> None:
+        sr.icb.swap(self._icb)
+        logging.disable(logging.NOTSET)
+
+    @cm_wrapper
+    def test_snapshot_read(self, state: StateManager):
+        """
+        Test runtime model reads share a single frozen snapshot
+
+        :param state: state manager instance
+        :type state: StateManager
+        """
+        snapshot = state.icb
+        self.assertTrue(snapshot.frozen)
+        self.assertIs(snapshot, state.icb)
+        with self.assertRaises(FrozenStateError):
+            snapshot.tp = 37.0
+
+    @cm_wrapper
+    def test_snapshot_edit(self, state: StateManager):
+        """
+        Test edits are staged on a mutable copy and replace the snapshot on commit
+
+        :param state: state manager instance
+        :type state: StateManager
+        """
+        snapshot = state.icb
+        staged = snapshot.edit()
+        self.assertFalse(staged.frozen)
+        staged.tp = 37.0
+        self.assertTrue(state.commit(staged, source=True))
+        self.assertIsNot(snapshot, state.icb)
+        self.assertEqual(state.icb.tp, 37.0)
+        # staged changes after a commit do not leak into the committed snapshot
+        staged.tp = 38.0
+        self.assertEqual(state.icb.tp, 37.0)
+
+    @cm_wrapper
+    def test_sequence(self, state: StateManager):
+        """
+        Test commits increment the model sequence number and stale compare-and-swap commits are rejected
+
+        :param state: state manager instance
+        :type state: StateManager
+        """
+        seq = state.sequence(ICB)
+        first = state.icb.edit()
+        second = state.icb.edit()
+        first.tp = 37.0
+        second.tp = 38.0
+        self.assertTrue(state.commit(first, source=True, seq=seq))
+        self.assertEqual(state.sequence(ICB), seq + 1)
+        # second edit was based on a superseded snapshot
+        self.assertFalse(state.commit(second, source=True, seq=seq))
+        self.assertEqual(state.icb.tp, 37.0)
+        self.assertEqual(state.sequence(ICB), seq + 1)
+
+
+class TestStateDispatch(unittest.TestCase):
+
+    def setUp(self) -> None:
+        logging.disable()
+        self._icb = sr.icb.snapshot
+
+    def tearDown(self) -> None:
+        sr.icb.swap(self._icb)
+        cr.icb.clear()
+        cr.icb_properties.clear()
+        logging.disable(logging.NOTSET)
+
+    @cm_wrapper
+    def test_persistent_loop(self, state: StateManager):
+        """
+        Test subscribers for successive commits run on the same long-lived dispatch loop
+
+        :param state: state manager instance
+        :type state: StateManager
+        """
+        loops = []
+        async def subscriber(_: ICB) -> None: loops.append(asyncio.get_running_loop())
+        state.subscribe(ICB, subscriber)
+        state.commit(state.icb.edit(), source=True)
+        state.commit(state.icb.edit(), source=True)
+        self.assertEqual(len(loops), 2)
+        self.assertIs(loops[0], loops[1])
+        self.assertIs(loops[0], StateManager._dispatcher())
+
+    @cm_wrapper
+    def test_commit_no_wait(self, state: StateManager):
+        """
+        Test a commit can return before its subscribers complete
+
+        :param state: state manager instance
+        :type state: StateManager
+        """
+        release = threading.Event()
+        done = threading.Event()
+        async def subscriber(_: ICB) -> None:
+            await asyncio.get_running_loop().run_in_executor(None, release.wait, 1)
+            done.set()
+        state.subscribe(ICB, subscriber)
+        self.assertTrue(state.commit(state.icb.edit(), source=True, wait=False))
+        self.assertFalse(done.is_set())
+        release.set()
+        self.assertTrue(done.wait(1))
+
+    @cm_wrapper
+    def test_property_index(self, state: StateManager):
+        """
+        Test property triggers are only evaluated for the fields changed by a commit
+
+        :param state: state manager instance
+        :type state: StateManager
+        """
+        tp_trigger = Mock(return_value=True)
+        tc_trigger = Mock(return_value=True)
+        legacy_trigger = Mock(return_value=False)
+        async def tp_callback(_: ICB) -> None: ...
+        async def tc_callback(_: ICB) -> None: ...
+        async def legacy_callback(_: ICB) -> None: ...
+        state.subscribe_property(ICB, PropertyCondition[ICB](tp_trigger, tp_callback, fields=('tp',)))
+        state.subscribe_property(ICB, PropertyCondition[ICB](tc_trigger, tc_callback, fields=('tc',)))
+        state.subscribe_property(ICB, PropertyCondition[ICB](legacy_trigger, legacy_callback))
+        icb = state.icb.edit()
+        icb.tc = 36.5
+        state.commit(icb, source=True)
+        tc_trigger.assert_called_once()
+        tp_trigger.assert_not_called()
+        # triggers without declared fields are evaluated on every commit
+        legacy_trigger.assert_called_once()
+
+    def test_diff(self):
+        """
+        Test field level diff reports property names of changed fields
+        """
+        old = ICB()
+        new = old.edit()
+        self.assertEqual(old.diff(new), set())
+        new.tc = 36.5
+        new.tp = 37.0
+        self.assertTrue({'tc', 'tp'} <= old.diff(new))
+        self.assertNotIn('cc', old.diff(new))
+
+
+class TestStateTransaction(unittest.TestCase):
+
+    def setUp(self) -> None:
+        logging.disable()
+        self._icb = sr.icb.snapshot
+
+    def tearDown(self) -> None:
+        sr.icb.swap(self._icb)
+        cr.icb.clear()
+        cr.icb_isv.clear()
+        logging.disable(logging.NOTSET)
+
+    @cm_wrapper
+    def test_transaction(self, state: StateManager):
+        """
+        Test batched field edits are validated and committed once
+
+        :param state: state manager instance
+        :type state: StateManager
+        """
+        validator = Mock(return_value=True)
+        subscriber_mock = Mock()
+        async def subscriber(icb: ICB) -> None: subscriber_mock(icb)
+        state.subscribe_isv(ICB, validator)
+        state.subscribe(ICB, subscriber)
+        with state.transaction() as txn:
+            txn.icb.tp = 37.0
+            txn.icb.op = 20.0
+            txn.icb.cp = 5.0
+        self.assertTrue(txn.committed)
+        validator.assert_called_once()
+        subscriber_mock.assert_called_once_with(state.icb)
+        self.assertEqual((state.icb.tp, state.icb.op, state.icb.cp), (37.0, 20.0, 5.0))
+
+    @cm_wrapper
+    def test_transaction_rejected(self, state: StateManager):
+        """
+        Test a failed validation discards all staged changes
+
+        :param state: state manager instance
+        :type state: StateManager
+        """
+        snapshot = state.icb
+        state.subscribe_isv(ICB, Mock(return_value=False))
+        with state.transaction() as txn:
+            txn.icb.tp = 37.0
+        self.assertFalse(txn.committed)
+        self.assertIs(state.icb, snapshot)
+        # exceptions in the transaction body abort the commit
+        with self.assertRaises(ValueError):
+            with state.transaction(source=True) as txn:
+                txn.icb.tp = 37.0
+                raise ValueError
+        self.assertFalse(txn.committed)
+        self.assertIs(state.icb, snapshot)
+
+    @cm_wrapper
+    def test_transaction_stale(self, state: StateManager):
+        """
+        Test a transaction fails instead of overwriting a commit made after staging
+
+        :param state: state manager instance
+        :type state: StateManager
+        """
+        with state.transaction(source=True) as txn:
+            txn.icb.tp = 37.0
+            icb = state.icb.edit()
+            icb.tp = 30.0
+            self.assertTrue(state.commit(icb, source=True))
+        self.assertFalse(txn.committed)
+        self.assertTrue(txn.stale)
+        self.assertEqual(state.icb.tp, 30.0)
+
+
+class TestSubscriberProfiler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        logging.disable()
+        self.profiler = SubscriberProfiler(deadline=0.5)
+
+    def tearDown(self) -> None:
+        logging.disable(logging.NOTSET)
+
+    def test_record(self):
+        """
+        Test latency percentiles, max and deadline overruns are tracked per model and subscriber
+        """
+        for elapsed in [0.01] * 98 + [0.2, 0.9]:
+            self.profiler.record('ICB', 'Gauge.reset_loaders', elapsed)
+        self.profiler.record('Device', 'Menu.update', 0.001)
+        slowest, fastest = self.profiler.dump()
+        self.assertEqual((slowest['model'], slowest['subscriber']), ('ICB', 'Gauge.reset_loaders'))
+        self.assertEqual(slowest['count'], 100)
+        self.assertEqual(slowest['p50'], 0.01)
+        self.assertEqual(slowest['p99'], 0.2)
+        self.assertEqual(slowest['max'], 0.9)
+        self.assertEqual(slowest['overruns'], 1)
+        self.assertEqual(fastest['overruns'], 0)
+        self.assertIsInstance(str(self.profiler), str)
+        self.profiler.reset()
+        self.assertEqual(self.profiler.dump(), [])
+
+    def test_subscriber_runner(self):
+        """
+        Test the subscriber runner records subscriber latencies with the state manager profiler
+        """
+        async def subscriber(_: ICB) -> None: ...
+        with patch.object(StateManager, 'profiler', self.profiler):
+            asyncio.run(StateManager()._subscriber_runner(ICB(), [subscriber]))
+        row, = self.profiler.dump()
+        self.assertEqual(row['model'], 'ICB')
+        self.assertEqual(row['subscriber'], subscriber.__qualname__)
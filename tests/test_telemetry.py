@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Unittests for Telemetry Buffer
+==============================
+Date: 2026-10
+
+Dependencies:
+-------------
+```
+import logging
+import unittest
+import threading
+import numpy as np
+from monitor.models.icb import ICB
+from monitor.environment.telemetry import TelemetryBuffer
+from monitor.environment.registry import StateRegistry as sr
+from monitor.environment.state_manager import StateManager
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import logging
+import unittest
+import threading
+import numpy as np
+from monitor.models.icb import ICB
+from monitor.environment.telemetry import TelemetryBuffer
+from monitor.environment.registry import StateRegistry as sr
+from monitor.environment.state_manager import StateManager
+
+
+def frame(tc: float) -> ICB:
+    icb = ICB()
+    icb.tc = tc
+    icb.tp = 37.0
+    return icb
+
+
+class TestTelemetryBuffer(unittest.TestCase):
+
+    def setUp(self) -> None:
+        logging.disable()
+        self.buffer = TelemetryBuffer(capacity=8)
+
+    def tearDown(self) -> None:
+        logging.disable(logging.NOTSET)
+
+    def test_append(self):
+        """
+        Test frames wrap around the fixed capacity in chronological order
+        """
+        for i in range(12):
+            self.buffer.append(frame(30.0 + i), timestamp=1000.0 + i)
+        self.assertEqual(len(self.buffer), 8)
+        times, values = self.buffer.last(100)
+        np.testing.assert_array_equal(times, np.arange(1004.0, 1012.0))
+        np.testing.assert_array_equal(values[:, 0], np.arange(34.0, 42.0))
+        # uninitialized readings are NaN
+        self.assertTrue(np.isnan(values[:, TelemetryBuffer.FIELDS.index('cc')]).all())
+        times, _ = self.buffer.last(3)
+        np.testing.assert_array_equal(times, [1009.0, 1010.0, 1011.0])
+
+    def test_window(self):
+        """
+        Test time windows are resolved across the ring boundary
+        """
+        for i in range(11):
+            self.buffer.append(frame(30.0 + i), timestamp=1000.0 + i * 60)
+        times, _ = self.buffer.window(150, now=1600.0)
+        np.testing.assert_array_equal(times, [1480.0, 1540.0, 1600.0])
+        self.assertEqual(len(self.buffer.window(10, now=5000.0)[0]), 0)
+        self.assertEqual(len(self.buffer.window(1e6, now=1600.0)[0]), 8)
+        # out of order frames are clamped to keep the time axis sorted
+        self.buffer.append(frame(20.0), timestamp=0.0)
+        self.assertEqual(self.buffer.last(1)[0][0], 1600.0)
+
+    def test_concurrent_window(self):
+        """
+        Test windows read during concurrent appends start at the first frame inside the window
+        """
+        self.buffer = TelemetryBuffer(capacity=4096)
+        self.buffer.append(frame(30.0), timestamp=0.0)
+        done = threading.Event()
+
+        def writer():
+            for i in range(1, 4000):
+                self.buffer.append(frame(30.0), timestamp=float(i))
+            done.set()
+        threading.Thread(target=writer, daemon=True).start()
+        while not done.is_set():
+            times, values = self.buffer.window(1e6 - 0.5, now=1e6)
+            self.assertEqual(len(times), len(values))
+            if len(times): self.assertEqual(times[0], 1.0)
+
+    def test_stats(self):
+        """
+        Test window statistics
+        """
+        for i in range(4):
+            self.buffer.append(frame(30.0 + i), timestamp=1000.0 + i)
+        stats = self.buffer.stats(10, now=1003.0)
+        self.assertEqual(stats['tc'], {'min': 30.0, 'max': 33.0, 'mean': 31.5})
+        self.assertTrue(np.isnan(stats['oc']['mean']))
+        self.assertTrue(np.isnan(self.buffer.stats(10, now=5000.0)['tc']['max']))
+
+    def test_commit(self):
+        """
+        Test icb commits feed the state manager telemetry buffer
+        """
+        saved, telemetry = sr.icb.snapshot, StateManager.telemetry
+        StateManager.telemetry = self.buffer
+        try:
+            state = StateManager()
+            icb = frame(36.5)
+            icb.timestamp = '2021-05-01T00:00:00+00:00'
+            state.commit(icb, source=True)
+            times, values = self.buffer.last(1)
+            self.assertEqual(values[0, 0], np.float32(36.5))
+            self.assertEqual(times[0], 1619827200.0)
+        finally:
+            StateManager.telemetry = telemetry
+            sr.icb.swap(saved)
@@ -54,6 +54,7 @@ class TestThreadManager(unittest.TestCase):
         with self.assertRaises(InterruptedError):
             self.tm._monitor()
         trigger.assert_called_once_with(uis.STATUS_ALERT)
+        self.assertEqual(self.tm.memory_percent.snapshot(), self.tm.MEM_THRESH + 1)
 
     @patch.object(Thread, 'start')
     def test_start(self, start: MagicMock):
@@ -67,11 +68,11 @@ class TestThreadManager(unittest.TestCase):
         """
         Test function lock decorator and return args
         """
-        @self.tm.lock(self.tm.api_lock)
+        @self.tm.lock(self.tm.arduino_lock)
         def func() -> bool:
-            self.assertTrue(self.tm.api_lock.locked())
+            self.assertTrue(self.tm.arduino_lock.locked())
             return True
-        self.assertFalse(self.tm.api_lock.locked())
+        self.assertFalse(self.tm.arduino_lock.locked())
         self.assertTrue(func())
 
     @patch.object(ThreadManager, 'assign_name', **{'return_value': "test"})
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Unittests for Frame Profiler
+============================
+Date: 2026-10
+
+Dependencies:
+-------------
+```
+import sys
+import time
+import logging
+import unittest
+import threading
+from unittest.mock import patch
+from monitor.ui.profiler import FrameProfiler
+```
+Copyright © 2021 Incuvers. All rights reserved.
+Unauthorized copying of this file, via any medium is strictly prohibited
+Proprietary and confidential
+"""
+import sys
+import time
+import logging
+import unittest
+import threading
+from unittest.mock import patch
+from monitor.ui.profiler import FrameProfiler
+
+
+class TestFrameProfiler(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable()
+        self.profiler = FrameProfiler(fps=50, enabled=True, window=4)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def frame(self, clock, laps):
+        """
+        Record a frame from a sequence of (lap, seconds) using a fake clock
+        """
+        self.profiler.begin()
+        for name, elapsed in laps:
+            clock.return_value += elapsed
+            self.profiler.lap(name)
+        self.profiler.end()
+
+    @patch.object(time, 'perf_counter', return_value=100.0)
+    def test_laps(self, clock):
+        """
+        Test lap timing, the rolling window and worst offenders
+        """
+        for _ in range(3):
+            self.frame(clock, [('event.get', 0.001), ('redraw.O2Gauge', 0.004), ('display.flip', 0.002)])
+        self.frame(clock, [('event.get', 0.001), ('redraw.O2Gauge', 0.030), ('display.flip', 0.002)])
+        summary = self.profiler.summary()
+        self.assertEqual(summary['frames'], 4)
+        self.assertAlmostEqual(summary['p50'], 0.007)
+        self.assertAlmostEqual(summary['max'], 0.033)
+        self.assertEqual(self.profiler.over_budget, 1)
+        worst = self.profiler.worst(2)
+        self.assertEqual([row['lap'] for row in worst], ['redraw.O2Gauge', 'display.flip'])
+        self.assertAlmostEqual(worst[0]['p99'], 0.030)
+        self.assertEqual(sum(count for _, count in self.profiler.histogram()), 4)
+        self.assertIn('redraw.O2Gauge', self.profiler.lines()[1])
+        self.assertIn('redraw.O2Gauge', str(self.profiler))
+        # the window only retains the most recent frames
+        self.frame(clock, [('event.get', 0.001)])
+        self.assertEqual(self.profiler.summary()['frames'], 4)
+
+    def test_disabled(self):
+        """
+        Test nothing is recorded while disabled and the overlay toggle enables recording
+        """
+        profiler = FrameProfiler(fps=60, enabled=False)
+        profiler.begin()
+        profiler.lap('event.get')
+        profiler.end()
+        self.assertEqual(profiler.summary()['frames'], 0)
+        self.assertEqual(profiler.laps, {})
+        profiler.toggle()
+        self.assertTrue(profiler.overlay and profiler.enabled)
+        profiler.begin()
+        profiler.lap('event.get')
+        profiler.end()
+        self.assertEqual(profiler.summary()['frames'], 1)
+        profiler.toggle()
+        self.assertFalse(profiler.overlay or profiler.enabled)
+
+    def test_concurrent_summary(self):
+        """
+        Test the windows can be summarized from another thread while frames are recorded
+        """
+        profiler = FrameProfiler(fps=60, enabled=True, window=8)
+        done = threading.Event()
+        errors = []
+
+        def report():
+            while not done.is_set():
+                try:
+                    profiler.summary()
+                    profiler.histogram()
+                    profiler.worst(4)
+                except RuntimeError as exc:
+                    errors.append(exc)
+        # switch threads often so the reporter interleaves with the appends
+        interval = sys.getswitchinterval()
+        self.addCleanup(sys.setswitchinterval, interval)
+        sys.setswitchinterval(1e-6)
+        reporter = threading.Thread(target=report, daemon=True)
+        reporter.start()
+        for i in range(20000):
+            profiler.begin()
+            profiler.lap('redraw.{}'.format(i % 16))
+            profiler.end()
+        done.set()
+        reporter.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(profiler.summary()['frames'], 8)